@@ -0,0 +1,311 @@
+"""
+Headless batch entry point for Social Media GIF Downloader.
+Downloads/converts a list of URLs without importing tkinter or customtkinter
+and writes one JSON result line per URL to stdout.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Callable, List, Optional, Dict, Any, TextIO, Tuple
+
+from platforms import get_platform_downloader, ClipEdit, DownloadError, OUTPUT_EXTENSIONS, OUTPUT_FORMAT_MP4
+from config import Config
+from metadata_cache import MetadataCache
+from output_cache import OutputCache
+from job_queue import Job, JobQueue, FINISHED_STATES, JOB_SUCCEEDED, JOB_CANCELLED
+from cancellation import CancelToken, JobCancelledError
+from workspace import WorkspaceManager
+from progress import ProgressEvent
+
+
+OUTPUT_FORMATS = ["gif", "mp4", "webp", "loop_mp4"]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        prog="social-media-gif-downloader-batch",
+        description="Download social media posts as GIF or MP4 without the GUI. "
+                    "Writes one JSON result line per URL to stdout."
+    )
+    parser.add_argument("urls", nargs="*", help="Post URLs to download")
+    parser.add_argument("-i", "--input-file",
+                        help="Read URLs from a file, one per line ('-' for stdin)")
+    parser.add_argument("-o", "--output-dir", default=".",
+                        help="Directory to write outputs to (default: current directory)")
+    parser.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default=None,
+                        help="Output format (default: preferred format from config)")
+    parser.add_argument("--fps", type=int, default=None,
+                        help="GIF frame rate, 1-60 (default: FPS setting from config)")
+    parser.add_argument("--auto-fps", action="store_true", default=None,
+                        help="Use the largest divisor of the source frame rate at or below --fps "
+                             "(default: auto_fps from config)")
+    parser.add_argument("--engine", choices=["subprocess", "in_process"], default=None,
+                        help="yt-dlp engine (default: download engine from config)")
+    parser.add_argument("--gif-engine", choices=["ffmpeg", "stream", "numpy", "moviepy"], default=None,
+                        help="GIF encoder (default: gif_engine from config)")
+    parser.add_argument("--dither", choices=["none", "ordered", "floyd_steinberg"], default=None,
+                        help="Dithering for the numpy GIF engine (default: gif_dither from config)")
+    parser.add_argument("--gif-workers", type=int, default=None,
+                        help="Processes for the numpy GIF engine, 0 for one per core (default: gif_workers from config)")
+    parser.add_argument("--no-gif-delta", action="store_true",
+                        help="Write full frames instead of changed regions with the numpy GIF engine")
+    parser.add_argument("--duplicate-threshold", type=float, default=None,
+                        help="Merge frames whose luma changes less than this (0-255, 0 = off) "
+                             "with the stream and numpy GIF engines (default: gif_duplicate_threshold from config)")
+    parser.add_argument("--optimize-gif", action="store_true",
+                        help="Losslessly re-optimize each finished GIF (default: gif_optimize from config)")
+    parser.add_argument("--full-formats", action="store_true",
+                        help="Download the best video and audio even for silent, scaled-down outputs "
+                             "(default: download_format_policy from config)")
+    parser.add_argument("--stream-convert", action="store_true",
+                        help="Convert single-file downloads while they download "
+                             "(default: stream_conversion from config)")
+    parser.add_argument("--http-fetcher", action="store_true",
+                        help="Fetch direct media URLs over pooled keep-alive connections in parallel ranges "
+                             "(default: http_fetcher from config)")
+    parser.add_argument("--max-bytes", type=int, default=None,
+                        help="Fit each GIF in this many bytes by lowering FPS, width and colors, 0 = no limit "
+                             "(default: max_gif_bytes from config)")
+    parser.add_argument("--start", type=float, default=None,
+                        help="Convert from this many seconds into the clip (default: gif_start from config)")
+    parser.add_argument("--end", type=float, default=None,
+                        help="Convert up to this many seconds into the clip (default: gif_end from config)")
+    parser.add_argument("--max-width", type=int, default=None,
+                        help="Scale GIFs down to at most this width, 0 = no limit (default: gif_max_width from config)")
+    parser.add_argument("--max-height", type=int, default=None,
+                        help="Scale GIFs down to at most this height, 0 = no limit (default: gif_max_height from config)")
+    parser.add_argument("--crop", type=parse_crop, default=None, metavar="W:H:X:Y",
+                        help="Crop GIFs to a W x H region at X,Y in source pixels (default: gif_crop from config)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of URLs processed concurrently (default: max_concurrent_jobs from config)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Disable the metadata and output caches")
+    parser.add_argument("--progress", action="store_true",
+                        help="Write JSON progress events (bytes, speed, ETA, frames) to stderr")
+    return parser.parse_args(argv)
+
+
+def parse_crop(value: str) -> Tuple[int, int, int, int]:
+    """Parse a W:H:X:Y crop argument."""
+    try:
+        crop = tuple(int(part) for part in value.split(":"))
+    except ValueError:
+        crop = ()
+    if len(crop) != 4 or min(crop[:2]) <= 0 or min(crop[2:]) < 0:
+        raise argparse.ArgumentTypeError(f"expected W:H:X:Y with positive width and height, got {value!r}")
+    return crop
+
+
+def read_urls(args: argparse.Namespace, stdin: Optional[TextIO] = None) -> List[str]:
+    """Collect URLs from arguments, an input file and/or stdin, skipping blanks and comments."""
+    stdin = stdin or sys.stdin
+    lines = list(args.urls)
+    if args.input_file == "-":
+        lines.extend(stdin.read().splitlines())
+    elif args.input_file:
+        with open(args.input_file, 'r', encoding='utf-8') as f:
+            lines.extend(f.read().splitlines())
+    elif not args.urls and not stdin.isatty():
+        lines.extend(stdin.read().splitlines())
+
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
+
+
+def _unique_output_path(output_dir: str, name: str, output_format: str, used: set) -> str:
+    """Return output_dir/name plus the format's extension, adding a counter if the name was already used in this run."""
+    ext = OUTPUT_EXTENSIONS[output_format]
+    candidate = os.path.join(output_dir, f"{name}{ext}")
+    counter = 1
+    while candidate in used:
+        candidate = os.path.join(output_dir, f"{name}_{counter}{ext}")
+        counter += 1
+    used.add(candidate)
+    return candidate
+
+
+def process_url(url: str, output_file: str, workspaces: WorkspaceManager, output_format: str, fps: int,
+                downloader_options: Dict[str, Any],
+                progress_callback: Optional[Callable[[ProgressEvent], None]] = None,
+                cancel_token: Optional[CancelToken] = None,
+                max_bytes: Optional[int] = None, edit: Optional[ClipEdit] = None,
+                auto_fps: bool = False) -> Dict[str, Any]:
+    """Download (and convert) a single URL, returning a JSON-serializable result."""
+    result: Dict[str, Any] = {"url": url, "status": "error", "output": None, "stats": {}}
+    start = time.monotonic()
+
+    downloader = get_platform_downloader(url, "", cancel_token=cancel_token, **downloader_options)
+    if downloader is None:
+        result["error"] = "Unsupported platform"
+        result["elapsed"] = round(time.monotonic() - start, 3)
+        return result
+    downloader.use_workspace(workspaces.acquire())
+
+    result["platform"] = downloader.platform_name
+    try:
+        if output_format != OUTPUT_FORMAT_MP4:
+            source_fps, _ = downloader.get_video_info(url)
+            result["source_fps"] = source_fps
+            success = downloader.download_media(url, output_file, progress_callback, fps=fps, max_bytes=max_bytes,
+                                                edit=edit, auto_fps=auto_fps, output_format=output_format)
+        else:
+            success = downloader.download_media(url, output_file, progress_callback, skip_conversion=True)
+
+        if success:
+            result["status"] = "ok"
+            result["output"] = os.path.abspath(output_file)
+        else:
+            result["error"] = "Download failed for an unknown reason"
+    except JobCancelledError as e:
+        result["status"] = "cancelled"
+        result["error"] = e.message
+    except DownloadError as e:
+        result["error"] = e.message
+        logging.error(f"Download error for {url}: {e}")
+    except Exception as e:
+        result["error"] = f"Unexpected error: {e}"
+        logging.error(f"Unexpected error for {url}: {e}", exc_info=True)
+    finally:
+        downloader.cleanup()
+
+    result["stats"] = dict(downloader.job_stats)
+    result["elapsed"] = round(time.monotonic() - start, 3)
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the batch downloader. Returns 0 if every URL succeeded, 1 otherwise (130 if interrupted)."""
+    logging.basicConfig(
+        stream=sys.stderr,
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    args = parse_args(argv)
+    config = Config()
+
+    output_format = args.format or config.get_preferred_output_format()
+    fps = args.fps if args.fps is not None else config.get_fps_settings()
+    fps = max(1, min(60, fps))
+    auto_fps = args.auto_fps if args.auto_fps is not None else config.get_auto_fps()
+    max_bytes = max(0, args.max_bytes if args.max_bytes is not None else config.get_max_gif_bytes()) or None
+    edit_options = config.get_clip_edit_options()
+    for option, value in (("start", args.start), ("end", args.end), ("crop", args.crop)):
+        if value is not None:
+            edit_options[option] = value
+    # 0 lifts a size limit set in the config
+    for option, value in (("max_width", args.max_width), ("max_height", args.max_height)):
+        if value is not None:
+            edit_options[option] = max(0, value) or None
+    try:
+        edit = ClipEdit(**edit_options)
+    except ValueError as e:
+        logging.error(str(e))
+        return 2
+
+    urls = read_urls(args)
+    if not urls:
+        logging.error("No URLs given")
+        return 2
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    downloader_options: Dict[str, Any] = {
+        "engine": args.engine or config.get_download_engine(),
+        "reuse_info": config.get_single_extraction(),
+        "gif_engine": args.gif_engine or config.get_gif_engine(),
+        "gif_dither": args.dither or config.get_gif_dither(),
+        "gif_delta": config.get_gif_delta_frames() and not args.no_gif_delta,
+        "gif_duplicate_threshold": max(0.0, args.duplicate_threshold if args.duplicate_threshold is not None
+                                       else config.get_gif_duplicate_threshold()),
+        "gif_optimize": config.get_gif_optimize() or args.optimize_gif,
+        "use_format_policy": config.get_download_format_policy() and not args.full_formats,
+        "stream_convert": config.get_stream_conversion() or args.stream_convert,
+        "http_fetcher": config.get_http_fetcher() or args.http_fetcher,
+        "gif_workers": max(0, args.gif_workers if args.gif_workers is not None else config.get_gif_workers()),
+    }
+    if not args.no_cache:
+        if config.get_metadata_cache_enabled():
+            downloader_options["metadata_cache"] = MetadataCache(
+                config.get_metadata_cache_path(),
+                ttl=config.get_metadata_cache_ttl(),
+                max_entries=config.get_metadata_cache_max_entries()
+            )
+        if config.get_output_cache_enabled():
+            downloader_options["output_cache"] = OutputCache(
+                config.get_output_cache_dir(),
+                max_bytes=config.get_output_cache_max_bytes()
+            )
+
+    output_lock = threading.Lock()
+    failures = 0
+
+    def on_state_change(job: Job) -> None:
+        nonlocal failures
+        if job.state not in FINISHED_STATES:
+            return
+        result = job.result if job.state == JOB_SUCCEEDED else {
+            "url": job.url, "status": "cancelled" if job.state == JOB_CANCELLED else "error",
+            "output": None, "stats": {}, "error": str(job.error)
+        }
+        with output_lock:
+            if result["status"] != "ok":
+                failures += 1
+            # Results are written in completion order
+            sys.stdout.write(json.dumps(result) + "\n")
+            sys.stdout.flush()
+
+    def make_progress_callback(url: str) -> Optional[Callable[[ProgressEvent], None]]:
+        if not args.progress:
+            return None
+
+        def on_progress(event: ProgressEvent) -> None:
+            with output_lock:
+                sys.stderr.write(json.dumps({"url": url, "progress": event.to_dict()}) + "\n")
+                sys.stderr.flush()
+
+        return on_progress
+
+    max_jobs = args.jobs if args.jobs is not None else config.get_max_concurrent_jobs()
+    queue = JobQueue(
+        max_workers=max_jobs,
+        platform_limits=config.get_platform_concurrency(),
+        on_state_change=on_state_change
+    )
+
+    workspaces = WorkspaceManager(quota_bytes=config.get_workspace_quota_bytes())
+    used_outputs: set = set()
+    try:
+        for index, url in enumerate(urls):
+            downloader = get_platform_downloader(url, "")
+            name = downloader.get_id_from_url(url) if downloader else f"post_{index}"
+            output_file = _unique_output_path(args.output_dir, name, output_format, used_outputs)
+
+            queue.submit(
+                url,
+                lambda job, url=url, output_file=output_file: process_url(
+                    url, output_file, workspaces, output_format, fps, downloader_options,
+                    progress_callback=make_progress_callback(url), cancel_token=job.cancel_token,
+                    max_bytes=max_bytes, edit=edit, auto_fps=auto_fps
+                ),
+                platform=downloader.platform_name if downloader else None
+            )
+        queue.shutdown(wait=True)
+    except KeyboardInterrupt:
+        # Ctrl+C: kill in-flight downloads, stop encodes and drop queued jobs
+        logging.warning("Interrupted, cancelling remaining jobs")
+        queue.cancel_all()
+        queue.shutdown(wait=True)
+        return 130
+    finally:
+        workspaces.release_all()
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
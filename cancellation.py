@@ -0,0 +1,71 @@
+"""
+Cooperative cancellation for Social Media GIF Downloader jobs.
+A CancelToken is shared between whoever may cancel a job (the GUI, the batch
+CLI, the job queue) and the code doing the work, which checks it between
+steps and registers callbacks to interrupt blocking work such as a running
+yt-dlp process.
+"""
+
+import logging
+import threading
+from typing import Callable, List, Optional
+
+
+class JobCancelledError(Exception):
+    """Raised inside a job when its cancellation token has been triggered."""
+
+    def __init__(self, message: str = "The job was cancelled."):
+        self.message = message
+        super().__init__(message)
+
+
+class CancelToken:
+    """Thread-safe, one-shot cancellation flag with cancel callbacks."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Request cancellation and run registered callbacks (once)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+            self._callbacks.clear()
+        for callback in callbacks:
+            self._run_callback(callback)
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """Run callback on cancellation, or right away if already cancelled."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        self._run_callback(callback)
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Sleep for up to timeout seconds, waking early on cancellation. Returns True if cancelled."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise JobCancelledError()
+
+    @staticmethod
+    def _run_callback(callback: Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            logging.warning(f"Cancel callback failed: {e}")
@@ -7,16 +7,44 @@ import json
 import logging
 import os
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 
 class Config:
     CONFIG_FILENAME = ".social_media_gif_downloader.json"
+    METADATA_CACHE_FILENAME = ".social_media_gif_downloader_metadata.sqlite"
+    OUTPUT_CACHE_DIRNAME = ".social_media_gif_downloader_cache"
     
     DEFAULT_SETTINGS = {
         "default_save_location": "",
         "preferred_output_format": "gif",
-        "fps_settings": 15
+        "fps_settings": 15,
+        "download_engine": "subprocess",
+        "gif_engine": "ffmpeg",
+        "gif_dither": "ordered",
+        "gif_workers": 0,
+        "gif_delta_frames": True,
+        "gif_duplicate_threshold": 2.0,
+        "gif_optimize": False,
+        "max_gif_bytes": 0,
+        "auto_fps": False,
+        "gif_start": 0.0,
+        "gif_end": None,
+        "gif_max_width": 0,
+        "gif_max_height": 0,
+        "gif_crop": None,
+        "single_extraction": True,
+        "download_format_policy": True,
+        "stream_conversion": False,
+        "http_fetcher": False,
+        "metadata_cache_enabled": True,
+        "metadata_cache_ttl": 900,
+        "metadata_cache_max_entries": 500,
+        "output_cache_enabled": True,
+        "output_cache_max_bytes": 512 * 1024 * 1024,
+        "max_concurrent_jobs": 3,
+        "platform_concurrency": {"twitter": 2, "pinterest": 2, "instagram": 1},
+        "workspace_quota_bytes": 2 * 1024 * 1024 * 1024
     }
     
     def __init__(self):
@@ -75,12 +103,12 @@ class Config:
         self.set("default_save_location", location)
     
     def get_preferred_output_format(self) -> str:
-        """Get the preferred output format ('gif' or 'mp4')."""
+        """Get the preferred output format ('gif', 'mp4', 'webp' or 'loop_mp4')."""
         return self.settings.get("preferred_output_format", "gif")
     
     def set_preferred_output_format(self, format: str) -> None:
-        """Set the preferred output format ('gif' or 'mp4')."""
-        if format not in ["gif", "mp4"]:
+        """Set the preferred output format ('gif', 'mp4', 'webp' or 'loop_mp4')."""
+        if format not in ["gif", "mp4", "webp", "loop_mp4"]:
             logging.warning(f"Invalid output format: {format}. Defaulting to 'gif'.")
             format = "gif"
         self.set("preferred_output_format", format)
@@ -95,3 +123,247 @@ class Config:
             logging.warning(f"Invalid FPS value: {fps}. Must be between 1 and 60.")
             fps = max(1, min(60, fps))
         self.set("fps_settings", fps)
+
+    def get_download_engine(self) -> str:
+        """Get the yt-dlp engine ('subprocess' or 'in_process')."""
+        return self.settings.get("download_engine", "subprocess")
+    
+    def set_download_engine(self, engine: str) -> None:
+        """Set the yt-dlp engine ('subprocess' or 'in_process')."""
+        if engine not in ["subprocess", "in_process"]:
+            logging.warning(f"Invalid download engine: {engine}. Defaulting to 'subprocess'.")
+            engine = "subprocess"
+        self.set("download_engine", engine)
+
+    def get_gif_engine(self) -> str:
+        """Get the GIF encoder ('ffmpeg', 'stream', 'numpy' or 'moviepy')."""
+        return self.settings.get("gif_engine", "ffmpeg")
+    
+    def set_gif_engine(self, engine: str) -> None:
+        """Set the GIF encoder ('ffmpeg', 'stream', 'numpy' or 'moviepy')."""
+        if engine not in ["ffmpeg", "stream", "numpy", "moviepy"]:
+            logging.warning(f"Invalid GIF engine: {engine}. Defaulting to 'ffmpeg'.")
+            engine = "ffmpeg"
+        self.set("gif_engine", engine)
+
+    def get_gif_dither(self) -> str:
+        """Get the dithering used by the numpy GIF engine ('none', 'ordered' or 'floyd_steinberg')."""
+        return self.settings.get("gif_dither", "ordered")
+    
+    def set_gif_dither(self, dither: str) -> None:
+        """Set the dithering used by the numpy GIF engine ('none', 'ordered' or 'floyd_steinberg')."""
+        if dither not in ["none", "ordered", "floyd_steinberg"]:
+            logging.warning(f"Invalid GIF dither mode: {dither}. Defaulting to 'ordered'.")
+            dither = "ordered"
+        self.set("gif_dither", dither)
+
+    def get_gif_workers(self) -> int:
+        """Get the number of processes used by the numpy GIF engine (0 = one per CPU core)."""
+        return self.settings.get("gif_workers", 0)
+    
+    def set_gif_workers(self, workers: int) -> None:
+        """Set the number of processes used by the numpy GIF engine (0 = one per CPU core)."""
+        if workers < 0:
+            logging.warning(f"Invalid GIF worker count: {workers}. Must be non-negative.")
+            workers = 0
+        self.set("gif_workers", workers)
+
+    def get_gif_delta_frames(self) -> bool:
+        """Get whether the numpy GIF engine writes only the changed region of each frame."""
+        return bool(self.settings.get("gif_delta_frames", True))
+    
+    def set_gif_delta_frames(self, enabled: bool) -> None:
+        """Set whether the numpy GIF engine writes only the changed region of each frame."""
+        self.set("gif_delta_frames", bool(enabled))
+
+    def get_gif_duplicate_threshold(self) -> float:
+        """Get the luma change (0-255) below which consecutive frames are merged (0 = off)."""
+        return self.settings.get("gif_duplicate_threshold", 2.0)
+    
+    def set_gif_duplicate_threshold(self, threshold: float) -> None:
+        """Set the luma change (0-255) below which consecutive frames are merged (0 = off)."""
+        if threshold < 0 or threshold > 255:
+            logging.warning(f"Invalid duplicate threshold: {threshold}. Must be between 0 and 255.")
+            threshold = max(0.0, min(255.0, threshold))
+        self.set("gif_duplicate_threshold", threshold)
+
+    def get_gif_optimize(self) -> bool:
+        """Get whether finished GIFs are losslessly re-optimized."""
+        return bool(self.settings.get("gif_optimize", False))
+    
+    def set_gif_optimize(self, enabled: bool) -> None:
+        """Set whether finished GIFs are losslessly re-optimized."""
+        self.set("gif_optimize", bool(enabled))
+
+    def get_download_format_policy(self) -> bool:
+        """Get whether GIF, WebP and looping MP4 jobs download the smallest adequate video-only rendition."""
+        return bool(self.settings.get("download_format_policy", True))
+    
+    def set_download_format_policy(self, enabled: bool) -> None:
+        """Set whether GIF, WebP and looping MP4 jobs download the smallest adequate video-only rendition."""
+        self.set("download_format_policy", bool(enabled))
+
+    def get_stream_conversion(self) -> bool:
+        """Get whether single-file downloads are converted while they download."""
+        return bool(self.settings.get("stream_conversion", False))
+    
+    def set_stream_conversion(self, enabled: bool) -> None:
+        """Set whether single-file downloads are converted while they download."""
+        self.set("stream_conversion", bool(enabled))
+
+    def get_http_fetcher(self) -> bool:
+        """Get whether direct media URLs are fetched with the pooled HTTP fetcher instead of yt-dlp."""
+        return bool(self.settings.get("http_fetcher", False))
+    
+    def set_http_fetcher(self, enabled: bool) -> None:
+        """Set whether direct media URLs are fetched with the pooled HTTP fetcher instead of yt-dlp."""
+        self.set("http_fetcher", bool(enabled))
+
+    def get_auto_fps(self) -> bool:
+        """Get whether the GIF FPS is a divisor of the source FPS, with the FPS setting as the cap."""
+        return bool(self.settings.get("auto_fps", False))
+    
+    def set_auto_fps(self, enabled: bool) -> None:
+        """Set whether the GIF FPS is a divisor of the source FPS, with the FPS setting as the cap."""
+        self.set("auto_fps", bool(enabled))
+
+    def get_max_gif_bytes(self) -> int:
+        """Get the GIF size target in bytes (0 = no limit)."""
+        return int(self.settings.get("max_gif_bytes", 0))
+    
+    def set_max_gif_bytes(self, max_bytes: int) -> None:
+        """Set the GIF size target in bytes (0 = no limit)."""
+        if max_bytes < 0:
+            logging.warning(f"Invalid GIF size target: {max_bytes}. Must be 0 or more.")
+            max_bytes = 0
+        self.set("max_gif_bytes", int(max_bytes))
+
+    def get_gif_trim(self) -> Tuple[float, Optional[float]]:
+        """Get the default (start, end) in seconds of the part of a clip to convert (end None = to the end)."""
+        return float(self.settings.get("gif_start") or 0.0), self.settings.get("gif_end")
+    
+    def set_gif_trim(self, start: float, end: Optional[float] = None) -> None:
+        """Set the default (start, end) in seconds of the part of a clip to convert (end None = to the end)."""
+        if start < 0 or (end is not None and end <= start):
+            logging.warning(f"Invalid GIF time range: {start}-{end}. Converting the whole clip.")
+            start, end = 0.0, None
+        self.set("gif_start", float(start))
+        self.set("gif_end", end)
+
+    def get_gif_max_size(self) -> Tuple[int, int]:
+        """Get the default maximum GIF (width, height) in pixels (0 = no limit)."""
+        return int(self.settings.get("gif_max_width") or 0), int(self.settings.get("gif_max_height") or 0)
+    
+    def set_gif_max_size(self, width: int, height: int) -> None:
+        """Set the default maximum GIF (width, height) in pixels (0 = no limit)."""
+        if width < 0 or height < 0:
+            logging.warning(f"Invalid maximum GIF size: {width}x{height}. Must be 0 or more.")
+            width, height = max(0, width), max(0, height)
+        self.set("gif_max_width", int(width))
+        self.set("gif_max_height", int(height))
+
+    def get_gif_crop(self) -> Optional[Tuple[int, int, int, int]]:
+        """Get the default crop as (width, height, x, y) in source pixels, or None."""
+        crop = self.settings.get("gif_crop")
+        return tuple(crop) if crop else None
+    
+    def set_gif_crop(self, crop: Optional[Tuple[int, int, int, int]]) -> None:
+        """Set the default crop as (width, height, x, y) in source pixels, or None."""
+        if crop is not None and (len(crop) != 4 or min(crop[:2]) <= 0 or min(crop[2:]) < 0):
+            logging.warning(f"Invalid GIF crop: {crop}. Must be (width, height, x, y).")
+            crop = None
+        self.set("gif_crop", list(crop) if crop else None)
+
+    def get_clip_edit_options(self) -> Dict[str, Any]:
+        """Keyword arguments for ffmpeg_encoder.ClipEdit from the default trim, size and crop."""
+        start, end = self.get_gif_trim()
+        max_width, max_height = self.get_gif_max_size()
+        return {"start": start, "end": end, "max_width": max_width or None,
+                "max_height": max_height or None, "crop": self.get_gif_crop()}
+
+    def get_single_extraction(self) -> bool:
+        """Get whether extracted video info is reused for the download step."""
+        return bool(self.settings.get("single_extraction", True))
+    
+    def set_single_extraction(self, enabled: bool) -> None:
+        """Set whether extracted video info is reused for the download step."""
+        self.set("single_extraction", bool(enabled))
+
+    def get_metadata_cache_path(self) -> Path:
+        """Get the path to the metadata cache database, next to the config file."""
+        return self.config_path.parent / self.METADATA_CACHE_FILENAME
+    
+    def get_metadata_cache_enabled(self) -> bool:
+        """Get whether the persistent metadata cache is enabled."""
+        return bool(self.settings.get("metadata_cache_enabled", True))
+    
+    def get_metadata_cache_ttl(self) -> int:
+        """Get the metadata cache time-to-live in seconds."""
+        return self.settings.get("metadata_cache_ttl", 900)
+    
+    def set_metadata_cache_ttl(self, ttl: int) -> None:
+        """Set the metadata cache time-to-live in seconds."""
+        if ttl < 0:
+            logging.warning(f"Invalid metadata cache TTL: {ttl}. Must be non-negative.")
+            ttl = 0
+        self.set("metadata_cache_ttl", ttl)
+    
+    def get_metadata_cache_max_entries(self) -> int:
+        """Get the maximum number of entries kept in the metadata cache."""
+        return self.settings.get("metadata_cache_max_entries", 500)
+    
+    def set_metadata_cache_max_entries(self, max_entries: int) -> None:
+        """Set the maximum number of entries kept in the metadata cache."""
+        if max_entries < 1:
+            logging.warning(f"Invalid metadata cache size: {max_entries}. Must be at least 1.")
+            max_entries = 1
+        self.set("metadata_cache_max_entries", max_entries)
+
+    def get_output_cache_dir(self) -> Path:
+        """Get the directory holding cached output artifacts, next to the config file."""
+        return self.config_path.parent / self.OUTPUT_CACHE_DIRNAME
+    
+    def get_output_cache_enabled(self) -> bool:
+        """Get whether finished outputs are cached for repeat conversions."""
+        return bool(self.settings.get("output_cache_enabled", True))
+    
+    def get_output_cache_max_bytes(self) -> int:
+        """Get the byte budget of the output cache."""
+        return self.settings.get("output_cache_max_bytes", 512 * 1024 * 1024)
+    
+    def set_output_cache_max_bytes(self, max_bytes: int) -> None:
+        """Set the byte budget of the output cache."""
+        if max_bytes < 0:
+            logging.warning(f"Invalid output cache budget: {max_bytes}. Must be non-negative.")
+            max_bytes = 0
+        self.set("output_cache_max_bytes", max_bytes)
+
+    def get_max_concurrent_jobs(self) -> int:
+        """Get the number of jobs allowed to run at once."""
+        return self.settings.get("max_concurrent_jobs", 3)
+    
+    def set_max_concurrent_jobs(self, max_jobs: int) -> None:
+        """Set the number of jobs allowed to run at once."""
+        if max_jobs < 1:
+            logging.warning(f"Invalid job count: {max_jobs}. Must be at least 1.")
+            max_jobs = 1
+        self.set("max_concurrent_jobs", max_jobs)
+    
+    def get_platform_concurrency(self) -> Dict[str, int]:
+        """Get the per-platform caps on concurrently running jobs."""
+        return dict(self.settings.get("platform_concurrency", {}))
+    
+    def set_platform_concurrency(self, limits: Dict[str, int]) -> None:
+        """Set the per-platform caps on concurrently running jobs."""
+        self.set("platform_concurrency", {name: max(1, int(limit)) for name, limit in limits.items()})
+
+    def get_workspace_quota_bytes(self) -> int:
+        """Get the disk quota shared by all in-flight job workspaces (0 = unlimited)."""
+        return self.settings.get("workspace_quota_bytes", 2 * 1024 * 1024 * 1024)
+    
+    def set_workspace_quota_bytes(self, quota_bytes: int) -> None:
+        """Set the disk quota shared by all in-flight job workspaces (0 = unlimited)."""
+        if quota_bytes < 0:
+            logging.warning(f"Invalid workspace quota: {quota_bytes}. Must be non-negative.")
+            quota_bytes = 0
+        self.set("workspace_quota_bytes", quota_bytes)
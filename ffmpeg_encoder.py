@@ -0,0 +1,452 @@
+"""
+FFmpeg-native GIF encoding for Social Media GIF Downloader.
+Builds a single-pass filter graph (fps -> crop -> scale -> palettegen/paletteuse)
+so frames never pass through Python, and parses FFmpeg's -progress output.
+Also runs FFmpeg as a raw RGB frame source for the streaming GIF pipeline.
+Trimming, cropping and scaling (ClipEdit) happen at decode time, before any
+frame reaches an encoder.
+"""
+
+import logging
+import math
+import platform
+import re
+import subprocess
+import threading
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Any, Optional, List, Dict, Iterator, Tuple
+
+
+# Dithering used by paletteuse; bayer keeps GIFs smaller than error diffusion
+# while still hiding banding in gradients
+DEFAULT_DITHER = "bayer:bayer_scale=5"
+
+
+@dataclass(frozen=True)
+class ClipEdit:
+    """
+    The part of a clip to convert: a time range in seconds (end None = to the
+    end), an optional crop as (width, height, x, y) in source pixels, and an
+    upper bound on the output size. Applied while decoding, so frames outside
+    the range and pixels outside the crop are never scaled or quantized.
+    """
+    start: float = 0.0
+    end: Optional[float] = None
+    max_width: Optional[int] = None
+    max_height: Optional[int] = None
+    crop: Optional[Tuple[int, int, int, int]] = None
+
+    def __post_init__(self):
+        if self.start < 0 or (self.end is not None and self.end <= self.start):
+            raise ValueError(f"Invalid time range: {self.start}-{self.end}")
+        if self.crop is not None and (len(self.crop) != 4 or min(self.crop[:2]) <= 0 or min(self.crop[2:]) < 0):
+            raise ValueError(f"Invalid crop (width, height, x, y): {self.crop}")
+
+    def __bool__(self) -> bool:
+        return bool(self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The settings that differ from a whole, unscaled clip (part of the output cache key)."""
+        edit = {"start": self.start, "end": self.end, "max_width": self.max_width,
+                "max_height": self.max_height, "crop": list(self.crop) if self.crop else None}
+        return {key: value for key, value in edit.items() if value}
+
+    def duration(self, source_duration: Optional[float]) -> Optional[float]:
+        """Length in seconds of the edited clip, or None if unknown."""
+        end = self.end
+        if source_duration is not None:
+            end = min(end, source_duration) if end is not None else source_duration
+        if end is None:
+            return None
+        return max(0.0, end - self.start)
+
+    def output_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Frame size after cropping and scaling a width x height source."""
+        if self.crop:
+            width, height = min(width, self.crop[0]), min(height, self.crop[1])
+        scale = min(1.0, (self.max_width or width) / width, (self.max_height or height) / height)
+        return max(1, int(width * scale)), max(1, int(height * scale))
+
+    def input_args(self, offset: float = 0.0) -> List[str]:
+        """Seek and duration options placed before -i, starting offset seconds into the range."""
+        seek = self.start + offset
+        args = ['-ss', f"{seek:.6f}"] if seek else []
+        if self.end is not None:
+            args += ['-t', f"{max(0.0, self.end - seek):.6f}"]
+        return args
+
+    def filters(self, width: Optional[int] = None) -> List[str]:
+        """Crop and scale filters; width further bounds the output width."""
+        filters = []
+        if self.crop:
+            crop_width, crop_height, x, y = (int(value) for value in self.crop)
+            filters.append(f"crop={crop_width}:{crop_height}:{x}:{y}")
+        bounds = [int(value) for value in (self.max_width, width) if value]
+        max_width = min(bounds) if bounds else None
+        # Never upscale; -1 keeps the aspect ratio
+        if max_width and self.max_height:
+            filters.append(f"scale='min({max_width},iw)':'min({int(self.max_height)},ih)'"
+                           f":force_original_aspect_ratio=decrease:flags=lanczos")
+        elif max_width:
+            filters.append(f"scale='min({max_width},iw)':-1:flags=lanczos")
+        elif self.max_height:
+            filters.append(f"scale=-1:'min({int(self.max_height)},ih)':flags=lanczos")
+        return filters
+
+
+def _resample_filters(fps: float, width: Optional[int] = None, edit: Optional[ClipEdit] = None) -> str:
+    """fps, crop and downscale filters shared by every encoder."""
+    return ",".join([f"fps={fps}"] + (edit or ClipEdit()).filters(width))
+
+
+def build_gif_filter(fps: float, width: Optional[int] = None, dither: str = DEFAULT_DITHER,
+                     colors: int = 256, edit: Optional[ClipEdit] = None) -> str:
+    """
+    Filter graph that resamples to fps, applies edit's crop and scale, optionally
+    scales down to width, and quantizes with a palette of up to colors entries
+    computed from the whole clip.
+    """
+    chain = _resample_filters(fps, width, edit)
+    palettegen = "palettegen=stats_mode=diff"
+    if colors < 256:
+        palettegen += f":max_colors={max(4, int(colors))}"
+    # stats_mode=diff weights the palette towards moving areas, diff_mode=rectangle
+    # only re-dithers the changed region of each frame
+    return (
+        f"[0:v]{chain},split[a][b];"
+        f"[a]{palettegen}[p];"
+        f"[b][p]paletteuse=dither={dither}:diff_mode=rectangle"
+    )
+
+
+def build_gif_command(ffmpeg_exe: str, input_file: str, output_file: str, fps: float,
+                      width: Optional[int] = None, loop: int = 0, colors: int = 256,
+                      edit: Optional[ClipEdit] = None) -> List[str]:
+    """FFmpeg command line converting input_file to a GIF in one pass, with progress on stdout."""
+    return [
+        ffmpeg_exe,
+        '-hide_banner',
+        '-nostdin',
+        '-y',
+        *(edit or ClipEdit()).input_args(),
+        '-i', input_file,
+        '-filter_complex', build_gif_filter(fps, width, colors=colors, edit=edit),
+        '-loop', str(loop),
+        '-an',
+        '-progress', 'pipe:1',
+        '-nostats',
+        output_file,
+    ]
+
+
+# Animated WebP: lossy quality 0-100, and libwebp's effort 0-6 (lower is faster; above 2
+# files barely shrink while encoding takes much longer)
+WEBP_QUALITY = 75
+WEBP_COMPRESSION_LEVEL = 2
+
+# Looping MP4: x264 speed preset and constant quality (lower CRF is better and larger)
+MP4_PRESET = "veryfast"
+MP4_CRF = 23
+
+
+def build_webp_command(ffmpeg_exe: str, input_file: str, output_file: str, fps: float,
+                       width: Optional[int] = None, loop: int = 0,
+                       edit: Optional[ClipEdit] = None) -> List[str]:
+    """FFmpeg command line converting input_file to a lossy animated WebP, with progress on stdout."""
+    return [
+        ffmpeg_exe,
+        '-hide_banner',
+        '-nostdin',
+        '-y',
+        *(edit or ClipEdit()).input_args(),
+        '-i', input_file,
+        '-vf', _resample_filters(fps, width, edit),
+        '-an',
+        '-c:v', 'libwebp_anim',
+        '-lossless', '0',
+        '-quality', str(WEBP_QUALITY),
+        '-compression_level', str(WEBP_COMPRESSION_LEVEL),
+        '-loop', str(loop),
+        '-f', 'webp',
+        '-progress', 'pipe:1',
+        '-nostats',
+        output_file,
+    ]
+
+
+def build_loop_mp4_command(ffmpeg_exe: str, input_file: str, output_file: str, fps: float,
+                           width: Optional[int] = None, edit: Optional[ClipEdit] = None) -> List[str]:
+    """
+    FFmpeg command line transcoding input_file to a silent H.264 MP4 meant to be
+    played looping (like a GIF), with progress on stdout. MP4 has no loop flag;
+    players loop it with e.g. <video loop muted autoplay>.
+    """
+    # yuv420p needs even dimensions
+    chain = _resample_filters(fps, width, edit) + ",scale=trunc(iw/2)*2:trunc(ih/2)*2"
+    return [
+        ffmpeg_exe,
+        '-hide_banner',
+        '-nostdin',
+        '-y',
+        *(edit or ClipEdit()).input_args(),
+        '-i', input_file,
+        '-vf', chain,
+        '-an',
+        '-c:v', 'libx264',
+        '-preset', MP4_PRESET,
+        '-crf', str(MP4_CRF),
+        '-pix_fmt', 'yuv420p',
+        # Index at the front so browsers start playing (and looping) before the download ends
+        '-movflags', '+faststart',
+        '-f', 'mp4',
+        '-progress', 'pipe:1',
+        '-nostats',
+        output_file,
+    ]
+
+
+def build_remux_mp4_command(ffmpeg_exe: str, input_file: str, output_file: str) -> List[str]:
+    """
+    FFmpeg command line copying the video stream of input_file into a silent
+    MP4 without re-encoding it, with progress on stdout.
+    """
+    return [
+        ffmpeg_exe,
+        '-hide_banner',
+        '-nostdin',
+        '-y',
+        '-i', input_file,
+        '-map', '0:v:0',
+        '-c', 'copy',
+        '-an',
+        '-movflags', '+faststart',
+        '-f', 'mp4',
+        '-progress', 'pipe:1',
+        '-nostats',
+        output_file,
+    ]
+
+
+def sniff_format(path: str) -> Optional[str]:
+    """
+    Container format of a file from its leading bytes: 'gif', 'webp', 'mp4'
+    (any ISO BMFF file, including MOV) or 'matroska' (also WebM), or None if
+    the file is missing or unrecognized. Download file names and extensions
+    are not trusted.
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(12)
+    except OSError:
+        return None
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[4:8] == b"ftyp":
+        return "mp4"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return "matroska"
+    return None
+
+
+def parse_progress_line(line: str, state: Dict[str, str]) -> Optional[int]:
+    """
+    Feed one line of FFmpeg -progress output into state.
+    Returns the frame count when a progress block completes, otherwise None.
+    """
+    key, sep, value = line.strip().partition("=")
+    if not sep:
+        return None
+    state[key] = value
+    if key == "progress":
+        try:
+            return int(state.get("frame", "0"))
+        except ValueError:
+            return None
+    return None
+
+
+def expected_frames(duration: Optional[float], fps: float) -> Optional[int]:
+    """Number of frames the fps filter will emit for a clip of this duration."""
+    if not duration or duration <= 0:
+        return None
+    return max(1, math.ceil(duration * fps))
+
+
+# NTSC-family rates (29.97, 59.94, ...) are really k * 1000/1001, but are often reported rounded
+_NTSC_BASES = (24, 30, 48, 60, 120)
+
+
+def source_rate(fps: float) -> Fraction:
+    """Exact frame rate for a reported one, restoring the 1000/1001 factor of NTSC-family rates."""
+    for base in _NTSC_BASES:
+        if abs(fps - base * 1000 / 1001) < 0.01:
+            return Fraction(base * 1000, 1001)
+    return Fraction(fps).limit_denominator(1001)
+
+
+def divisor_fps(source_fps: float, cap: float) -> Tuple[Fraction, int]:
+    """
+    The largest source_fps / n (n a positive integer) at or below cap, and n.
+    The fps filter then keeps exactly every nth source frame, so frames stay
+    evenly spaced instead of juddering between n and n + 1 source frames.
+    """
+    rate = source_rate(source_fps)
+    divisor = max(1, math.ceil(rate / Fraction(cap).limit_denominator(1001)))
+    return rate / divisor, divisor
+
+
+_OUTPUT_SIZE_RE = re.compile(r", (\d+)x(\d+)")
+
+
+def build_rawvideo_command(ffmpeg_exe: str, input_file: str, fps: float,
+                           width: Optional[int] = None, start: Optional[float] = None,
+                           max_frames: Optional[int] = None, edit: Optional[ClipEdit] = None) -> List[str]:
+    """
+    FFmpeg command line decoding input_file to packed RGB24 frames on stdout.
+    start seeks (accurately) to that many seconds into edit's time range, and
+    max_frames stops after that many output frames, so a clip can be decoded
+    in independent segments.
+    """
+    edit = edit or ClipEdit()
+    command = [ffmpeg_exe, '-hide_banner', '-nostdin', '-nostats']
+    command += edit.input_args(start or 0.0)
+    command += ['-i', input_file, '-vf', _resample_filters(fps, width, edit), '-an']
+    if max_frames is not None:
+        command += ['-frames:v', str(max_frames)]
+    command += ['-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1']
+    return command
+
+
+_DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_VIDEO_SIZE_RE = re.compile(r"Stream #\S+.*Video: .*?, (\d{2,})x(\d{2,})")
+_VIDEO_FPS_RE = re.compile(r"Stream #\S+.*Video: .*?, (\d+(?:\.\d+)?) fps")
+_VIDEO_CODEC_RE = re.compile(r"Stream #\S+.*Video: (\w+)[^,]*, (\w+)")
+
+
+def probe_video(ffmpeg_exe: str, input_file: str, timeout: float = 30) -> Dict[str, Any]:
+    """
+    Read the duration, frame size, frame rate, codec and pixel format from
+    FFmpeg's input description. Returns {'duration': seconds, 'width': px,
+    'height': px, 'fps': rate, 'codec': name, 'pix_fmt': name}; unknown values
+    are None.
+    """
+    info: Dict[str, Any] = {"duration": None, "width": None, "height": None, "fps": None, "codec": None,
+                            "pix_fmt": None}
+    try:
+        result = subprocess.run(
+            [ffmpeg_exe, '-hide_banner', '-nostdin', '-i', input_file],
+            capture_output=True, text=True, timeout=timeout,
+            creationflags=(subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0)
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        logging.warning(f"Could not probe {input_file}: {e}")
+        return info
+    match = _DURATION_RE.search(result.stderr)
+    if match:
+        hours, minutes, seconds = match.groups()
+        info["duration"] = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    match = _VIDEO_SIZE_RE.search(result.stderr)
+    if match:
+        info["width"], info["height"] = int(match.group(1)), int(match.group(2))
+    match = _VIDEO_FPS_RE.search(result.stderr)
+    if match:
+        info["fps"] = float(match.group(1))
+    match = _VIDEO_CODEC_RE.search(result.stderr)
+    if match:
+        info["codec"], info["pix_fmt"] = match.groups()
+    return info
+
+
+def probe_duration(ffmpeg_exe: str, input_file: str, timeout: float = 30) -> Optional[float]:
+    """Read the container duration from FFmpeg's input description, or None if unknown."""
+    return probe_video(ffmpeg_exe, input_file, timeout)["duration"]
+
+
+class RawFrameReader:
+    """
+    Runs FFmpeg as a frame source and yields one RGB24 frame at a time.
+    Only a single frame is buffered in Python; the frame size is taken from
+    FFmpeg's description of its output stream.
+    """
+
+    def __init__(self, command: List[str], header_timeout: float = 30):
+        self.command = command
+        self.header_timeout = header_timeout
+        self.size: Optional[Tuple[int, int]] = None
+        self.process: Optional[subprocess.Popen] = None
+        self._stderr_lines: List[str] = []
+        self._size_known = threading.Event()
+        self._stderr_thread: Optional[threading.Thread] = None
+
+    def _read_stderr(self) -> None:
+        in_output = False
+        for raw_line in iter(self.process.stderr.readline, b''):
+            line = raw_line.decode('utf-8', errors='replace').rstrip()
+            # Keep the tail only; long inputs can log a lot of warnings
+            self._stderr_lines.append(line)
+            del self._stderr_lines[:-50]
+            if line.startswith("Output #0"):
+                in_output = True
+            elif in_output and self.size is None and "Video: rawvideo" in line:
+                match = _OUTPUT_SIZE_RE.search(line)
+                if match:
+                    self.size = (int(match.group(1)), int(match.group(2)))
+                    self._size_known.set()
+        self._size_known.set()
+
+    @property
+    def stderr(self) -> str:
+        return "\n".join(self._stderr_lines)
+
+    def start(self) -> Tuple[int, int]:
+        """Start FFmpeg and wait until the output frame size is known."""
+        self.process = subprocess.Popen(
+            self.command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            creationflags=(subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0)
+        )
+        self._stderr_thread = threading.Thread(target=self._read_stderr, daemon=True)
+        self._stderr_thread.start()
+        self._size_known.wait(self.header_timeout)
+        if self.size is None:
+            self.close()
+            raise RuntimeError(f"FFmpeg did not report an output frame size: {self.stderr[-300:]}")
+        return self.size
+
+    def frames(self) -> Iterator[bytes]:
+        """Yield raw frames until FFmpeg finishes; raises if it exits with an error."""
+        if self.process is None:
+            self.start()
+        width, height = self.size
+        frame_bytes = width * height * 3
+        stdout = self.process.stdout
+        while True:
+            frame = stdout.read(frame_bytes)
+            if not frame:
+                break
+            if len(frame) < frame_bytes:
+                raise RuntimeError("FFmpeg output ended in the middle of a frame")
+            yield frame
+        returncode = self.process.wait()
+        if returncode != 0:
+            raise RuntimeError(f"FFmpeg exited with code {returncode}: {self.stderr[-300:]}")
+
+    def close(self) -> None:
+        """Stop FFmpeg if it is still running and release its pipes."""
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            logging.info("Stopping FFmpeg frame source")
+            self.process.kill()
+        self.process.wait()
+        if self._stderr_thread is not None:
+            self._stderr_thread.join(timeout=5)
+        for stream in (self.process.stdout, self.process.stderr):
+            try:
+                stream.close()
+            except (OSError, ValueError):
+                pass
@@ -0,0 +1,104 @@
+"""
+FFmpeg resolution for Social Media GIF Downloader.
+Locates the bundled FFmpeg binary and prepares the environment moviepy needs.
+Nothing here runs at import time; call configure_ffmpeg() right before the
+first conversion so startup doesn't pay for it.
+"""
+
+import logging
+import os
+import platform
+import sys
+import threading
+from typing import Optional
+
+
+_configure_lock = threading.Lock()
+_configured = False
+_ffmpeg_path: Optional[str] = None
+
+
+# --- PYINSTALLER RESOURCE PATH HANDLING ---
+# This ensures that bundled resources like ffmpeg are correctly located
+# whether the app is running from source or as a frozen executable.
+def get_resource_path(relative_path: str) -> str:
+    """
+    Get the absolute path to a resource, that works in development and with PyInstaller.
+    """
+    if getattr(sys, 'frozen', False):
+        # The `_MEIPASS` attribute is set by PyInstaller to a temporary folder
+        base_path = getattr(sys, '_MEIPASS')
+    else:
+        # In development, the path is relative to the script's directory
+        base_path = os.path.abspath(".")
+
+    return os.path.join(base_path, relative_path)
+
+
+def _set_ffmpeg_env() -> Optional[str]:
+    """Point IMAGEIO_FFMPEG_EXE at the bundled FFmpeg binary, if there is one."""
+    try:
+        # moviepy reads this when it is first imported, so it must be set before that
+        ffmpeg_binary_name = "ffmpeg.exe" if platform.system() == "Windows" else "ffmpeg"
+        ffmpeg_path = get_resource_path(ffmpeg_binary_name)
+
+        if os.path.exists(ffmpeg_path):
+            os.environ["IMAGEIO_FFMPEG_EXE"] = ffmpeg_path
+            logging.info(f"FFmpeg path set to: {ffmpeg_path}")
+            return ffmpeg_path
+        logging.warning(
+            f"FFmpeg binary ('{ffmpeg_binary_name}') not found at expected path: {ffmpeg_path}. "
+            "Falling back to the FFmpeg provided by imageio-ffmpeg."
+        )
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while setting the FFmpeg path: {e}", exc_info=True)
+    return None
+
+
+# --- MONKEY-PATCH FOR IMAGEIO METADATA BUG ---
+# This is a workaround for a persistent PyInstaller issue where it fails to
+# bundle imageio's metadata, causing a `PackageNotFoundError` when moviepy is imported.
+# We intercept the version call and return a valid version string to prevent the crash.
+def _patch_imageio_metadata() -> None:
+    try:
+        import importlib.metadata
+        _original_version = importlib.metadata.version
+
+        def _patched_version(package_name):
+            if package_name == 'imageio':
+                return '2.34.0'  # A recent, valid version to satisfy the check
+            return _original_version(package_name)
+
+        importlib.metadata.version = _patched_version
+        logging.info("Applied monkey-patch for imageio metadata.")
+    except Exception as e:
+        logging.warning(f"Failed to apply imageio metadata patch: {e}")
+
+
+def configure_ffmpeg() -> None:
+    """
+    Prepare FFmpeg and moviepy for a conversion. Safe to call from any thread;
+    only the first call does any work.
+    """
+    global _configured, _ffmpeg_path
+    if _configured:
+        return
+    with _configure_lock:
+        if _configured:
+            return
+        _ffmpeg_path = _set_ffmpeg_env()
+        _patch_imageio_metadata()
+        _configured = True
+
+
+def get_ffmpeg_exe() -> str:
+    """Return the FFmpeg executable to run, resolving it on first use."""
+    configure_ffmpeg()
+    if _ffmpeg_path:
+        return _ffmpeg_path
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception as e:
+        logging.warning(f"Could not resolve FFmpeg from imageio-ffmpeg: {e}")
+        return "ffmpeg"
@@ -0,0 +1,101 @@
+"""
+Download format policy for Social Media GIF Downloader.
+GIF, WebP and looping MP4 outputs are silent and often scaled down, so
+downloading the best video plus the best audio wastes bandwidth. The policy
+picks, from the formats list of yt-dlp's info JSON, the smallest video
+rendition that still covers the output size and frame rate, preferring
+renditions without an audio track.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# Used when no formats list is available: any video without audio, else anything
+VIDEO_ONLY_FORMATS = 'bestvideo[ext=mp4]/bestvideo/best[ext=mp4]/best'
+
+# yt-dlp protocols that are one plain HTTP GET of the whole file
+PROGRESSIVE_PROTOCOLS = ('http', 'https')
+
+
+def _has_audio(fmt: Dict[str, Any]) -> bool:
+    # yt-dlp leaves acodec unset when it doesn't know; assume muxed formats carry audio
+    return fmt.get('acodec') != 'none'
+
+
+def video_renditions(info: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Downloadable formats of info that carry video at a known frame size."""
+    formats = (info or {}).get('formats') or []
+    return [fmt for fmt in formats
+            if fmt.get('format_id') and fmt.get('width') and fmt.get('height') and fmt.get('vcodec') != 'none']
+
+
+def progressive_url(fmt: Optional[Dict[str, Any]]) -> Optional[str]:
+    """The direct URL of a format that is a single progressive video file, else None."""
+    if not fmt or fmt.get('fragments') or fmt.get('vcodec') == 'none':
+        return None
+    url = fmt.get('url')
+    if not url or fmt.get('protocol', url.partition(':')[0]) not in PROGRESSIVE_PROTOCOLS:
+        return None
+    return url
+
+
+def estimated_bytes(fmt: Dict[str, Any], duration: Optional[float] = None) -> Optional[int]:
+    """Size of a format from yt-dlp's filesize fields, or its bitrate times duration."""
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if size:
+        return int(size)
+    if fmt.get('tbr') and duration:
+        return int(fmt['tbr'] * 1000 / 8 * duration)
+    return None
+
+
+def _cost(fmt: Dict[str, Any]) -> Tuple:
+    """Sort key of renditions from cheapest to most expensive to download."""
+    return (fmt['width'] * fmt['height'], _has_audio(fmt), fmt.get('tbr') or 0,
+            estimated_bytes(fmt) or 0, fmt.get('ext') != 'mp4')
+
+
+def source_size(info: Optional[Dict[str, Any]]) -> Optional[Tuple[int, int]]:
+    """Frame size of the largest video rendition (or of info itself), or None if unknown."""
+    renditions = video_renditions(info)
+    if renditions:
+        best = max(renditions, key=lambda fmt: fmt['width'] * fmt['height'])
+        return best['width'], best['height']
+    if info and info.get('width') and info.get('height'):
+        return info['width'], info['height']
+    return None
+
+
+def select_rendition(info: Optional[Dict[str, Any]], width: int, height: int,
+                     fps: Optional[float] = None, progressive: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    The cheapest video rendition at least width x height pixels and at least
+    fps frames per second (when the rates are known). With progressive, a
+    single-file rendition that qualifies is preferred over cheaper segmented
+    ones, so it can be decoded while it downloads. Falls back to the largest
+    rendition when none is large enough, and returns None when info lists no
+    video renditions.
+    """
+    renditions = video_renditions(info)
+    if not renditions:
+        return None
+    fastest = max((fmt.get('fps') or 0 for fmt in renditions), default=0)
+    min_fps = min(fps, fastest) if fps and fastest else 0
+
+    def adequate(fmt: Dict[str, Any]) -> bool:
+        if fmt.get('fps') and fmt['fps'] < min_fps:
+            return False
+        return fmt['width'] >= width and fmt['height'] >= height
+
+    candidates = [fmt for fmt in renditions if adequate(fmt)]
+    if progressive:
+        candidates = [fmt for fmt in candidates if progressive_url(fmt)] or candidates
+    if candidates:
+        return min(candidates, key=_cost)
+    return max(renditions, key=lambda fmt: (fmt['width'] * fmt['height'], not _has_audio(fmt)))
+
+
+def format_spec(rendition: Optional[Dict[str, Any]]) -> str:
+    """yt-dlp format selection for a rendition, falling back to any video-only format."""
+    if rendition is None:
+        return VIDEO_ONLY_FORMATS
+    return f"{rendition['format_id']}/{VIDEO_ONLY_FORMATS}"
@@ -0,0 +1,105 @@
+"""
+Inter-frame optimizations for Social Media GIF Downloader.
+Consecutive frames that share one palette are compared index by index; only
+the bounding box of changed pixels is written, and unchanged pixels inside
+it become a transparent index. Frames are left in place (disposal method 1),
+so static regions are drawn once and shine through every later frame.
+Near-duplicate frames (slideshows, screen recordings) are spotted on
+downscaled luma so they can be merged into a longer delay.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+# "Do not dispose": each frame is drawn over what the previous ones left
+DISPOSAL_KEEP = 1
+
+# Luma is compared on blocks of this many source pixels per side
+DUPLICATE_BLOCK = 8
+
+
+class DeltaFrames:
+    """
+    Turns a sequence of palette-index frames into cropped updates.
+    transparent_index must be a palette slot no frame uses; without one the
+    frames are only cropped.
+    """
+
+    def __init__(self, transparent_index: Optional[int] = None):
+        self.transparent_index = transparent_index
+        self._previous: Optional[np.ndarray] = None
+
+    def update(self, indices: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int], Optional[int]]:
+        """
+        Return (pixels, (left, top), transparency) for the next frame: the changed
+        region and where it goes on the canvas, plus the transparent index used
+        inside it (None if the region is written as-is).
+        """
+        previous, self._previous = self._previous, indices
+        if previous is None or previous.shape != indices.shape:
+            return indices, (0, 0), None
+
+        changed = indices != previous
+        rows = np.flatnonzero(changed.any(axis=1))
+        if len(rows) == 0:
+            # GIF frames can't be empty; repeat one unchanged pixel
+            return indices[:1, :1], (0, 0), None
+        cols = np.flatnonzero(changed.any(axis=0))
+        top, bottom = rows[0], rows[-1] + 1
+        left, right = cols[0], cols[-1] + 1
+
+        region = indices[top:bottom, left:right]
+        if self.transparent_index is None:
+            return region, (int(left), int(top)), None
+        region = np.where(changed[top:bottom, left:right], region, np.uint8(self.transparent_index))
+        return region, (int(left), int(top)), self.transparent_index
+
+    def image(self, quantizer, frame: bytes, size: Tuple[int, int],
+              dither: Optional[str]) -> Tuple[Image.Image, Tuple[int, int], Optional[int]]:
+        """
+        Quantize a packed RGB24 frame with quantizer (a quantizer.Quantizer) and
+        reduce it to its delta against the previous frame.
+        """
+        region, position, transparency = self.update(quantizer.to_indices(frame, size, dither))
+        return quantizer.indices_image(region), position, transparency
+
+
+class DuplicateFilter:
+    """
+    Spots frames that look the same as the last kept frame. Frames are reduced
+    to the mean luma of 8x8 pixel blocks, and a frame is a duplicate when no
+    block moved by more than threshold (0-255 scale). Using the largest block
+    change rather than a frame-wide mean keeps small motion, like a cursor,
+    from being dropped, while compression noise averages out within blocks.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.dropped = 0
+        self._reference: Optional[np.ndarray] = None
+
+    @staticmethod
+    def block_luma(frame: bytes, size: Tuple[int, int]) -> np.ndarray:
+        """Mean luma of each DUPLICATE_BLOCK-sized block of a packed RGB24 frame."""
+        width, height = size
+        # Every other pixel is plenty for block means and quarters the work
+        pixels = np.frombuffer(frame, dtype=np.uint8).reshape(height, width, 3)[::2, ::2]
+        luma = pixels @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        step = DUPLICATE_BLOCK // 2
+        rows, cols = max(1, luma.shape[0] // step), max(1, luma.shape[1] // step)
+        luma = luma[:rows * step, :cols * step]
+        return luma.reshape(rows, luma.shape[0] // rows, cols, luma.shape[1] // cols).mean(axis=(1, 3))
+
+    def is_duplicate(self, frame: bytes, size: Tuple[int, int]) -> bool:
+        """Compare frame with the last kept frame; frames that aren't duplicates become the new reference."""
+        blocks = self.block_luma(frame, size)
+        reference = self._reference
+        if reference is not None and reference.shape == blocks.shape \
+                and float(np.abs(blocks - reference).max()) <= self.threshold:
+            self.dropped += 1
+            return True
+        self._reference = blocks
+        return False
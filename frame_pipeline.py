@@ -0,0 +1,129 @@
+"""
+Bounded-memory GIF conversion pipeline for Social Media GIF Downloader.
+A reader thread pulls raw frames from a source (an FFmpeg pipe) into a small
+bounded queue; the calling thread quantizes and appends them to an incremental
+GIF writer. At most a handful of frames are alive at once, so peak memory
+stays flat no matter how long the clip is. Frames are quantized one by one
+with Pillow, or against one global palette when a quantizer is given, and
+near-duplicate frames can be folded into the previous frame's delay.
+"""
+
+import queue
+import threading
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Tuple, Union
+
+from PIL import Image
+
+from gif_writer import GifWriter, frame_delays
+
+
+DEFAULT_QUEUE_FRAMES = 4
+
+_END = object()
+
+
+def _put(frames_queue: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put item on the queue unless the consumer has gone away. Returns False if stopped."""
+    while not stop.is_set():
+        try:
+            frames_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def merge_duplicates(frames: Iterable[bytes], delays: Iterator[int], size: Tuple[int, int],
+                     duplicates=None) -> Iterator[Tuple[bytes, int, int]]:
+    """
+    Pair frames with their delays. With duplicates (a frame_delta.DuplicateFilter),
+    frames that look like the last kept frame are dropped and their delay is
+    added to it. Yields (frame, delay, frames_consumed) for each kept frame,
+    where frames_consumed counts input frames up to and including its run.
+    """
+    pending: Optional[bytes] = None
+    pending_delay = consumed = 0
+    for frame in frames:
+        delay = next(delays)
+        consumed += 1
+        if duplicates is not None and duplicates.is_duplicate(frame, size):
+            pending_delay += delay
+            continue
+        if pending is not None:
+            yield pending, pending_delay, consumed - 1
+        pending, pending_delay = frame, delay
+    if pending is not None:
+        yield pending, pending_delay, consumed
+
+
+def prepare_frame(frame: bytes, size: Tuple[int, int], quantizer=None, dither: Optional[str] = None,
+                  delta=None) -> Tuple[Image.Image, Tuple[int, int], Optional[int]]:
+    """Turn a raw RGB24 frame into (image, position, transparency) for GifWriter.add_frame."""
+    if delta is not None:
+        return delta.image(quantizer, frame, size, dither)
+    if quantizer is not None:
+        return quantizer.to_image(frame, size, dither), (0, 0), None
+    return Image.frombuffer("RGB", size, frame, "raw", "RGB", 0, 1), (0, 0), None
+
+
+def stream_to_gif(frames: Iterable[bytes], size: Tuple[int, int], output_file: Union[str, BinaryIO], fps: float,
+                  queue_frames: int = DEFAULT_QUEUE_FRAMES,
+                  on_frame: Optional[Callable[[int], None]] = None,
+                  quantizer=None, dither: Optional[str] = None, delta=None, duplicates=None,
+                  colors: int = 256) -> int:
+    """
+    Write raw RGB24 frames of the given size to output_file as an animated GIF.
+    Without a quantizer, every frame gets its own table of up to colors entries.
+    quantizer is an optional quantizer.Quantizer whose palette becomes the GIF's
+    global color table; every frame is mapped onto it with the given dither mode
+    (the quantizer's default when None). delta, a frame_delta.DeltaFrames, then
+    reduces each frame to the region that changed since the previous one.
+    duplicates, a frame_delta.DuplicateFilter, merges near-duplicate frames
+    into longer delays (see merge_duplicates).
+    on_frame(count) runs after each frame is written with the number of input
+    frames consumed so far; raising from it aborts the conversion. The caller
+    owns the frame source and must stop it afterwards (e.g. kill FFmpeg) so the
+    reader thread can exit.
+    Returns the number of frames written.
+    """
+    frames_queue: queue.Queue = queue.Queue(maxsize=max(1, queue_frames))
+    stop = threading.Event()
+    errors = []
+
+    def read_frames():
+        try:
+            for frame in frames:
+                if not _put(frames_queue, frame, stop):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            _put(frames_queue, _END, stop)
+
+    def queued_frames():
+        while True:
+            frame = frames_queue.get()
+            if frame is _END:
+                return
+            yield frame
+
+    reader = threading.Thread(target=read_frames, name="gif-frame-reader", daemon=True)
+    reader.start()
+
+    try:
+        palette = quantizer.palette_bytes if quantizer is not None else None
+        with GifWriter(output_file, palette=palette, colors=colors) as writer:
+            for frame, delay, consumed in merge_duplicates(queued_frames(), frame_delays(fps), size, duplicates):
+                image, position, transparency = prepare_frame(frame, size, quantizer, dither, delta)
+                writer.add_frame(image, delay, position, transparency)
+                del frame, image
+                if on_frame is not None:
+                    on_frame(consumed)
+    finally:
+        stop.set()
+
+    if errors:
+        raise errors[0]
+    if writer.frame_count == 0:
+        raise RuntimeError("The video produced no frames")
+    return writer.frame_count
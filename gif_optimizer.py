@@ -0,0 +1,456 @@
+"""
+Lossless GIF optimizer for Social Media GIF Downloader.
+Rewrites a finished GIF, from any engine, without changing what it shows.
+The animation is replayed on a canvas: frames that change nothing are
+merged into the previous one, the others are cropped to the pixels they
+change, and pixels already on screen become transparent, which leaves
+long runs for LZW. Palette entries no frame uses (and duplicate colors) are
+dropped from the global and local color tables, and every frame is
+LZW-encoded again starting at the smallest code size its palette allows;
+FFmpeg and Pillow always start at 8-bit codes. The result is only kept if
+it is smaller. Can also be run on its own:
+
+    python gif_optimizer.py animation.gif [more.gif ...] [-o output.gif]
+"""
+
+import argparse
+import io
+import logging
+import os
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+# Palette key of the transparent slot; colors are keyed as 0xRRGGBB
+TRANSPARENT_KEY = -1
+
+# Canvas key of pixels whose color isn't known (never drawn, or disposed to the background)
+UNKNOWN_KEY = -2
+
+# Disposal methods that leave the frame in place for the next one to draw over, and the ones
+# that restore its rectangle afterwards
+DISPOSAL_KEEP = (0, 1)
+DISPOSAL_BACKGROUND = 2
+DISPOSAL_PREVIOUS = 3
+
+MAX_DELAY_CS = 0xFFFF
+
+
+@dataclass
+class OptimizeResult:
+    """Sizes, merged frames and time of one optimize_gif run."""
+    input_bytes: int
+    output_bytes: int
+    frames_in: int
+    frames_out: int
+    seconds: float
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.input_bytes - self.output_bytes
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "input_bytes": self.input_bytes,
+            "output_bytes": self.output_bytes,
+            "saved_bytes": self.saved_bytes,
+            "frames_merged": self.frames_in - self.frames_out,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+@dataclass
+class GifFrame:
+    """One image block of a parsed GIF, still LZW-encoded."""
+    left: int
+    top: int
+    width: int
+    height: int
+    interlaced: bool
+    local_table: Optional[bytes]
+    # LZW minimum code size byte, data sub-blocks and their terminator
+    image_data: bytes
+    has_control: bool = False
+    delay_cs: int = 0
+    disposal: int = 0
+    transparency: Optional[int] = None
+    # Application and plain text extensions that precede the frame
+    extensions: List[bytes] = field(default_factory=list)
+
+
+@dataclass
+class ParsedGif:
+    """A GIF split into its logical screen, global color table and frames."""
+    width: int
+    height: int
+    background: int
+    aspect: int
+    global_table: Optional[bytes]
+    frames: List[GifFrame]
+    trailing_extensions: List[bytes] = field(default_factory=list)
+
+
+def _skip_sub_blocks(data: bytes, pos: int) -> int:
+    """Return the position just past a chain of GIF data sub-blocks."""
+    while True:
+        if pos >= len(data):
+            raise ValueError("Truncated GIF data")
+        size = data[pos]
+        pos += 1
+        if size == 0:
+            return pos
+        pos += size
+
+
+def _table_bits(entries: int) -> int:
+    """Size field for a color table of at least this many entries (2 ** (bits + 1) slots)."""
+    bits = 0
+    while 2 ** (bits + 1) < entries:
+        bits += 1
+    return bits
+
+
+def parse_gif(data: bytes) -> ParsedGif:
+    """Split a GIF into its parts. Comment extensions are dropped."""
+    if data[:6] not in (b"GIF87a", b"GIF89a"):
+        raise ValueError("Not a GIF file")
+    width, height, packed, background, aspect = struct.unpack("<HHBBB", data[6:13])
+    pos = 13
+    global_table = None
+    if packed & 0x80:
+        table_bytes = 3 * 2 ** ((packed & 0x07) + 1)
+        global_table = data[pos:pos + table_bytes]
+        pos += table_bytes
+
+    frames: List[GifFrame] = []
+    extensions: List[bytes] = []
+    control: Optional[Tuple[int, int, Optional[int]]] = None
+    while pos < len(data) and data[pos] != 0x3B:
+        block = data[pos]
+        if block == 0x21:
+            label = data[pos + 1]
+            end = _skip_sub_blocks(data, pos + 2)
+            if label == 0xF9:
+                flags, delay, transparent_index = struct.unpack("<BHB", data[pos + 3:pos + 7])
+                control = (delay, (flags >> 2) & 0x07, transparent_index if flags & 0x01 else None)
+            elif label != 0xFE:
+                extensions.append(data[pos:end])
+            pos = end
+        elif block == 0x2C:
+            left, top, frame_width, frame_height, local_packed = struct.unpack("<HHHHB", data[pos + 1:pos + 10])
+            pos += 10
+            local_table = None
+            if local_packed & 0x80:
+                table_bytes = 3 * 2 ** ((local_packed & 0x07) + 1)
+                local_table = data[pos:pos + table_bytes]
+                pos += table_bytes
+            end = _skip_sub_blocks(data, pos + 1)
+            frame = GifFrame(left, top, frame_width, frame_height, bool(local_packed & 0x40), local_table,
+                             data[pos:end], extensions=extensions)
+            if control is not None:
+                frame.has_control = True
+                frame.delay_cs, frame.disposal, frame.transparency = control
+            frames.append(frame)
+            extensions, control = [], None
+            pos = end
+        else:
+            # Junk after the last block; decoders stop here as well
+            break
+    if not frames:
+        raise ValueError("GIF has no frames")
+    return ParsedGif(width, height, background, aspect, global_table, frames, extensions)
+
+
+def decode_indices(frame: GifFrame, table: bytes) -> np.ndarray:
+    """Decode a frame's LZW data to palette indices (height x width, de-interlaced)."""
+    # Pillow decodes the first frame of a GIF to raw indices, so wrap the block in a one-frame GIF
+    bits = _table_bits(max(2, len(table) // 3))
+    single = (b"GIF89a" + struct.pack("<HHBBB", frame.width, frame.height, 0x80 | bits, 0, 0)
+              + table.ljust(3 * 2 ** (bits + 1), b"\x00")
+              + struct.pack("<BHHHHB", 0x2C, 0, 0, frame.width, frame.height, 0x40 if frame.interlaced else 0)
+              + frame.image_data + b"\x3B")
+    with Image.open(io.BytesIO(single)) as image:
+        # Grayscale palettes open as "L", whose values are the indices as well
+        return np.asarray(image, dtype=np.uint8)
+
+
+def encode_indices(indices: np.ndarray, colors: int) -> bytes:
+    """LZW-encode palette indices starting at the smallest code size for a palette of colors entries."""
+    bits = max(2, _table_bits(colors) + 1)
+    image = Image.frombytes("P", (indices.shape[1], indices.shape[0]), np.ascontiguousarray(indices).tobytes())
+    # Pillow's GIF encoder emits data sub-blocks without the terminator
+    return bytes([bits]) + image.tobytes("gif", "P", bits) + b"\x00"
+
+
+def _color_keys(table: bytes) -> np.ndarray:
+    """A color table as 256 0xRRGGBB keys; indices past its end read as black."""
+    rgb = np.frombuffer(table[:768].ljust(768, b"\x00"), dtype=np.uint8).reshape(256, 3).astype(np.int32)
+    return (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+
+
+def _color_table(keys: np.ndarray) -> bytes:
+    """Color table bytes for sorted palette keys; the transparent slot is black."""
+    colors = np.maximum(keys, 0)
+    return np.stack([colors >> 16, (colors >> 8) & 0xFF, colors & 0xFF], axis=1).astype(np.uint8).tobytes()
+
+
+@dataclass
+class _Plan:
+    """A frame to write: its source, the rectangle it still needs to cover and the palette keys it uses."""
+    frame: GifFrame
+    left: int
+    top: int
+    width: int
+    height: int
+    delay_cs: int
+    # Palette key of every source index, with the transparent index mapped to TRANSPARENT_KEY
+    lookup: np.ndarray
+    # Source indices drawn as they are, and the palette keys the written frame needs
+    used: np.ndarray
+    used_keys: np.ndarray
+    uses_global: bool
+    # Cropped or given see-through pixels, so the original LZW data no longer applies
+    modified: bool = False
+    # Source indices of the rectangle, and pixels that become transparent because the canvas
+    # already shows them; only set while the plan is being written
+    indices: Optional[np.ndarray] = None
+    see_through: Optional[np.ndarray] = None
+
+
+def _bounding_box(mask: np.ndarray) -> Tuple[int, int, int, int]:
+    """(top, bottom, left, right) of the True pixels in mask, exclusive at the end."""
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    return rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+
+
+def _plan_frames(gif: ParsedGif) -> Iterator[_Plan]:
+    """
+    Replay the animation on a canvas of palette keys and yield the frames to write.
+    A frame that is left in place is cropped to the pixels it changes, and pixels
+    the canvas already shows become transparent when its palette has a free slot;
+    a frame that changes nothing is merged into the previous one. The same GIF
+    always yields the same plans, so the caller can replay it to write them.
+    """
+    global_lookup = _color_keys(gif.global_table) if gif.global_table is not None else None
+    # A shared transparent slot fits the global palette only if one of its colors is spare
+    global_room = global_lookup is not None and len(np.unique(global_lookup[:len(gif.global_table) // 3])) < 256
+    canvas = np.full((gif.height, gif.width), UNKNOWN_KEY, dtype=np.int32)
+    last: Optional[_Plan] = None
+    for frame in gif.frames:
+        table = frame.local_table if frame.local_table is not None else gif.global_table
+        if table is None:
+            raise ValueError("GIF frame has no color table")
+        indices = decode_indices(frame, table)
+        lookup = _color_keys(table) if frame.local_table is not None else global_lookup.copy()
+        if frame.transparency is not None:
+            lookup[frame.transparency] = TRANSPARENT_KEY
+        keys = lookup[indices]
+        inside = frame.left + frame.width <= gif.width and frame.top + frame.height <= gif.height
+        region = canvas[frame.top:frame.top + frame.height, frame.left:frame.left + frame.width]
+        plan = _Plan(frame, frame.left, frame.top, frame.width, frame.height, frame.delay_cs, lookup,
+                     np.empty(0, dtype=np.int64), lookup[:1], frame.local_table is None, indices=indices)
+
+        if inside and frame.disposal in DISPOSAL_KEEP and frame.width and frame.height:
+            changed = (keys != TRANSPARENT_KEY) & (keys != region)
+            if not changed.any():
+                if (last is not None and last.frame.disposal in DISPOSAL_KEEP and not frame.extensions
+                        and last.delay_cs + frame.delay_cs <= MAX_DELAY_CS):
+                    last.delay_cs += frame.delay_cs
+                    continue
+            else:
+                top, bottom, left, right = _bounding_box(changed)
+                if (bottom - top, right - left) != indices.shape:
+                    plan.top, plan.left = frame.top + top, frame.left + left
+                    plan.height, plan.width = bottom - top, right - left
+                    plan.indices = indices[top:bottom, left:right]
+                    plan.modified = True
+                changed = changed[top:bottom, left:right]
+                drawn = plan.indices[changed]
+                used = np.flatnonzero(np.bincount(drawn, minlength=256))
+                room = global_room if plan.uses_global else len(np.unique(lookup[used])) < 256
+                if room and not changed.all():
+                    plan.see_through = ~changed
+                    plan.used, plan.used_keys = used, np.unique(np.append(lookup[used], TRANSPARENT_KEY))
+                    plan.modified = True
+        if plan.see_through is None and plan.indices.size:
+            plan.used = np.flatnonzero(np.bincount(plan.indices.ravel(), minlength=256))
+            plan.used_keys = np.unique(lookup[plan.used])
+        if frame.transparency is not None and frame.disposal in (DISPOSAL_BACKGROUND, DISPOSAL_PREVIOUS):
+            # Decoders clear a disposed rectangle to the declared transparent index even if no pixel uses it
+            plan.used_keys = np.union1d(plan.used_keys, [TRANSPARENT_KEY])
+
+        if inside:
+            before = region.copy() if frame.disposal == DISPOSAL_PREVIOUS else None
+            np.copyto(region, keys, where=keys != TRANSPARENT_KEY)
+        yield plan
+        if not inside:
+            # Off-screen pixels are clipped by decoders; treat whatever the frame touches as unknown
+            region[...] = UNKNOWN_KEY
+        elif frame.disposal == DISPOSAL_BACKGROUND:
+            region[...] = UNKNOWN_KEY
+        elif frame.disposal == DISPOSAL_PREVIOUS:
+            region[...] = before
+        last = plan
+
+
+def _image_data(plan: _Plan, remap: np.ndarray, transparency: Optional[int], colors: int) -> bytes:
+    """LZW data of a frame whose indices map through remap; the original stream is kept if it is still valid and smaller."""
+    indices = remap[plan.indices]
+    if plan.see_through is not None:
+        indices[plan.see_through] = transparency
+    image_data = encode_indices(indices, colors)
+    original = plan.frame.image_data
+    if (len(original) < len(image_data) and not plan.modified and not plan.frame.interlaced
+            and np.array_equal(remap[plan.used], plan.used)):
+        return original
+    return image_data
+
+
+def _remap(plan: _Plan, palette: np.ndarray) -> np.ndarray:
+    """Map a frame's source indices onto sorted palette keys."""
+    return np.searchsorted(palette, plan.lookup).clip(0, len(palette) - 1).astype(np.uint8)
+
+
+def _table_bytes(colors: int) -> int:
+    return 3 * 2 ** (_table_bits(colors) + 1)
+
+
+def _control_extension(delay_cs: int, disposal: int, transparency: Optional[int]) -> bytes:
+    packed = (disposal & 0x07) << 2 | (1 if transparency is not None else 0)
+    return struct.pack("<BBBBHBB", 0x21, 0xF9, 4, packed, delay_cs, transparency or 0, 0)
+
+
+def optimize_gif_bytes(data: bytes) -> Tuple[bytes, int, int]:
+    """Optimize an in-memory GIF. Returns (optimized bytes, frames before, frames after)."""
+    gif = parse_gif(data)
+    plans = []
+    for plan in _plan_frames(gif):
+        # Only the layout is kept; the pixels are decoded again while writing
+        plan.indices = plan.see_through = None
+        plans.append(plan)
+
+    # One shared palette for every frame that used the global table, plus the background color.
+    # If trimming doesn't shrink the table, the original one is kept so its LZW streams stay valid
+    global_keys = None
+    global_table = gif.global_table
+    background = gif.background
+    if global_table is not None:
+        background_key = int(_color_keys(global_table)[background])
+        global_keys = np.unique(np.concatenate(
+            [[background_key]] + [plan.used_keys for plan in plans if plan.uses_global]))
+        see_through = any(plan.uses_global and TRANSPARENT_KEY in plan.used_keys and plan.modified for plan in plans)
+        if len(global_keys) <= 256 and (see_through or _table_bytes(len(global_keys)) < len(global_table)):
+            global_table = _color_table(global_keys)
+            background = int(np.searchsorted(global_keys, background_key))
+        else:
+            global_keys = None
+
+    out = io.BytesIO()
+    out.write(b"GIF89a")
+    if global_table is None:
+        out.write(struct.pack("<HHBBB", gif.width, gif.height, 0, 0, gif.aspect))
+    else:
+        bits = _table_bits(len(global_table) // 3)
+        out.write(struct.pack("<HHBBB", gif.width, gif.height, 0x80 | (bits << 4) | bits, background, gif.aspect))
+        out.write(global_table.ljust(_table_bytes(len(global_table) // 3), b"\x00"))
+    global_colors = len(global_table) // 3 if global_table is not None else 0
+
+    for layout, plan in zip(plans, _plan_frames(gif)):
+        frame = plan.frame
+        keys = plan.used_keys
+        transparent = keys[0] == TRANSPARENT_KEY
+
+        # (local table or None, transparent index, LZW data) against the global palette or the
+        # frame's own trimmed one; a local table costs bytes but may allow shorter LZW codes
+        candidates = []
+        if plan.uses_global and global_keys is None:
+            transparency = frame.transparency if transparent else None
+            candidates.append((None, transparency,
+                               _image_data(plan, np.arange(256, dtype=np.uint8), transparency, global_colors)))
+        elif global_keys is not None and (plan.uses_global or np.isin(keys, global_keys).all()):
+            transparency = int(np.searchsorted(global_keys, TRANSPARENT_KEY)) if transparent else None
+            candidates.append((None, transparency,
+                               _image_data(plan, _remap(plan, global_keys), transparency, len(global_keys))))
+        if not plan.uses_global or _table_bits(len(keys)) < _table_bits(global_colors):
+            transparency = 0 if transparent else None
+            candidates.append((_color_table(keys), transparency,
+                               _image_data(plan, _remap(plan, keys), transparency, len(keys))))
+        local_table, transparency, image_data = min(
+            candidates, key=lambda c: (_table_bytes(len(c[0]) // 3) if c[0] is not None else 0) + len(c[2]))
+
+        for extension in frame.extensions:
+            out.write(extension)
+        if frame.has_control or layout.delay_cs or frame.disposal or transparency is not None:
+            out.write(_control_extension(layout.delay_cs, frame.disposal, transparency))
+        flags = 0
+        if local_table is not None:
+            flags = 0x80 | _table_bits(len(local_table) // 3)
+        out.write(struct.pack("<BHHHHB", 0x2C, plan.left, plan.top, plan.width, plan.height, flags))
+        if local_table is not None:
+            out.write(local_table.ljust(_table_bytes(len(local_table) // 3), b"\x00"))
+        out.write(image_data)
+
+    for extension in gif.trailing_extensions:
+        out.write(extension)
+    out.write(b"\x3B")
+    return out.getvalue(), len(gif.frames), len(plans)
+
+
+def optimize_gif(input_file: str, output_file: Optional[str] = None) -> OptimizeResult:
+    """
+    Losslessly optimize input_file into output_file (in place by default).
+    If the optimized GIF isn't smaller, the original bytes are kept.
+
+    Raises:
+        ValueError: If the file isn't a well-formed GIF
+    """
+    start = time.perf_counter()
+    output_file = output_file or input_file
+    with open(input_file, 'rb') as f:
+        data = f.read()
+
+    optimized, frames_in, frames_out = optimize_gif_bytes(data)
+    if len(optimized) >= len(data):
+        optimized, frames_out = data, frames_in
+    if optimized is not data or output_file != input_file:
+        partial = output_file + ".part"
+        with open(partial, 'wb') as f:
+            f.write(optimized)
+        os.replace(partial, output_file)
+
+    result = OptimizeResult(len(data), len(optimized), frames_in, frames_out, time.perf_counter() - start)
+    logging.info(f"Optimized {os.path.basename(input_file)}: {result.to_dict()}")
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Losslessly shrink animated GIFs")
+    parser.add_argument("inputs", nargs="+", help="GIF files to optimize (in place unless -o is given)")
+    parser.add_argument("-o", "--output", help="Write the optimized GIF here (only with a single input)")
+    args = parser.parse_args(argv)
+    if args.output and len(args.inputs) > 1:
+        parser.error("-o/--output takes a single input file")
+
+    status = 0
+    for path in args.inputs:
+        try:
+            result = optimize_gif(path, args.output)
+        except (OSError, ValueError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            status = 1
+            continue
+        percent = 100 * result.saved_bytes / result.input_bytes if result.input_bytes else 0
+        print(f"{path}: {result.input_bytes} -> {result.output_bytes} bytes (-{percent:.1f}%), "
+              f"{result.frames_in - result.frames_out} frames merged, {result.seconds:.2f} s")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
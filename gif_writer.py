@@ -0,0 +1,188 @@
+"""
+Incremental GIF writer for Social Media GIF Downloader.
+Writes an animated GIF one frame at a time so memory use doesn't grow with
+the number of frames. Each frame is quantized and LZW-compressed by Pillow,
+then its image block is copied into the output stream. Frames either carry
+their own local color table or share one global palette.
+"""
+
+import io
+import struct
+from typing import BinaryIO, Optional, Tuple, Union
+
+from PIL import Image
+
+
+def _skip_sub_blocks(data: bytes, pos: int) -> int:
+    """Return the position just past a chain of GIF data sub-blocks."""
+    while True:
+        size = data[pos]
+        pos += 1
+        if size == 0:
+            return pos
+        pos += size
+
+
+def encode_frame_block(image: Image.Image, optimize: bool = True) -> Tuple[bytes, bytes, Tuple[int, int, int, int]]:
+    """
+    LZW-encode a palette image with Pillow.
+    Returns (color_table, image_data, (left, top, width, height)) where image_data
+    is the LZW minimum code size byte followed by the data sub-blocks.
+    With optimize=False Pillow keeps the palette indices exactly as given.
+    Frames are never interlaced, since the caller writes its own image descriptor.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, format="GIF", optimize=optimize, interlace=False)
+    data = buffer.getvalue()
+
+    if data[:3] != b"GIF":
+        raise ValueError("Pillow did not produce a GIF stream")
+    packed = data[10]
+    pos = 13
+    color_table = b""
+    if packed & 0x80:
+        table_size = 3 * (2 ** ((packed & 0x07) + 1))
+        color_table = data[pos:pos + table_size]
+        pos += table_size
+
+    while pos < len(data):
+        block = data[pos]
+        if block == 0x21:
+            # Extension: introducer, label, then sub-blocks
+            pos = _skip_sub_blocks(data, pos + 2)
+        elif block == 0x2C:
+            left, top, width, height, local_packed = struct.unpack("<HHHHB", data[pos + 1:pos + 10])
+            pos += 10
+            if local_packed & 0x80:
+                table_size = 3 * (2 ** ((local_packed & 0x07) + 1))
+                color_table = data[pos:pos + table_size]
+                pos += table_size
+            start = pos
+            # LZW minimum code size, then the compressed sub-blocks
+            end = _skip_sub_blocks(data, pos + 1)
+            return color_table, data[start:end], (left, top, width, height)
+        else:
+            break
+    raise ValueError("No image block found in GIF stream")
+
+
+def _table_size_bits(color_table: bytes) -> int:
+    """Size field for a color table: the table holds 2 ** (bits + 1) entries."""
+    entries = max(2, len(color_table) // 3)
+    bits = 0
+    while 2 ** (bits + 1) < entries:
+        bits += 1
+    return bits
+
+
+class GifWriter:
+    """
+    Streams an animated GIF to a file. Every frame carries its own local color
+    table, so frames can be quantized independently as they arrive, unless a
+    global palette is given: then palette frames are written against it and
+    must already use its indices.
+    """
+
+    def __init__(self, target: Union[str, BinaryIO], loop: int = 0, palette: Optional[bytes] = None,
+                 colors: int = 256):
+        self._own_file = isinstance(target, str)
+        self._fp: BinaryIO = open(target, 'wb') if self._own_file else target
+        self.loop = loop
+        self.palette = palette
+        # Local color table size for RGB frames
+        self.colors = colors
+        self.size: Optional[Tuple[int, int]] = None
+        self.frame_count = 0
+        self._closed = False
+
+    def _write_header(self, width: int, height: int) -> None:
+        self.size = (width, height)
+        self._fp.write(b"GIF89a")
+        if self.palette is None:
+            # Logical screen descriptor without a global color table
+            self._fp.write(struct.pack("<HHBBB", width, height, 0, 0, 0))
+        else:
+            bits = _table_size_bits(self.palette)
+            table_bytes = 3 * (2 ** (bits + 1))
+            self._fp.write(struct.pack("<HHBBB", width, height, 0x80 | (bits << 4) | bits, 0, 0))
+            self._fp.write(self.palette[:table_bytes].ljust(table_bytes, b"\x00"))
+        # NETSCAPE2.0 application extension: loop count (0 = forever)
+        self._fp.write(b"\x21\xFF\x0BNETSCAPE2.0\x03\x01" + struct.pack("<H", self.loop) + b"\x00")
+
+    def add_frame(self, image: Image.Image, delay_cs: int, position: Tuple[int, int] = (0, 0),
+                  transparency: Optional[int] = None, disposal: int = 1) -> None:
+        """
+        Append a frame shown for delay_cs hundredths of a second.
+        RGB images are quantized to the writer's colors; palette images are written as-is,
+        against the global palette if the writer has one.
+        position places a (possibly cropped) frame on the canvas. transparency is the
+        palette index treated as see-through.
+        """
+        use_global = self.palette is not None and image.mode == "P"
+        if image.mode != "P":
+            image = image.convert("RGB").quantize(self.colors, method=Image.Quantize.FASTOCTREE)
+
+        color_table, image_data, (_, _, width, height) = encode_frame_block(image, optimize=not use_global)
+        self.add_encoded_frame(image_data, (width, height), delay_cs, None if use_global else color_table,
+                               position, transparency, disposal)
+
+    def add_encoded_frame(self, image_data: bytes, size: Tuple[int, int], delay_cs: int,
+                          color_table: Optional[bytes] = None, position: Tuple[int, int] = (0, 0),
+                          transparency: Optional[int] = None, disposal: int = 1) -> None:
+        """
+        Append a frame that was already LZW-encoded by encode_frame_block (for
+        example in another process). Without a color_table the frame uses the
+        global palette.
+        """
+        width, height = size
+        if self.size is None:
+            self._write_header(width, height)
+
+        if color_table is None:
+            local_flags, color_table = 0, b""
+        else:
+            bits = _table_size_bits(color_table)
+            table_bytes = 3 * (2 ** (bits + 1))
+            color_table = color_table[:table_bytes].ljust(table_bytes, b"\x00")
+            local_flags = 0x80 | bits
+
+        # Graphic control extension: disposal, delay and optional transparent index
+        packed = (disposal & 0x07) << 2
+        if transparency is not None:
+            packed |= 0x01
+        self._fp.write(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, packed, max(0, delay_cs),
+                                   transparency or 0, 0))
+        left, top = position
+        self._fp.write(struct.pack("<BHHHHB", 0x2C, left, top, width, height, local_flags))
+        self._fp.write(color_table)
+        self._fp.write(image_data)
+        self.frame_count += 1
+
+    def close(self) -> None:
+        """Write the trailer and close the file if this writer opened it."""
+        if self._closed:
+            return
+        self._closed = True
+        if self.size is not None:
+            self._fp.write(b"\x3B")
+        if self._own_file:
+            self._fp.close()
+
+    def __enter__(self) -> "GifWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def frame_delay(index: int, fps: float) -> int:
+    """Delay of frame index in centiseconds, rounded so the delays don't drift over the clip."""
+    return round((index + 1) * 100 / fps) - round(index * 100 / fps)
+
+
+def frame_delays(fps: float):
+    """Yield per-frame GIF delays in centiseconds without accumulating rounding drift."""
+    index = 0
+    while True:
+        yield frame_delay(index, fps)
+        index += 1
@@ -0,0 +1,477 @@
+"""
+Main window for Social Media GIF Downloader.
+Imported on demand by social_media_gif_downloader so that customtkinter is
+only loaded when the GUI actually starts.
+"""
+
+import os
+import logging
+import time
+from typing import Optional
+import customtkinter as ctk
+import tkinter.filedialog as filedialog
+from platforms import get_platform_downloader, ClipEdit, OUTPUT_EXTENSIONS, TwitterDownloader, PinterestDownloader, InstagramDownloader, DownloadError, NetworkError
+from config import Config
+from metadata_cache import MetadataCache
+from output_cache import OutputCache
+from job_queue import Job, JobQueue
+from workspace import WorkspaceManager
+from progress import ProgressEvent, STAGE_CONVERT, format_progress
+from cancellation import CancelToken, JobCancelledError
+from ffmpeg_encoder import divisor_fps
+from social_media_gif_downloader import TEMP_VIDEO_FILE
+
+# Formats the convert button can produce, with their display names
+ANIMATION_FORMATS = {"gif": "GIF", "webp": "WebP", "loop_mp4": "Looping MP4"}
+
+# GIF size targets offered in the settings, in bytes (0 = no limit)
+GIF_SIZE_LIMITS = {
+    "No size limit": 0,
+    "8 MB": 8 * 1024 * 1024,
+    "15 MB": 15 * 1024 * 1024,
+    "25 MB": 25 * 1024 * 1024,
+    "50 MB": 50 * 1024 * 1024,
+}
+
+
+class App(ctk.CTk):
+    def __init__(self):
+        super().__init__()
+
+        # --- Configuration ---
+        self.config = Config()
+        self.metadata_cache = None
+        if self.config.get_metadata_cache_enabled():
+            self.metadata_cache = MetadataCache(
+                self.config.get_metadata_cache_path(),
+                ttl=self.config.get_metadata_cache_ttl(),
+                max_entries=self.config.get_metadata_cache_max_entries()
+            )
+        self.job_queue = JobQueue(
+            max_workers=self.config.get_max_concurrent_jobs(),
+            platform_limits=self.config.get_platform_concurrency(),
+            on_state_change=self.on_job_state_change
+        )
+        self.workspaces = WorkspaceManager(quota_bytes=self.config.get_workspace_quota_bytes())
+        self.output_cache = None
+        if self.config.get_output_cache_enabled():
+            self.output_cache = OutputCache(
+                self.config.get_output_cache_dir(),
+                max_bytes=self.config.get_output_cache_max_bytes()
+            )
+
+        # --- Window Setup ---
+        self.title("Social Media GIF Downloader")
+        self.geometry("600x450")
+        ctk.set_appearance_mode("System")
+
+        # --- Widgets ---
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(5, weight=1)
+
+        # URL Entry
+        self.url_label = ctk.CTkLabel(self, text="Paste Social Media Post URL:")
+        self.url_label.grid(row=0, column=0, padx=20, pady=(20, 5), sticky="w")
+
+        self.url_entry = ctk.CTkEntry(self, placeholder_text="https://x.com/user/status/123... or https://pinterest.com/pin/123... or https://instagram.com/p/... or /reel/...")
+        self.url_entry.grid(row=1, column=0, padx=20, pady=5, sticky="ew")
+
+        # Settings Frame
+        self.settings_frame = ctk.CTkFrame(self)
+        self.settings_frame.grid(row=2, column=0, padx=20, pady=10, sticky="ew")
+        self.settings_frame.grid_columnconfigure((0, 1, 2), weight=1)
+
+        # Default Save Location
+        self.save_location_button = ctk.CTkButton(
+            self.settings_frame, text="Set Default Save Location",
+            command=self.set_default_save_location, width=150
+        )
+        self.save_location_button.grid(row=0, column=0, padx=5, pady=5, sticky="ew")
+
+        # Preferred Output Format
+        self.format_var = ctk.StringVar(value=self.config.get_preferred_output_format())
+        self.format_menu = ctk.CTkOptionMenu(
+            self.settings_frame, variable=self.format_var,
+            values=["gif", "mp4", "webp", "loop_mp4"],
+            command=self.on_format_change
+        )
+        self.format_menu.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
+
+        # FPS Settings
+        self.fps_label = ctk.CTkLabel(self.settings_frame, text="")
+        self.fps_label.grid(row=0, column=2, padx=5, pady=5, sticky="w")
+        self.update_fps_label()
+        
+        self.fps_slider = ctk.CTkSlider(
+            self.settings_frame, from_=1, to=60,
+            number_of_steps=59,
+            command=self.on_fps_change
+        )
+        self.fps_slider.set(self.config.get_fps_settings())
+        self.fps_slider.grid(row=1, column=0, columnspan=3, padx=5, pady=5, sticky="ew")
+
+        # GIF Size Target
+        size_limits = dict(GIF_SIZE_LIMITS)
+        max_gif_bytes = self.config.get_max_gif_bytes()
+        if max_gif_bytes not in size_limits.values():
+            # A custom value from the config file
+            size_limits[f"{max_gif_bytes / (1024 * 1024):g} MB"] = max_gif_bytes
+        self.size_limits = size_limits
+        current_limit = next(label for label, value in size_limits.items() if value == max_gif_bytes)
+        self.size_limit_var = ctk.StringVar(value=current_limit)
+        self.size_limit_menu = ctk.CTkOptionMenu(
+            self.settings_frame, variable=self.size_limit_var,
+            values=list(size_limits),
+            command=self.on_size_limit_change
+        )
+        self.size_limit_menu.grid(row=2, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
+
+        # Auto FPS: the slider becomes a cap on a divisor of the source frame rate
+        self.auto_fps_var = ctk.BooleanVar(value=self.config.get_auto_fps())
+        self.auto_fps_checkbox = ctk.CTkCheckBox(
+            self.settings_frame, text="Auto FPS (match source)",
+            variable=self.auto_fps_var, command=self.on_auto_fps_change
+        )
+        self.auto_fps_checkbox.grid(row=2, column=2, padx=5, pady=5, sticky="w")
+
+        # Button Frame
+        self.button_frame = ctk.CTkFrame(self)
+        self.button_frame.grid(row=3, column=0, padx=20, pady=10, sticky="ew")
+        self.button_frame.grid_columnconfigure((0, 1, 2), weight=1)
+
+        # Download Buttons
+        self.download_gif_button = ctk.CTkButton(
+            self.button_frame, text=f"Download as {ANIMATION_FORMATS[self.animation_format()]}",
+            command=lambda: self.start_download_thread(convert_to_gif=True)
+        )
+        self.download_gif_button.grid(row=0, column=0, padx=(0, 5), pady=10, sticky="ew")
+
+        self.download_video_button = ctk.CTkButton(
+            self.button_frame, text="Download as Video",
+            command=lambda: self.start_download_thread(convert_to_gif=False)
+        )
+        self.download_video_button.grid(row=0, column=1, padx=5, pady=10, sticky="ew")
+
+        self.cancel_button = ctk.CTkButton(
+            self.button_frame, text="Cancel",
+            command=self.cancel_downloads,
+            state="disabled"
+        )
+        self.cancel_button.grid(row=0, column=2, padx=(5, 0), pady=10, sticky="ew")
+
+        # Progress Bar
+        self.progress_bar = ctk.CTkProgressBar(self, width=400, height=15)
+        self.progress_bar.grid(row=4, column=0, padx=20, pady=(5, 10), sticky="ew")
+        self.progress_bar.set(0)  # Start at 0%
+
+        # Status Label
+        self.status_label = ctk.CTkLabel(
+            self,
+            text="",
+            wraplength=550,
+            justify="left"
+        )
+        self.status_label.grid(row=5, column=0, padx=20, pady=(10, 5), sticky="ew")
+
+        # Supported platforms info
+        self.platforms_label = ctk.CTkLabel(
+            self,
+            text="Supports: Twitter/X, Pinterest, Instagram (videos only)",
+            font=("", 10)
+        )
+        self.platforms_label.grid(row=6, column=0, padx=20, pady=(5, 20), sticky="w")
+
+        # Active job count
+        self.jobs_label = ctk.CTkLabel(self, text="", font=("", 10))
+        self.jobs_label.grid(row=6, column=0, padx=20, pady=(5, 20), sticky="e")
+
+    def set_default_save_location(self):
+        """Set the default save location."""
+        current_location = self.config.get_default_save_location()
+        initial_dir = current_location if current_location and os.path.exists(current_location) else os.path.expanduser("~")
+        
+        directory = filedialog.askdirectory(
+            title="Select Default Save Location",
+            initialdir=initial_dir
+        )
+        
+        if directory:
+            self.config.set_default_save_location(directory)
+            self.update_status(f"Default save location set to: {directory}", "green")
+    
+    def on_format_change(self, new_format: str):
+        """Handle format preference change."""
+        self.config.set_preferred_output_format(new_format)
+        self.download_gif_button.configure(text=f"Download as {ANIMATION_FORMATS[self.animation_format()]}")
+        logging.info(f"Preferred output format changed to: {new_format}")
+
+    def animation_format(self) -> str:
+        """The format the convert button produces: the preferred one if it is animated, else GIF."""
+        preferred = self.config.get_preferred_output_format()
+        return preferred if preferred in ANIMATION_FORMATS else "gif"
+    
+    def on_fps_change(self, value: float):
+        """Handle FPS slider change."""
+        fps = int(value)
+        self.config.set_fps_settings(fps)
+        self.update_fps_label()
+
+    def on_auto_fps_change(self):
+        """Handle auto FPS toggle."""
+        self.config.set_auto_fps(self.auto_fps_var.get())
+        self.update_fps_label()
+
+    def update_fps_label(self):
+        fps = self.config.get_fps_settings()
+        self.fps_label.configure(text=f"FPS: up to {fps}" if self.config.get_auto_fps() else f"FPS: {fps}")
+
+    def get_clip_edit(self) -> Optional[ClipEdit]:
+        """The default trim, crop and size limits from the config, or None if they are invalid."""
+        try:
+            return ClipEdit(**self.config.get_clip_edit_options())
+        except ValueError as e:
+            logging.warning(f"Ignoring invalid GIF trim or crop settings: {e}")
+            return None
+
+    def on_size_limit_change(self, label: str):
+        """Handle GIF size target change."""
+        self.config.set_max_gif_bytes(self.size_limits[label])
+        logging.info(f"GIF size target changed to: {label}")
+
+    def detect_platform(self, url: str) -> str:
+        """
+        Detects the social media platform from the URL.
+        Returns: 'twitter', 'pinterest', 'instagram', or 'unknown'
+        """
+        downloader = get_platform_downloader(url, TEMP_VIDEO_FILE)
+        if downloader:
+            if isinstance(downloader, TwitterDownloader):
+                return 'twitter'
+            elif isinstance(downloader, PinterestDownloader):
+                return 'pinterest'
+            elif isinstance(downloader, InstagramDownloader):
+                return 'instagram'
+        return 'unknown'
+
+    def get_id_from_url(self, url: str) -> str:
+        """
+        Parses the post/pin ID from the URL to use as a filename.
+        """
+        downloader = get_platform_downloader(url, TEMP_VIDEO_FILE)
+        return downloader.get_id_from_url(url) if downloader else "social_media_post"
+
+    def start_download_thread(self, convert_to_gif: bool = True) -> None:
+        """
+        Prompts for the output file and queues a background download job.
+        """
+        url = self.url_entry.get()
+        if not url:
+            self.update_status("Please paste a URL first.", "red")
+            return
+
+        downloader = get_platform_downloader(
+            url, TEMP_VIDEO_FILE,
+            engine=self.config.get_download_engine(),
+            reuse_info=self.config.get_single_extraction(),
+            gif_engine=self.config.get_gif_engine(),
+            gif_dither=self.config.get_gif_dither(),
+            gif_workers=self.config.get_gif_workers(),
+            gif_delta=self.config.get_gif_delta_frames(),
+            gif_duplicate_threshold=self.config.get_gif_duplicate_threshold(),
+            gif_optimize=self.config.get_gif_optimize(),
+            use_format_policy=self.config.get_download_format_policy(),
+            stream_convert=self.config.get_stream_conversion(),
+            http_fetcher=self.config.get_http_fetcher(),
+            metadata_cache=self.metadata_cache,
+            output_cache=self.output_cache
+        )
+        if not downloader:
+            self.update_status(
+                "Unsupported platform detected.\n\n"
+                "Troubleshooting:\n"
+                "• Only Twitter/X, Pinterest, and Instagram URLs are supported\n"
+                "• Make sure you copied the full URL from your browser\n"
+                "• Example URLs:\n"
+                "  - Twitter: https://x.com/user/status/123...\n"
+                "  - Pinterest: https://pinterest.com/pin/123...\n"
+                "  - Instagram: https://instagram.com/p/123... or /reel/123...",
+                "red"
+            )
+            return
+
+        # Prompt for the output file here, on the Tk main thread, before queuing the job
+        output_format = self.animation_format() if convert_to_gif else "mp4"
+        output_file = self.ask_output_file(downloader.get_id_from_url(url), output_format)
+        if not output_file:
+            self.update_status("Download cancelled.", "gray")
+            return
+
+        self.progress_bar.set(0)
+        self.update_status("Fetching video info...", "white")
+
+        self.job_queue.submit(
+            url,
+            lambda job: self.download_media(url, downloader, convert_to_gif, output_file, job.cancel_token,
+                                            output_format),
+            platform=downloader.platform_name
+        )
+
+    def ask_output_file(self, default_name: str, output_format: str) -> str:
+        """Prompt for the output file. Returns an empty string if the user cancels."""
+        default_ext = OUTPUT_EXTENSIONS[output_format]
+        file_types = [(f"{default_ext[1:].upper()} files", f"*{default_ext}")]
+
+        # Get default save location from config
+        default_save_location = self.config.get_default_save_location()
+        initial_dir = default_save_location if default_save_location and os.path.exists(default_save_location) else None
+
+        save_kwargs = {
+            "defaultextension": default_ext,
+            "filetypes": file_types,
+            "title": f"Save as {default_ext.upper()}",
+            "initialfile": f"{default_name}{default_ext}"
+        }
+        if initial_dir:
+            save_kwargs["initialdir"] = initial_dir
+
+        return filedialog.asksaveasfilename(**save_kwargs)
+
+    def download_media(self, url: str, downloader, convert_to_gif: bool, output_file: str,
+                       cancel_token: Optional[CancelToken] = None, output_format: str = "gif") -> None:
+        """
+        (Background Thread)
+        Downloads media using the appropriate platform downloader.
+        """
+        downloader.cancel_token = cancel_token
+        try:
+            # Each job gets its own temp workspace so concurrent jobs don't clobber each other
+            downloader.use_workspace(self.workspaces.acquire())
+            self.update_status("Getting video info...", "white")
+
+            # Get video info
+            video_fps, default_name = downloader.get_video_info(url)
+
+            format_name = ANIMATION_FORMATS.get(output_format, "video")
+            if convert_to_gif:
+                fps_to_use = self.config.get_fps_settings()
+                status_msg = f"Downloading and converting to {format_name} at {fps_to_use} FPS..."
+                if self.config.get_auto_fps() and video_fps:
+                    # The same divisor the downloader picks from the extracted info
+                    rate, divisor = divisor_fps(video_fps, fps_to_use)
+                    status_msg = (f"Downloading and converting to {format_name} at {float(rate):g} FPS "
+                                  f"(every {divisor} of {video_fps:g} source frames)...")
+            else:
+                status_msg = "Downloading video..."
+
+            self.update_status(status_msg, "white")
+
+            # Download the media, streaming real progress to the progress bar
+            on_progress = self.make_progress_callback(convert_to_gif)
+            if convert_to_gif:
+                fps_to_use = self.config.get_fps_settings()
+                success = downloader.download_media(url, output_file, on_progress, fps=fps_to_use,
+                                                    max_bytes=self.config.get_max_gif_bytes() or None,
+                                                    edit=self.get_clip_edit(),
+                                                    auto_fps=self.config.get_auto_fps(),
+                                                    output_format=output_format)
+            else:
+                # For video downloads, download directly to the chosen output file
+                success = downloader.download_media(url, output_file, on_progress, skip_conversion=True)
+
+            if success:
+                # Update progress
+                self.after(0, lambda: self.progress_bar.set(1.0))
+
+                if convert_to_gif:
+                    self.update_status(f"Success! {format_name} saved as {os.path.basename(output_file)}", "green")
+                else:
+                    self.update_status(f"Success! Video saved as {os.path.basename(output_file)}", "green")
+            else:
+                self.update_status(
+                    "Download failed for an unknown reason.\n\n"
+                    "Troubleshooting:\n"
+                    "• Check the log file for more details\n"
+                    "• Try restarting the application\n"
+                    "• Verify the URL is correct",
+                    "red"
+                )
+
+        except JobCancelledError:
+            self.update_status("Download cancelled.", "gray")
+        except NetworkError as e:
+            self.update_status(e.get_user_message(), "red")
+            logging.error(f"Network error: {e}")
+        except DownloadError as e:
+            self.update_status(e.get_user_message(), "red")
+            logging.error(f"Download error: {e}")
+        except Exception as e:
+            self.update_status(
+                f"An unexpected error occurred.\n\n"
+                f"Troubleshooting:\n"
+                f"• Check your internet connection\n"
+                f"• Try restarting the application\n"
+                f"• Make sure you have enough disk space\n"
+                f"• Error: {str(e)[:100]}",
+                "red"
+            )
+            logging.error(f"Unexpected exception in download_media: {e}", exc_info=True)
+        finally:
+            # Cleanup
+            downloader.cleanup()
+            self.after(0, self.reset_buttons)
+
+    def make_progress_callback(self, convert_to_gif: bool):
+        """
+        Build a progress_callback that drives the progress bar and status text.
+        For GIFs the download fills the first half of the bar and encoding the second.
+        """
+        download_span = 0.5 if convert_to_gif else 1.0
+        last_update = [0.0]
+
+        def on_progress(event: ProgressEvent) -> None:
+            # (Worker Thread) yt-dlp reports many times a second; redraw at most ~10 times a second
+            now = time.monotonic()
+            finished = event.fraction == 1.0
+            if now - last_update[0] < 0.1 and not finished:
+                return
+            last_update[0] = now
+
+            fraction = event.fraction
+            if fraction is not None:
+                if event.stage == STAGE_CONVERT:
+                    value = download_span + fraction * (1.0 - download_span)
+                else:
+                    value = fraction * download_span
+                self.after(0, lambda: self.progress_bar.set(value))
+            self.update_status(format_progress(event), "orange" if event.stalled_for >= 10 else "white")
+
+        return on_progress
+
+    def on_job_state_change(self, job: Job) -> None:
+        """(Worker Thread) Shows how many jobs are queued or running."""
+        active = self.job_queue.active_count()
+        text = f"Active jobs: {active}" if active else ""
+
+        def do_update():
+            self.jobs_label.configure(text=text)
+            self.cancel_button.configure(state="normal" if active else "disabled")
+        self.after(0, do_update)
+
+    def cancel_downloads(self) -> None:
+        """Cancels every queued or running job."""
+        self.update_status("Cancelling...", "gray")
+        self.job_queue.cancel_all()
+
+
+    def update_status(self, message: str, color: str) -> None:
+        """Safely updates the status label from any thread."""
+        def do_update():
+            self.status_label.configure(text=message, text_color=color)
+        self.after(0, do_update)
+
+    def reset_buttons(self) -> None:
+        """Safely re-enables the download buttons."""
+        self.download_gif_button.configure(state="normal")
+        self.download_video_button.configure(state="normal")
+        if self.job_queue.active_count() <= 1:
+            self.progress_bar.set(0)
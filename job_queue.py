@@ -0,0 +1,210 @@
+"""
+Concurrent job queue for Social Media GIF Downloader.
+Runs download jobs on a bounded worker pool with separate concurrency caps per
+platform, so one slow host can't occupy every worker.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Dict, Any, List
+
+from cancellation import CancelToken, JobCancelledError
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+
+class Job:
+    """A single unit of work tracked by the queue."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, url: str, func: Callable[["Job"], Any], platform: Optional[str] = None):
+        self.id = next(self._ids)
+        self.url = url
+        self.func = func
+        self.platform = platform or "unknown"
+        self.state = JOB_QUEUED
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        # Shared with the work function so a running job can be interrupted
+        self.cancel_token = CancelToken()
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job has finished. Returns False on timeout."""
+        return self._done.wait(timeout)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_token.cancelled
+
+    def __repr__(self) -> str:
+        return f"Job(id={self.id}, platform={self.platform!r}, state={self.state!r})"
+
+
+class JobQueue:
+    """
+    Bounded worker pool with per-platform concurrency limits.
+
+    Jobs are dispatched in submission order, but a job whose platform is at its
+    cap is skipped over until a slot frees up, so other platforms keep flowing.
+    """
+
+    DEFAULT_PLATFORM_LIMITS = {"twitter": 2, "pinterest": 2, "instagram": 1}
+
+    def __init__(self, max_workers: int = 3, platform_limits: Optional[Dict[str, int]] = None,
+                 on_state_change: Optional[Callable[[Job], None]] = None):
+        self.max_workers = max(1, max_workers)
+        self.platform_limits = dict(self.DEFAULT_PLATFORM_LIMITS)
+        if platform_limits:
+            self.platform_limits.update(platform_limits)
+        self.on_state_change = on_state_change
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="download-job")
+        self._lock = threading.Lock()
+        self._pending: deque = deque()
+        self._running: Dict[str, int] = {}
+        self._jobs: List[Job] = []
+        self._shutdown = False
+        self._closed = False
+
+    def submit(self, url: str, func: Callable[[Job], Any], platform: Optional[str] = None) -> Job:
+        """Queue a job; func(job) runs on a worker thread and its return value becomes job.result."""
+        job = Job(url, func, platform)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("JobQueue has been shut down")
+            self._jobs.append(job)
+        # Report the queued state before a worker can pick the job up
+        self._notify(job)
+        with self._lock:
+            self._pending.append(job)
+        self._dispatch()
+        return job
+
+    def _platform_limit(self, platform: str) -> int:
+        return self.platform_limits.get(platform, self.max_workers)
+
+    def _dispatch(self) -> None:
+        """Start every pending job that fits under the global and per-platform caps."""
+        to_start = []
+        with self._lock:
+            if self._closed:
+                return
+            total_running = sum(self._running.values())
+            for job in list(self._pending):
+                if total_running >= self.max_workers:
+                    break
+                if self._running.get(job.platform, 0) >= self._platform_limit(job.platform):
+                    continue
+                self._pending.remove(job)
+                self._running[job.platform] = self._running.get(job.platform, 0) + 1
+                total_running += 1
+                to_start.append(job)
+
+        for job in to_start:
+            self._executor.submit(self._run, job)
+
+    def _run(self, job: Job) -> None:
+        job.state = JOB_RUNNING
+        job.started = time.time()
+        self._notify(job)
+        try:
+            job.cancel_token.raise_if_cancelled()
+            job.result = job.func(job)
+            job.state = JOB_SUCCEEDED
+        except JobCancelledError as e:
+            job.error = e
+            job.state = JOB_CANCELLED
+            logging.info(f"Job {job.id} ({job.url}) cancelled")
+        except BaseException as e:
+            job.error = e
+            job.state = JOB_FAILED
+            logging.error(f"Job {job.id} ({job.url}) failed: {e}")
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                self._running[job.platform] -= 1
+            self._notify(job)
+            job._done.set()
+            self._dispatch()
+
+    def _notify(self, job: Job) -> None:
+        logging.info(f"Job {job.id} [{job.platform}] -> {job.state}")
+        if self.on_state_change:
+            try:
+                self.on_state_change(job)
+            except Exception as e:
+                logging.warning(f"Job state callback failed: {e}")
+
+    def cancel(self, job: Job) -> None:
+        """
+        Cancel a job. A queued job is dropped without running; a running job has
+        its token triggered and stops at its next cancellation point.
+        """
+        job.cancel_token.cancel()
+        with self._lock:
+            if job not in self._pending:
+                return
+            self._pending.remove(job)
+        job.state = JOB_CANCELLED
+        job.error = JobCancelledError()
+        job.finished = time.time()
+        self._notify(job)
+        job._done.set()
+
+    def cancel_all(self) -> None:
+        """Cancel every job that hasn't finished yet."""
+        for job in self.jobs:
+            if not job.done:
+                self.cancel(job)
+
+    @property
+    def jobs(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs)
+
+    def active_count(self) -> int:
+        """Number of jobs queued or running."""
+        with self._lock:
+            return len(self._pending) + sum(self._running.values())
+
+    def wait(self, jobs: Optional[List[Job]] = None, timeout: Optional[float] = None) -> bool:
+        """Wait for the given jobs (default: all submitted jobs). Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for job in jobs if jobs is not None else self.jobs:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not job.wait(remaining):
+                return False
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop accepting jobs. With wait=True, block until queued jobs have run;
+        otherwise jobs that haven't started yet are dropped.
+        """
+        with self._lock:
+            self._shutdown = True
+        if wait:
+            self.wait()
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+        self._executor.shutdown(wait=wait)
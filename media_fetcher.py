@@ -0,0 +1,374 @@
+"""
+Pooled HTTP media fetcher for Social Media GIF Downloader.
+Downloads the direct media URL from the extracted info without yt-dlp.
+Connections are kept alive in a per-host pool shared by every job in the
+process, so queued jobs on the same CDN skip the TCP and TLS handshakes.
+Large files are split into HTTP Range segments that several connections
+download in parallel, each writing its bytes straight to their offset in
+the preallocated output file.
+"""
+
+import http.client
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+CHUNK_SIZE = 64 * 1024
+
+# Files larger than this are fetched as parallel Range segments of SEGMENT_BYTES
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+SEGMENT_BYTES = 2 * 1024 * 1024
+MAX_PARALLEL = 4
+
+# Idle keep-alive connections kept per host
+MAX_IDLE_PER_HOST = 8
+MAX_REDIRECTS = 5
+# Extra attempts per request; a reused connection the server has since closed costs one
+RETRIES = 2
+
+_CONTENT_RANGE_PREFIX = "bytes "
+
+
+class FetchError(OSError):
+    """The media could not be fetched (HTTP error, short read, size limit or stop)."""
+    pass
+
+
+@dataclass
+class FetchResult:
+    """Outcome of one fetch: bytes written, wall time, how many Range segments, connections reused."""
+    bytes: int
+    seconds: float
+    segments: int
+    connections_reused: int
+
+    def to_dict(self) -> Dict:
+        result = asdict(self)
+        result["seconds"] = round(self.seconds, 3)
+        return result
+
+
+class ConnectionPool:
+    """Thread-safe pool of idle keep-alive HTTP(S) connections, keyed by scheme, host and port."""
+
+    def __init__(self, timeout: float = 60, max_idle_per_host: int = MAX_IDLE_PER_HOST):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    @staticmethod
+    def key(url: str) -> Tuple[str, str, int]:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise FetchError(f"Not an HTTP URL: {url}")
+        return parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == "https" else 80)
+
+    def acquire(self, url: str) -> Tuple[http.client.HTTPConnection, bool]:
+        """An idle connection to url's host, or a new one. Returns (connection, reused)."""
+        key = self.key(url)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self.reused += 1
+                return idle.pop(), True
+            self.created += 1
+        scheme, host, port = key
+        connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connection_class(host, port, timeout=self.timeout), False
+
+    def release(self, url: str, connection: http.client.HTTPConnection) -> None:
+        """Return a connection whose last response was read to the end."""
+        key = self.key(url)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+
+def _parse_content_range(value: Optional[str]) -> Tuple[int, int, Optional[int]]:
+    """(first, last, total) from a 'bytes first-last/total' header; total is None for '*'."""
+    if not value or not value.startswith(_CONTENT_RANGE_PREFIX):
+        raise FetchError(f"Bad Content-Range: {value!r}")
+    span, _, total = value[len(_CONTENT_RANGE_PREFIX):].partition("/")
+    first, _, last = span.partition("-")
+    try:
+        return int(first), int(last), None if total == "*" else int(total)
+    except ValueError:
+        raise FetchError(f"Bad Content-Range: {value!r}")
+
+
+class MediaFetcher:
+    """
+    Downloads media URLs to files over pooled keep-alive connections, using
+    up to max_parallel Range requests at once for files of at least
+    parallel_min_bytes. Servers that ignore Range are read in one stream.
+    """
+
+    def __init__(self, timeout: float = 60, max_parallel: int = MAX_PARALLEL,
+                 segment_bytes: int = SEGMENT_BYTES, parallel_min_bytes: int = PARALLEL_MIN_BYTES,
+                 pool: Optional[ConnectionPool] = None):
+        self.pool = pool or ConnectionPool(timeout)
+        self.max_parallel = max(1, max_parallel)
+        self.segment_bytes = max(CHUNK_SIZE, segment_bytes)
+        self.parallel_min_bytes = parallel_min_bytes
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def _request(self, url: str, headers: Dict[str, str]):
+        """
+        GET url on a pooled connection, following redirects.
+        Returns (response, connection, final_url, reused); the caller reads the
+        body and hands the connection to _finish.
+        """
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urlsplit(url)
+            path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+            for attempt in range(RETRIES + 1):
+                connection, reused = self.pool.acquire(url)
+                try:
+                    connection.request("GET", path, headers=headers)
+                    response = connection.getresponse()
+                    break
+                except (http.client.HTTPException, OSError) as e:
+                    connection.close()
+                    # A kept-alive connection may have been closed by the server in the meantime
+                    if attempt == RETRIES:
+                        raise FetchError(f"Request to {parts.hostname} failed: {e}")
+            if response.status in (301, 302, 303, 307, 308) and response.getheader("Location"):
+                response.read()
+                self._finish(url, connection, response)
+                url = urljoin(url, response.getheader("Location"))
+                continue
+            if response.status >= 400:
+                response.read()
+                self._finish(url, connection, response)
+                raise FetchError(f"HTTP {response.status} {response.reason} for {parts.hostname}")
+            return response, connection, url, reused
+        raise FetchError(f"Too many redirects for {url}")
+
+    def _finish(self, url: str, connection: http.client.HTTPConnection, response) -> None:
+        if response.will_close:
+            connection.close()
+        else:
+            self.pool.release(url, connection)
+
+    def fetch(self, url: str, path: str, headers: Optional[Dict[str, str]] = None,
+              on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+              max_bytes: Optional[int] = None, parallel: bool = True,
+              stop: Optional[threading.Event] = None) -> FetchResult:
+        """
+        Download url to path. on_progress(done, total) is called after each
+        chunk is written; without parallel the bytes arrive in order, so a
+        reader may follow the file as it grows. max_bytes aborts larger files
+        and stop aborts the download when set.
+
+        Raises:
+            FetchError: If the download fails or is aborted
+        """
+        start = time.monotonic()
+        headers = {"Accept-Encoding": "identity", **(headers or {})}
+        first = {**headers, "Range": f"bytes=0-{self.segment_bytes - 1}"} if parallel else headers
+        reused_before = self.pool.reused
+        state = {"done": 0}
+        progress_lock = threading.Lock()
+
+        def advance(count: int, total: Optional[int]) -> None:
+            if stop is not None and stop.is_set():
+                raise FetchError("Download stopped")
+            with progress_lock:
+                state["done"] += count
+                if max_bytes is not None and state["done"] > max_bytes:
+                    raise FetchError(f"Download exceeds {max_bytes} bytes")
+                if on_progress is not None:
+                    on_progress(state["done"], total)
+
+        response, connection, url, _ = self._request(url, first)
+        ranges: List[Tuple[int, int]] = []
+        # Set on any failure, so the remaining range workers give up
+        halt = threading.Event()
+        join_ranges = None
+        try:
+            if response.status == 206:
+                first_byte, last_byte, total = _parse_content_range(response.getheader("Content-Range"))
+                if first_byte != 0:
+                    raise FetchError(f"Server answered range {first_byte}-{last_byte} to a request from 0")
+                if total is not None:
+                    ranges = [(offset, min(offset + self.segment_bytes, total) - 1)
+                              for offset in range(last_byte + 1, total, self.segment_bytes)]
+            else:
+                length = response.getheader("Content-Length")
+                total = int(length) if length and length.isdigit() else None
+            if max_bytes is not None and total is not None and total > max_bytes:
+                raise FetchError(f"Download is {total} bytes, over the {max_bytes} byte limit")
+            with open(path, 'wb') as f:
+                if ranges:
+                    f.truncate(total)
+                    f.flush()
+                if ranges and total >= self.parallel_min_bytes:
+                    # The other segments download alongside the rest of the first one
+                    join_ranges = self._start_ranges(url, path, headers, ranges, self.max_parallel - 1,
+                                                     lambda count: advance(count, total), halt)
+                written = 0
+
+                def first_written(count: int) -> None:
+                    nonlocal written
+                    written += count
+                    advance(count, total)
+
+                try:
+                    self._copy(response, f, first_written, stop)
+                except (http.client.HTTPException, ConnectionError, TimeoutError) as e:
+                    connection.close()
+                    connection = None
+                    logging.info(f"Download interrupted at byte {written}: {e}")
+                    # Carry on in order from the first byte not yet written
+                    last = last_byte if response.status == 206 else (None if total is None else total - 1)
+                    self._fetch_range(url, f, headers, written, last, lambda count: advance(count, total), stop)
+        except BaseException:
+            halt.set()
+            if connection is not None:
+                connection.close()
+            if join_ranges is not None:
+                try:
+                    join_ranges()
+                except FetchError:
+                    pass
+            raise
+        if connection is not None:
+            self._finish(url, connection, response)
+
+        if ranges and join_ranges is None:
+            join_ranges = self._start_ranges(url, path, headers, ranges, 1, lambda count: advance(count, total), halt)
+        if join_ranges is not None:
+            join_ranges()
+        if total is not None and state["done"] != total:
+            raise FetchError(f"Download ended after {state['done']} of {total} bytes")
+        return FetchResult(state["done"], time.monotonic() - start, 1 + len(ranges),
+                           self.pool.reused - reused_before)
+
+    @staticmethod
+    def _copy(response, f, written: Callable[[int], None], stop: Optional[threading.Event]) -> None:
+        """
+        Copy a response body to f, flushing each chunk before passing its
+        length to written. When a read fails, written has seen exactly the
+        bytes that reached f, so the caller knows where to resume.
+        """
+        while True:
+            if stop is not None and stop.is_set():
+                raise FetchError("Download stopped")
+            chunk = response.read(CHUNK_SIZE)
+            if not chunk:
+                # read(amt) returns b"" when the server hangs up early instead of raising
+                if response.length:
+                    raise http.client.IncompleteRead(b"", response.length)
+                return
+            f.write(chunk)
+            f.flush()
+            written(len(chunk))
+
+    def _start_ranges(self, url: str, path: str, headers: Dict[str, str], ranges: List[Tuple[int, int]],
+                      workers: int, advance: Callable[[int], None], halt: threading.Event) -> Callable[[], None]:
+        """
+        Start downloading byte ranges into their offsets of path on up to
+        workers threads (at least one). Returns a function that waits for them
+        and raises the first FetchError. Setting halt makes them give up.
+        """
+        pending: queue.Queue = queue.Queue()
+        for byte_range in ranges:
+            pending.put(byte_range)
+        errors: List[BaseException] = []
+
+        def worker() -> None:
+            with open(path, 'r+b') as f:
+                while not halt.is_set():
+                    try:
+                        first_byte, last_byte = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        self._fetch_range(url, f, headers, first_byte, last_byte, advance, halt)
+                    except BaseException as e:
+                        errors.append(e)
+                        halt.set()
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, min(workers, len(ranges))))]
+        for thread in threads:
+            thread.start()
+
+        def join() -> None:
+            for thread in threads:
+                thread.join()
+            if errors:
+                raise errors[0] if isinstance(errors[0], FetchError) else FetchError(str(errors[0]))
+
+        return join
+
+    def _fetch_range(self, url: str, f, headers: Dict[str, str], first_byte: int, last_byte: Optional[int],
+                     advance: Callable[[int], None], stop: Optional[threading.Event]) -> None:
+        """
+        Download bytes first_byte to last_byte (to the end of the file when
+        last_byte is None) to their offset in f. A connection that drops or
+        stalls is retried from the first byte not yet written, so no byte is
+        downloaded or counted twice.
+        """
+        offset = first_byte
+
+        def written(count: int) -> None:
+            nonlocal offset
+            offset += count
+            advance(count)
+
+        for _ in range(RETRIES + 1):
+            requested = f"{offset}-{'' if last_byte is None else last_byte}"
+            response, connection, _, _ = self._request(url, {**headers, "Range": f"bytes={requested}"})
+            try:
+                if response.status != 206:
+                    raise FetchError(f"Server ignored the range {requested}")
+                start, end, _ = _parse_content_range(response.getheader("Content-Range"))
+                if start != offset or (last_byte is not None and end != last_byte):
+                    raise FetchError(f"Server answered range {start}-{end} to a request for {requested}")
+                f.seek(offset)
+                self._copy(response, f, written, stop)
+            except (http.client.HTTPException, ConnectionError, TimeoutError) as e:
+                connection.close()
+                logging.info(f"Range {requested} interrupted at byte {offset}: {e}")
+                continue
+            except BaseException:
+                connection.close()
+                raise
+            self._finish(url, connection, response)
+            if offset == end + 1:
+                return
+        raise FetchError(f"Range {first_byte}-{'' if last_byte is None else last_byte} ended at byte {offset} "
+                         f"after {RETRIES + 1} attempts")
+
+
+_shared_fetcher = None
+_shared_fetcher_lock = threading.Lock()
+
+
+def get_shared_fetcher(timeout: float = 60) -> MediaFetcher:
+    """Return the process-wide fetcher whose connection pool every job shares, creating it on first use."""
+    global _shared_fetcher
+    with _shared_fetcher_lock:
+        if _shared_fetcher is None:
+            _shared_fetcher = MediaFetcher(timeout=timeout)
+        return _shared_fetcher
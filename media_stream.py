@@ -0,0 +1,147 @@
+"""
+Overlapped download and conversion for Social Media GIF Downloader.
+A progressive (single-file) media URL is downloaded into the job's temp file
+on one thread while a second thread feeds the bytes written so far into a
+pipe that FFmpeg decodes from. Conversion starts with the first bytes, so a
+job takes about as long as the slower of the two instead of their sum, and
+a slow encoder never stalls the download. The temp file ends up complete
+either way, so an encode that can't work from a pipe (an MP4 whose index
+comes after the media data, for example) can be redone from the file.
+"""
+
+import logging
+import os
+import threading
+import time
+import urllib.request
+from typing import Callable, Dict, Optional
+
+CHUNK_SIZE = 64 * 1024
+
+
+class TeeDownload:
+    """
+    Downloads url to path while feeding the same bytes into a pipe.
+    start() returns the pipe's read end for the decoder's stdin. The
+    download keeps going if the decoder stops reading early; wait()
+    returns whether the whole file arrived.
+    """
+
+    def __init__(self, url: str, path: str, headers: Optional[Dict[str, str]] = None, timeout: float = 60,
+                 on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+                 max_bytes: Optional[int] = None, fetcher=None):
+        self.url = url
+        self.path = path
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.on_progress = on_progress
+        # Abort downloads larger than this (e.g. the workspace quota)
+        self.max_bytes = max_bytes
+        # A media_fetcher.MediaFetcher to download over its pooled connections instead of urllib
+        self.fetcher = fetcher
+        self.bytes_done = 0
+        self.total_bytes: Optional[int] = None
+        self.seconds = 0.0
+        self.complete = False
+        self.error: Optional[Exception] = None
+        self._finished = False
+        self._stopped = threading.Event()
+        self._condition = threading.Condition()
+        self._pipe = None
+        self._threads = []
+
+    def start(self) -> int:
+        """Start downloading and feeding. The caller closes the returned fd once the decoder has exited."""
+        read_fd, write_fd = os.pipe()
+        self._pipe = os.fdopen(write_fd, 'wb')
+        self._threads = [threading.Thread(target=self._download, daemon=True),
+                         threading.Thread(target=self._feed, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+        return read_fd
+
+    def stop(self) -> None:
+        """Abort the download (e.g. when the job is cancelled)."""
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the download and feeder to finish. Returns True if the whole file was downloaded."""
+        for thread in self._threads:
+            thread.join(timeout)
+        return self.complete
+
+    def _written(self, done: int, total: Optional[int]) -> None:
+        """Record that the first done bytes of the file are written and wake the feeder."""
+        with self._condition:
+            self.bytes_done = done
+            self.total_bytes = total
+            self._condition.notify_all()
+        if self.on_progress is not None:
+            self.on_progress(done, total)
+
+    def _download(self) -> None:
+        start = time.monotonic()
+        try:
+            if self.fetcher is not None:
+                # Sequential, so the bytes land in order for the feeder
+                self.fetcher.fetch(self.url, self.path, self.headers, self._written, self.max_bytes,
+                                   parallel=False, stop=self._stopped)
+                self.complete = True
+                return
+            request = urllib.request.Request(self.url, headers=self.headers)
+            with urllib.request.urlopen(request, timeout=self.timeout) as response, open(self.path, 'wb') as f:
+                length = response.headers.get('Content-Length')
+                self.total_bytes = int(length) if length and length.isdigit() else None
+                while not self._stopped.is_set():
+                    chunk = response.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    # The feeder reads the file back; make the bytes visible first
+                    f.flush()
+                    self._written(self.bytes_done + len(chunk), self.total_bytes)
+                    if self.max_bytes is not None and self.bytes_done > self.max_bytes:
+                        raise OSError(f"Download exceeds {self.max_bytes} bytes")
+            if self._stopped.is_set():
+                raise OSError("Download stopped")
+            if self.total_bytes is not None and self.bytes_done != self.total_bytes:
+                raise OSError(f"Download ended after {self.bytes_done} of {self.total_bytes} bytes")
+            self.complete = True
+        except Exception as e:
+            self.error = e
+            logging.warning(f"Streaming download failed: {e}")
+        finally:
+            self.seconds = time.monotonic() - start
+            with self._condition:
+                self._finished = True
+                self._condition.notify_all()
+
+    def _feed(self) -> None:
+        fed = 0
+        source = None
+        try:
+            while True:
+                with self._condition:
+                    while fed == self.bytes_done and not self._finished and not self._stopped.is_set():
+                        self._condition.wait()
+                    available = self.bytes_done - fed
+                    if self._stopped.is_set() or (available == 0 and self._finished):
+                        break
+                if source is None:
+                    source = open(self.path, 'rb')
+                data = source.read(available)
+                fed += len(data)
+                self._pipe.write(data)
+                self._pipe.flush()
+        except OSError as e:
+            # The decoder exited; the download still completes for a retry from the file
+            logging.info(f"Decoder stopped reading the stream: {e}")
+        finally:
+            if source is not None:
+                source.close()
+            try:
+                self._pipe.close()
+            except OSError:
+                pass
@@ -0,0 +1,139 @@
+"""
+Persistent metadata cache for Social Media GIF Downloader.
+Stores yt-dlp info dicts in SQLite, keyed by platform and post ID, so repeat
+requests for the same post skip the network extraction.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, Union
+
+
+class MetadataCache:
+    """SQLite-backed info cache with a TTL, an entry cap and LRU eviction."""
+
+    DEFAULT_TTL = 900  # seconds
+    DEFAULT_MAX_ENTRIES = 500
+
+    def __init__(self, path: Union[str, Path], ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per operation keeps the cache usable from any thread
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS metadata ("
+                    "platform TEXT NOT NULL, "
+                    "post_id TEXT NOT NULL, "
+                    "info TEXT NOT NULL, "
+                    "created REAL NOT NULL, "
+                    "last_access REAL NOT NULL, "
+                    "PRIMARY KEY (platform, post_id))"
+                )
+        except sqlite3.Error as e:
+            logging.error(f"Error initializing metadata cache at {self.path}: {e}")
+
+    def get(self, platform: str, post_id: str) -> Optional[Dict[str, Any]]:
+        """Return the cached info dict, or None on a miss or expired entry."""
+        now = time.time()
+        info = None
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT info, created FROM metadata WHERE platform = ? AND post_id = ?",
+                    (platform, post_id)
+                ).fetchone()
+                if row and now - row[1] <= self.ttl:
+                    conn.execute(
+                        "UPDATE metadata SET last_access = ? WHERE platform = ? AND post_id = ?",
+                        (now, platform, post_id)
+                    )
+                    info = json.loads(row[0])
+                elif row:
+                    conn.execute(
+                        "DELETE FROM metadata WHERE platform = ? AND post_id = ?",
+                        (platform, post_id)
+                    )
+        except (sqlite3.Error, json.JSONDecodeError) as e:
+            logging.warning(f"Metadata cache read failed: {e}")
+            info = None
+
+        with self._lock:
+            if info is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        logging.info(f"Metadata cache {'hit' if info is not None else 'miss'} for {platform}/{post_id}")
+        return info
+
+    def put(self, platform: str, post_id: str, info: Dict[str, Any]) -> None:
+        """Store an info dict and evict least recently used entries over the cap."""
+        now = time.time()
+        try:
+            payload = json.dumps(info)
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO metadata (platform, post_id, info, created, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (platform, post_id, payload, now, now)
+                )
+                conn.execute(
+                    "DELETE FROM metadata WHERE rowid IN ("
+                    "SELECT rowid FROM metadata ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.warning(f"Metadata cache write failed: {e}")
+
+    def delete(self, platform: str, post_id: str) -> None:
+        """Remove one entry, e.g. when its media URLs turned out to be stale."""
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "DELETE FROM metadata WHERE platform = ? AND post_id = ?",
+                    (platform, post_id)
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"Metadata cache delete failed: {e}")
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("DELETE FROM metadata")
+        except sqlite3.Error as e:
+            logging.warning(f"Metadata cache clear failed: {e}")
+
+    def __len__(self) -> int:
+        try:
+            with self._connect() as conn:
+                return conn.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current entry count."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {"hits": hits, "misses": misses, "entries": len(self)}
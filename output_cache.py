@@ -0,0 +1,193 @@
+"""
+Output artifact cache for Social Media GIF Downloader.
+Keeps finished GIFs/videos keyed by (platform, post ID, output format, fps,
+conversion parameters) so repeat conversions are served by a hardlink or copy.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator, Union
+
+
+def _file_digest(path: str) -> str:
+    """Compute the SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    """Hardlink source to target, falling back to a copy across filesystems."""
+    if os.path.exists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+class OutputCache:
+    """Byte-budgeted artifact cache with LRU eviction and SHA-256 integrity checks."""
+
+    INDEX_FILENAME = "index.sqlite"
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self._index_path = os.path.join(self.directory, self.INDEX_FILENAME)
+        self._init_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self._index_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS artifacts ("
+                    "key TEXT PRIMARY KEY, "
+                    "filename TEXT NOT NULL, "
+                    "size INTEGER NOT NULL, "
+                    "sha256 TEXT NOT NULL, "
+                    "last_access REAL NOT NULL)"
+                )
+        except sqlite3.Error as e:
+            logging.error(f"Error initializing output cache at {self.directory}: {e}")
+
+    @staticmethod
+    def make_key(platform: str, post_id: str, output_format: str, fps: Optional[float],
+                 params: Optional[Dict[str, Any]] = None) -> str:
+        """Build the content address for a finished artifact."""
+        fields = {
+            "platform": platform,
+            "post_id": post_id,
+            "format": output_format,
+            "fps": fps,
+            "params": params or {},
+        }
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _remove_entry(self, conn: sqlite3.Connection, key: str, filename: str) -> None:
+        conn.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+        path = os.path.join(self.directory, filename)
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            logging.warning(f"Could not remove cached artifact {path}: {e}")
+
+    def get(self, key: str, output_file: str) -> bool:
+        """
+        Materialize a cached artifact at output_file.
+        Returns True on a verified hit, False on a miss or failed integrity check.
+        """
+        hit = False
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT filename, size, sha256 FROM artifacts WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    filename, size, sha256 = row
+                    path = os.path.join(self.directory, filename)
+                    if (os.path.exists(path) and os.path.getsize(path) == size
+                            and _file_digest(path) == sha256):
+                        _link_or_copy(path, output_file)
+                        conn.execute(
+                            "UPDATE artifacts SET last_access = ? WHERE key = ?", (time.time(), key)
+                        )
+                        hit = True
+                    else:
+                        logging.warning(f"Cached artifact {filename} failed integrity check, discarding")
+                        self._remove_entry(conn, key, filename)
+        except (sqlite3.Error, OSError) as e:
+            logging.warning(f"Output cache read failed: {e}")
+            hit = False
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return hit
+
+    def is_linked(self, path: str) -> bool:
+        """Check whether path is a hardlink to one of the cached artifacts (as left by get)."""
+        try:
+            stat = os.stat(path)
+            if stat.st_nlink < 2:
+                return False
+            with os.scandir(self.directory) as entries:
+                return any(os.path.samestat(stat, entry.stat()) for entry in entries if entry.is_file())
+        except OSError:
+            return False
+
+    def put(self, key: str, source_file: str) -> None:
+        """Store a finished artifact, then evict least recently used entries over budget."""
+        try:
+            size = os.path.getsize(source_file)
+            if size > self.max_bytes:
+                logging.info(f"Artifact of {size} bytes exceeds output cache budget, not caching")
+                return
+            filename = key + os.path.splitext(source_file)[1].lower()
+            path = os.path.join(self.directory, filename)
+            with self._lock:
+                # Copy rather than link so later writes to the user's file can't touch the cache
+                shutil.copy2(source_file, path)
+                sha256 = _file_digest(path)
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO artifacts (key, filename, size, sha256, last_access) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, filename, size, sha256, time.time())
+                    )
+                    self._evict(conn)
+        except (sqlite3.Error, OSError) as e:
+            logging.warning(f"Output cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, filename, size in conn.execute(
+                "SELECT key, filename, size FROM artifacts ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._remove_entry(conn, key, filename)
+            total -= size
+            logging.info(f"Evicted {filename} from output cache")
+
+    def total_bytes(self) -> int:
+        """Return the number of bytes currently held by the cache."""
+        try:
+            with self._connect() as conn:
+                return conn.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current byte usage."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {"hits": hits, "misses": misses, "bytes": self.total_bytes()}
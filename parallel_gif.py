@@ -0,0 +1,125 @@
+"""
+Multi-core GIF encoding for Social Media GIF Downloader.
+The clip's timeline is split into segments of whole output frames. Each
+segment is decoded by its own FFmpeg process, quantized against one shared
+palette and LZW-encoded in a worker process; the parent stitches the encoded
+frame blocks, in order, into a single GIF stream.
+"""
+
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Callable, List, Optional, Tuple, Union
+
+import ffmpeg_encoder
+from frame_delta import DeltaFrames, DuplicateFilter
+from frame_pipeline import merge_duplicates, prepare_frame
+from gif_writer import GifWriter, encode_frame_block, frame_delay
+
+
+# Segments shorter than this cost more in FFmpeg start-up and seeking than they save
+MIN_SEGMENT_FRAMES = 30
+
+# Segments per worker; more, smaller segments balance the load and let a
+# cancelled job stop sooner
+SEGMENTS_PER_WORKER = 4
+
+
+def plan_segments(total_frames: Optional[int], workers: int) -> List[Tuple[int, Optional[int]]]:
+    """
+    Split total_frames output frames into (first_frame, frame_count) segments.
+    The last segment's count is None so it runs to the end of the clip even if
+    the frame estimate is short. With one worker or an unknown length there is
+    a single segment covering the whole clip.
+    """
+    if workers <= 1 or not total_frames:
+        return [(0, None)]
+    count = max(1, min(workers * SEGMENTS_PER_WORKER, total_frames // MIN_SEGMENT_FRAMES))
+    bounds = [round(i * total_frames / count) for i in range(count + 1)]
+    segments: List[Tuple[int, Optional[int]]] = [
+        (bounds[i], bounds[i + 1] - bounds[i]) for i in range(count - 1)
+    ]
+    segments.append((bounds[count - 1], None))
+    return segments
+
+
+# (image_data, size, position, transparency, delay_cs)
+EncodedFrame = Tuple[bytes, Tuple[int, int], Tuple[int, int], Optional[int], int]
+
+
+def encode_segment(command: List[str], quantizer, dither: Optional[str], first_frame: int, fps: float,
+                   delta: bool = False, duplicate_threshold: float = 0) -> Tuple[List[EncodedFrame], int]:
+    """
+    Worker: decode one segment with FFmpeg, quantize every frame against the
+    shared palette and LZW-encode it. With delta, frames after the segment's
+    first are reduced to their changed region; with a duplicate_threshold,
+    near-duplicate frames are merged into longer delays.
+    Returns the encoded frames in order and the number of frames decoded.
+    """
+    reader = ffmpeg_encoder.RawFrameReader(command)
+    deltas = DeltaFrames(quantizer.transparent_index) if delta else None
+    duplicates = DuplicateFilter(duplicate_threshold) if duplicate_threshold > 0 else None
+    delays = (frame_delay(index, fps) for index in itertools.count(first_frame))
+    try:
+        size = reader.start()
+        encoded = []
+        consumed = 0
+        for frame, delay, consumed in merge_duplicates(reader.frames(), delays, size, duplicates):
+            image, position, transparency = prepare_frame(frame, size, quantizer, dither, deltas)
+            encoded.append((encode_frame_block(image, optimize=False)[1], image.size, position, transparency, delay))
+        return encoded, consumed
+    finally:
+        reader.close()
+
+
+def encode_parallel(ffmpeg_exe: str, input_file: str, output_file: Union[str, BinaryIO], fps: float,
+                    quantizer, dither: Optional[str] = None, total_frames: Optional[int] = None,
+                    workers: int = 1, on_frame: Optional[Callable[[int], None]] = None,
+                    delta: bool = False, duplicate_threshold: float = 0, width: Optional[int] = None,
+                    edit: Optional[ffmpeg_encoder.ClipEdit] = None) -> int:
+    """
+    Encode input_file to a GIF using up to workers processes, with quantizer
+    (a quantizer.Quantizer) providing the shared global palette.
+    on_frame(count) runs as each segment is stitched, with the number of input
+    frames consumed so far; raising from it stops the encode, although segments
+    already running finish in the background.
+    delta enables inter-frame delta frames and duplicate_threshold merging of
+    near-duplicate frames (see frame_delta); every segment starts with a full
+    frame. width optionally scales the frames down and edit (a
+    ffmpeg_encoder.ClipEdit) trims and crops them; total_frames then counts
+    the frames of the edited clip. With one worker the output is byte-identical to
+    frame_pipeline.stream_to_gif with the same settings.
+    Returns the number of frames written.
+    """
+    segments = plan_segments(total_frames, workers)
+    commands = [
+        ffmpeg_encoder.build_rawvideo_command(ffmpeg_exe, input_file, fps, width,
+                                              start=first / fps if first else None, max_frames=count, edit=edit)
+        for first, count in segments
+    ]
+    logging.info(f"Encoding GIF in {len(segments)} segment(s) across {workers} worker(s)")
+
+    executor = ProcessPoolExecutor(max_workers=max(1, min(workers, len(segments))))
+    futures = [
+        executor.submit(encode_segment, command, quantizer, dither, first, fps, delta, duplicate_threshold)
+        for command, (first, _) in zip(commands, segments)
+    ]
+    consumed = 0
+    try:
+        with GifWriter(output_file, palette=quantizer.palette_bytes) as writer:
+            for future in futures:
+                encoded, segment_frames = future.result()
+                for image_data, size, position, transparency, delay in encoded:
+                    writer.add_encoded_frame(image_data, size, delay, position=position, transparency=transparency)
+                del encoded
+                consumed += segment_frames
+                if on_frame is not None:
+                    on_frame(consumed)
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+    if writer.frame_count == 0:
+        raise RuntimeError("The video produced no frames")
+    return writer.frame_count
@@ -8,10 +8,29 @@ import re
 import json
 import logging
 import platform
+import queue
 import subprocess
+import threading
 import time
 from abc import ABC, abstractmethod
-from typing import Optional, Tuple, Any
+from fractions import Fraction
+from typing import Optional, Tuple, Any, Dict
+
+import ffmpeg_encoder
+import ffmpeg_utils
+import format_policy
+from ffmpeg_encoder import ClipEdit
+import media_fetcher
+import media_stream
+import ytdlp_engine
+from progress import (
+    ProgressReporter, ProgressEvent, STAGE_CONVERT, STAGE_DOWNLOAD, YTDLP_PROGRESS_TEMPLATE,
+    parse_ytdlp_progress_line, event_from_ytdlp_hook,
+)
+from metadata_cache import MetadataCache
+from output_cache import OutputCache
+from workspace import Workspace, WorkspaceQuotaError
+from cancellation import CancelToken, JobCancelledError
 
 
 class DownloadError(Exception):
@@ -34,14 +53,135 @@ class NetworkError(DownloadError):
     pass
 
 
+ENGINE_SUBPROCESS = "subprocess"
+ENGINE_IN_PROCESS = "in_process"
+DOWNLOAD_ENGINES = (ENGINE_SUBPROCESS, ENGINE_IN_PROCESS)
+
+# GIF encoders: one FFmpeg palettegen/paletteuse pass, a bounded-memory stream of
+# FFmpeg-decoded frames into an incremental writer, or moviepy's write_gif
+GIF_ENGINE_FFMPEG = "ffmpeg"
+GIF_ENGINE_STREAM = "stream"
+GIF_ENGINE_NUMPY = "numpy"
+GIF_ENGINE_MOVIEPY = "moviepy"
+GIF_ENGINES = (GIF_ENGINE_FFMPEG, GIF_ENGINE_STREAM, GIF_ENGINE_NUMPY, GIF_ENGINE_MOVIEPY)
+
+# Output formats: a GIF, the downloaded video as-is, or an FFmpeg transcode to an
+# animated WebP or a silent MP4 meant to loop
+OUTPUT_FORMAT_GIF = "gif"
+OUTPUT_FORMAT_MP4 = "mp4"
+OUTPUT_FORMAT_WEBP = "webp"
+OUTPUT_FORMAT_LOOP_MP4 = "loop_mp4"
+OUTPUT_FORMATS = (OUTPUT_FORMAT_GIF, OUTPUT_FORMAT_MP4, OUTPUT_FORMAT_WEBP, OUTPUT_FORMAT_LOOP_MP4)
+OUTPUT_EXTENSIONS = {
+    OUTPUT_FORMAT_GIF: ".gif",
+    OUTPUT_FORMAT_MP4: ".mp4",
+    OUTPUT_FORMAT_WEBP: ".webp",
+    OUTPUT_FORMAT_LOOP_MP4: ".mp4",
+}
+
+# Dithering for the numpy engine (see quantizer.DITHER_MODES)
+DEFAULT_GIF_DITHER = "ordered"
+
+# Largest 8x8-block luma change (0-255) for a frame to count as a near-duplicate
+DEFAULT_DUPLICATE_THRESHOLD = 2.0
+
+NETWORK_ERROR_KEYWORDS = [
+    'network', 'timeout', 'connection', 'timed out', 'unreachable',
+    'dns', 'unable to download', 'http error 5', 'errno'
+]
+
+
 class PlatformDownloader(ABC):
     """Abstract base class for platform-specific downloaders."""
 
-    def __init__(self, temp_file: str = "temp_video.mp4", max_retries: int = 3, timeout: int = 60):
+    # Short platform name used for cache keys
+    platform_name = "unknown"
+    # Name returned by get_id_from_url when the URL carries no post ID
+    fallback_id = "social_media_post"
+
+    def __init__(self, temp_file: str = "temp_video.mp4", max_retries: int = 3, timeout: int = 60,
+                 engine: str = ENGINE_SUBPROCESS, reuse_info: bool = True,
+                 metadata_cache: Optional[MetadataCache] = None,
+                 output_cache: Optional[OutputCache] = None,
+                 workspace: Optional[Workspace] = None,
+                 cancel_token: Optional[CancelToken] = None,
+                 gif_engine: str = GIF_ENGINE_FFMPEG,
+                 gif_dither: str = DEFAULT_GIF_DITHER,
+                 gif_workers: int = 0,
+                 gif_delta: bool = True,
+                 gif_duplicate_threshold: float = DEFAULT_DUPLICATE_THRESHOLD,
+                 gif_optimize: bool = False,
+                 use_format_policy: bool = True,
+                 stream_convert: bool = False,
+                 http_fetcher: bool = False):
+        self.workspace = workspace
+        if workspace is not None:
+            temp_file = workspace.temp_file
         self.temp_file = temp_file
         self.yt_dlp_executable = 'yt-dlp.exe' if platform.system() == "Windows" else 'yt-dlp'
         self.max_retries = max_retries
         self.timeout = timeout
+        self.engine = engine
+        # Single-extraction mode: keep the info dict from get_video_info for the download step
+        self.reuse_info = reuse_info
+        self.video_info: Optional[dict] = None
+        self._video_info_url: Optional[str] = None
+        self.metadata_cache = metadata_cache
+        self.output_cache = output_cache
+        # Per-job statistics (cache hits, timings, ...) filled in by download_media
+        self.job_stats: Dict[str, Any] = {}
+        # With a token, yt-dlp runs as a killable child process and encoding stops between frames
+        self.cancel_token = cancel_token
+        self.gif_engine = gif_engine
+        self.gif_dither = gif_dither
+        # Processes used by the numpy GIF engine; 0 means one per CPU core
+        self.gif_workers = gif_workers
+        # Write only what changed between frames (numpy GIF engine)
+        self.gif_delta = gif_delta
+        # Frames whose 8x8 luma blocks all move less than this are merged (0 = off)
+        self.gif_duplicate_threshold = gif_duplicate_threshold
+        # Losslessly re-optimize every finished GIF (see gif_optimizer)
+        self.gif_optimize = gif_optimize
+        # Download the smallest silent rendition that covers the output (see format_policy)
+        self.use_format_policy = use_format_policy
+        # Decode progressive downloads while they arrive (see media_stream)
+        self.stream_convert = stream_convert
+        # Fetch direct media URLs over pooled, parallel connections instead of yt-dlp (see media_fetcher)
+        self.http_fetcher = http_fetcher
+        self._download_rendition: Optional[dict] = None
+
+    def use_workspace(self, workspace: Workspace) -> None:
+        """Move this downloader's temp files into a per-job workspace."""
+        self.workspace = workspace
+        self.temp_file = workspace.temp_file
+
+    def cancel(self) -> None:
+        """
+        Cancel the in-flight download or conversion. A running yt-dlp process is
+        killed and encoding stops at the next frame; the job then raises
+        JobCancelledError and cleanup() releases its temp files as usual.
+        """
+        if self.cancel_token is None:
+            # Without a token from the start, this takes effect at the next step
+            self.cancel_token = CancelToken()
+        self.cancel_token.cancel()
+
+    def _check_cancelled(self) -> None:
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+
+    def _backoff(self, seconds: float) -> None:
+        """Sleep between retries, waking early if the job is cancelled."""
+        if self.cancel_token is None:
+            time.sleep(seconds)
+            return
+        self.cancel_token.wait(seconds)
+        self.cancel_token.raise_if_cancelled()
+
+    @property
+    def info_file(self) -> str:
+        """Path used to hand the cached info JSON to the yt-dlp executable."""
+        return os.path.splitext(self.temp_file)[0] + ".info.json"
 
     @abstractmethod
     def detect_platform(self, url: str) -> bool:
@@ -58,13 +198,24 @@ class PlatformDownloader(ABC):
         """Extract post/pin ID from URL for filename generation."""
         pass
 
-    def _run_with_retry(self, command: list, operation: str) -> subprocess.CompletedProcess:
+    def get_cache_key(self, url: str) -> Optional[Tuple[str, str]]:
+        """
+        Return (platform, post_id) identifying the post, or None if the URL
+        has no canonical ID and must not be cached.
+        """
+        post_id = self.get_id_from_url(url)
+        if not post_id or post_id == self.fallback_id:
+            return None
+        return self.platform_name, post_id
+
+    def _run_with_retry(self, command: list, operation: str, on_output_line=None) -> subprocess.CompletedProcess:
         """
         Run a subprocess command with automatic retry on failure.
         
         Args:
             command: Command list to execute
             operation: Human-readable operation name for error messages
+            on_output_line: Optional callable receiving each stdout line as it is printed
             
         Returns:
             CompletedProcess result
@@ -77,39 +228,40 @@ class PlatformDownloader(ABC):
         
         for attempt in range(1, self.max_retries + 1):
             try:
+                self._check_cancelled()
                 logging.info(f"Attempt {attempt}/{self.max_retries} for {operation}")
                 
-                result = subprocess.run(
-                    command,
-                    capture_output=True,
-                    text=True,
-                    encoding='utf-8',
-                    timeout=self.timeout,
-                    creationflags=(subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0)
-                )
+                if on_output_line is not None or self.cancel_token is not None:
+                    result = self._run_streaming(command, on_output_line)
+                else:
+                    result = subprocess.run(
+                        command,
+                        capture_output=True,
+                        text=True,
+                        encoding='utf-8',
+                        timeout=self.timeout,
+                        creationflags=(subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0)
+                    )
                 
+                # A killed process exits non-zero; report that as a cancellation, not a failure
+                self._check_cancelled()
                 if result.returncode == 0:
                     logging.info(f"{operation} succeeded on attempt {attempt}")
                     return result
                 
-                # Check for network-related errors in stderr
-                stderr_lower = result.stderr.lower()
-                is_network_error = any(keyword in stderr_lower for keyword in [
-                    'network', 'timeout', 'connection', 'timed out', 'unreachable',
-                    'dns', 'unable to download', 'http error 5', 'errno'
-                ])
-                
                 last_error = result.stderr
                 
-                if is_network_error and attempt < self.max_retries:
+                if self._is_network_error(result.stderr) and attempt < self.max_retries:
                     wait_time = 2 ** attempt  # Exponential backoff: 2, 4, 8 seconds
                     logging.warning(f"Network error on attempt {attempt}, retrying in {wait_time}s: {result.stderr[:200]}")
-                    time.sleep(wait_time)
+                    self._backoff(wait_time)
                     continue
                 
                 # Non-retryable error or last attempt
                 break
                 
+            except JobCancelledError:
+                raise
             except subprocess.TimeoutExpired:
                 logging.warning(f"Timeout on attempt {attempt}/{self.max_retries} for {operation}")
                 last_error = f"Operation timed out after {self.timeout} seconds"
@@ -117,7 +269,7 @@ class PlatformDownloader(ABC):
                 if attempt < self.max_retries:
                     wait_time = 2 ** attempt
                     logging.info(f"Retrying in {wait_time}s...")
-                    time.sleep(wait_time)
+                    self._backoff(wait_time)
                     continue
                 else:
                     # Last attempt, break to raise error
@@ -129,13 +281,138 @@ class PlatformDownloader(ABC):
                 
                 if attempt < self.max_retries:
                     wait_time = 2 ** attempt
-                    time.sleep(wait_time)
+                    self._backoff(wait_time)
                     continue
                 else:
                     # Last attempt, break to raise error
                     break
                     
         # All retries exhausted
+        self._raise_for_error(last_error)
+
+    def _run_streaming(self, command: list, on_output_line=None, stdin=None) -> subprocess.CompletedProcess:
+        """
+        Run a command, handing each stdout line to on_output_line as it arrives.
+        stdin, if given, is a file descriptor the command reads its input from.
+        Here the timeout applies to silence rather than total run time: the process
+        is killed if it prints nothing for self.timeout seconds, so long downloads
+        that keep making progress are not cut off. Cancelling the job's token kills
+        the process straight away.
+        """
+        process = subprocess.Popen(
+            command,
+            stdin=stdin,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            bufsize=1,
+            creationflags=(subprocess.CREATE_NO_WINDOW if platform.system() == "Windows" else 0)
+        )
+        lines: queue.Queue = queue.Queue()
+        stderr_chunks = []
+
+        def read_stdout():
+            for line in process.stdout:
+                lines.put(line)
+            lines.put(None)
+
+        stdout_thread = threading.Thread(target=read_stdout, daemon=True)
+        stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+        stdout_thread.start()
+        stderr_thread.start()
+
+        def kill():
+            if process.poll() is None:
+                logging.info("Cancelling: killing yt-dlp process")
+                process.kill()
+
+        if self.cancel_token is not None:
+            self.cancel_token.add_callback(kill)
+
+        stdout_lines = []
+        try:
+            while True:
+                try:
+                    line = lines.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise subprocess.TimeoutExpired(command, self.timeout)
+                if line is None:
+                    break
+                stdout_lines.append(line)
+                if on_output_line is None:
+                    continue
+                try:
+                    on_output_line(line)
+                except Exception as e:
+                    logging.warning(f"Output line handler failed: {e}")
+            process.wait()
+        finally:
+            if self.cancel_token is not None:
+                self.cancel_token.remove_callback(kill)
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            stderr_thread.join(timeout=5)
+
+        return subprocess.CompletedProcess(command, process.returncode, ''.join(stdout_lines), ''.join(stderr_chunks))
+
+    def _call_with_retry(self, func, operation: str) -> Any:
+        """
+        Run an in-process yt-dlp call with the same retry and error
+        classification rules as _run_with_retry.
+        
+        Args:
+            func: Zero-argument callable performing the yt-dlp work
+            operation: Human-readable operation name for error messages
+            
+        Returns:
+            Whatever func returns
+            
+        Raises:
+            NetworkError: On network-related failures
+            DownloadError: On other failures
+        """
+        last_error = None
+        
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self._check_cancelled()
+                logging.info(f"Attempt {attempt}/{self.max_retries} for {operation} (in-process)")
+                result = func()
+                logging.info(f"{operation} succeeded on attempt {attempt}")
+                return result
+            except JobCancelledError:
+                raise
+            except Exception as e:
+                # yt-dlp's DownloadError carries the same text the CLI prints to stderr
+                last_error = str(e)
+                
+                if self._is_network_error(last_error) and attempt < self.max_retries:
+                    wait_time = 2 ** attempt
+                    logging.warning(f"Network error on attempt {attempt}, retrying in {wait_time}s: {last_error[:200]}")
+                    self._backoff(wait_time)
+                    continue
+                
+                break
+        
+        self._raise_for_error(last_error)
+
+    @staticmethod
+    def _is_network_error(error_text: str) -> bool:
+        """Check whether yt-dlp error output looks like a transient network failure."""
+        error_lower = (error_text or "").lower()
+        return any(keyword in error_lower for keyword in NETWORK_ERROR_KEYWORDS)
+
+    def _raise_for_error(self, last_error: Optional[str]) -> None:
+        """
+        Translate the last yt-dlp error output into a user-friendly exception.
+        
+        Raises:
+            NetworkError: On network-related failures
+            DownloadError: On other failures
+        """
+        last_error = last_error or ""
         if last_error and 'timed out' in str(last_error).lower():
             raise NetworkError(
                 "Connection timed out - the download took too long to complete.",
@@ -181,6 +458,16 @@ class PlatformDownloader(ABC):
                 f"• Error details: {last_error[:150]}"
             )
 
+    def _use_in_process_engine(self) -> bool:
+        """Check whether the in-process yt-dlp engine is selected and usable."""
+        if self.engine != ENGINE_IN_PROCESS:
+            return False
+        if not ytdlp_engine.is_available():
+            logging.warning("yt_dlp package not importable, falling back to the yt-dlp executable")
+            self.engine = ENGINE_SUBPROCESS
+            return False
+        return True
+
     def get_video_info(self, url: str) -> Tuple[int, str]:
         """
         Get video FPS and default filename using yt-dlp.
@@ -198,20 +485,42 @@ class PlatformDownloader(ABC):
         ]
 
         try:
-            result_info = self._run_with_retry(yt_dlp_command_info, "fetch video info")
-            
             video_fps = 15  # Default FPS
-            if result_info.stdout:
-                try:
-                    video_info = json.loads(result_info.stdout)
-                    video_fps = video_info.get('fps', 15)
-                except json.JSONDecodeError:
-                    logging.warning("Could not parse video info JSON, using default FPS")
+            video_info = None
+            from_cache = False
+            cache_key = self.get_cache_key(url) if self.metadata_cache is not None else None
+            if cache_key is not None:
+                video_info = self.metadata_cache.get(*cache_key)
+
+            if video_info is not None:
+                from_cache = True
+                logging.info("Using cached video info, skipping extraction")
+            elif self._use_in_process_engine():
+                engine = ytdlp_engine.get_shared_engine(self.timeout)
+                video_info = self._call_with_retry(
+                    lambda: engine.extract_info(url, 'bestvideo[ext=mp4]'), "fetch video info"
+                )
+            else:
+                result_info = self._run_with_retry(yt_dlp_command_info, "fetch video info")
+
+                if result_info.stdout:
+                    try:
+                        video_info = json.loads(result_info.stdout)
+                    except json.JSONDecodeError:
+                        logging.warning("Could not parse video info JSON, using default FPS")
+
+            if isinstance(video_info, dict):
+                video_fps = video_info.get('fps', 15)
+                self.video_info = video_info
+                self._video_info_url = url
+                # Re-storing a cache hit would restart its TTL, keeping expired media URLs alive
+                if cache_key is not None and not from_cache:
+                    self.metadata_cache.put(*cache_key, video_info)
 
             default_name = self.get_id_from_url(url)
             return video_fps, default_name
             
-        except (NetworkError, DownloadError):
+        except (NetworkError, DownloadError, JobCancelledError):
             raise
         except Exception as e:
             logging.error(f"Error getting video info: {e}")
@@ -222,14 +531,152 @@ class PlatformDownloader(ABC):
                 f"• Error: {str(e)[:100]}"
             )
 
-    def download_media(self, url: str, output_file: str, progress_callback=None, skip_conversion=False, fps: int = 15) -> bool:
+    def get_cached_info(self, url: str) -> Optional[dict]:
+        """Return the info dict extracted by get_video_info for this URL, if reuse is enabled."""
+        if self.reuse_info and self.video_info is not None and self._video_info_url == url:
+            return self.video_info
+        return None
+
+    def _forget_cached_info(self, url: str) -> None:
+        """Drop url's entry from the metadata cache, e.g. after its media URLs turned out to be stale."""
+        cache_key = self.get_cache_key(url) if self.metadata_cache is not None else None
+        if cache_key is not None:
+            self.metadata_cache.delete(*cache_key)
+
+    def get_conversion_params(self) -> Dict[str, Any]:
+        """Return the conversion settings that affect the output bytes (part of the output cache key)."""
+        params: Dict[str, Any] = {"gif_engine": self.gif_engine}
+        if self.gif_engine in (GIF_ENGINE_STREAM, GIF_ENGINE_NUMPY):
+            params["gif_duplicate_threshold"] = self.gif_duplicate_threshold
+        if self.gif_engine == GIF_ENGINE_NUMPY:
+            params["gif_dither"] = self.gif_dither
+            params["gif_delta"] = self.gif_delta
+        if self.gif_optimize:
+            params["gif_optimize"] = True
+        if not self.use_format_policy:
+            # Scaling the full-size rendition gives slightly different pixels
+            params["format_policy"] = False
+        return params
+
+    def get_output_cache_key(self, url: str, output_format: str, fps: Optional[int],
+                             max_bytes: Optional[int] = None, edit: Optional[ClipEdit] = None,
+                             auto_fps: bool = False) -> Optional[str]:
+        """Return the output cache key for a job, or None if the job can't be cached."""
+        if self.output_cache is None:
+            return None
+        cache_key = self.get_cache_key(url)
+        if cache_key is None:
+            return None
+        params = self.get_conversion_params()
+        if max_bytes:
+            params["max_bytes"] = max_bytes
+        if edit:
+            params["edit"] = edit.to_dict()
+        if auto_fps:
+            # fps is only the cap; the rate itself depends on the source
+            params["fps_mode"] = "auto"
+        return OutputCache.make_key(*cache_key, output_format, fps, params)
+
+    def download_media(self, url: str, output_file: str, progress_callback=None, skip_conversion=False, fps: int = 15,
+                       max_bytes: Optional[int] = None, edit: Optional[ClipEdit] = None,
+                       auto_fps: bool = False, output_format: str = OUTPUT_FORMAT_GIF) -> bool:
+        """
+        Download media from the platform, serving repeat jobs from the output cache.
+        Unless skip_conversion is set, the video is converted to output_format
+        (a GIF, or an animated WebP or looping MP4; see convert_animation).
+        max_bytes caps the size of a converted GIF, edit trims, crops and scales
+        the output, and auto_fps turns fps into a cap on a divisor of the source
+        frame rate (see convert_to_gif).
+        Returns True if successful, False otherwise.
+        
+        Raises:
+            DownloadError: On download failures with user-friendly messages
+        """
+        self.job_stats = {}
+        self._check_cancelled()
+        if skip_conversion:
+            output_format = OUTPUT_FORMAT_MP4
+        output_key = self.get_output_cache_key(url, output_format, None if skip_conversion else fps,
+                                               max_bytes if output_format == OUTPUT_FORMAT_GIF else None,
+                                               None if skip_conversion else edit,
+                                               auto_fps and not skip_conversion)
+        if output_key is not None:
+            if self.output_cache.get(output_key, output_file):
+                logging.info("Output cache hit, skipping download and conversion")
+                self.job_stats["output_cache"] = "hit"
+                return True
+            self.job_stats["output_cache"] = "miss"
+            # The previous file may be a hardlink into the cache; never write through it.
+            # Any other file is left alone so a failed job doesn't lose it.
+            if self.output_cache.is_linked(output_file):
+                os.remove(output_file)
+
+        try:
+            success = self._download_media(url, output_file, progress_callback, skip_conversion, fps, max_bytes, edit,
+                                           auto_fps, output_format)
+        except JobCancelledError:
+            # Don't leave a half-written GIF or video behind
+            for partial in (output_file, output_file + ".part"):
+                if os.path.exists(partial):
+                    try:
+                        os.remove(partial)
+                    except OSError as e:
+                        logging.warning(f"Could not remove partial output {partial}: {e}")
+            raise
+        if success and output_key is not None and os.path.exists(output_file):
+            self.output_cache.put(output_key, output_file)
+        return success
+
+    def select_download_formats(self, url: str, output_format: str, fps=None, max_bytes: Optional[int] = None,
+                                edit: Optional[ClipEdit] = None) -> Optional[str]:
+        """
+        yt-dlp format selection for a conversion job. With use_format_policy set,
+        the formats list from get_video_info picks the smallest video rendition
+        that still covers the output size (after edit's crop and scale, and the
+        size_target width cap when max_bytes applies) and fps, without audio
+        where possible. A crop keeps the largest rendition, since its
+        coordinates are in source pixels. Without a formats list any video-only
+        format is preferred. With stream_convert or http_fetcher, single-file
+        renditions are preferred so they can be decoded while downloading or
+        fetched directly. Records the chosen rendition in job_stats.
+        """
+        self._download_rendition = None
+        formats = self.get_download_formats()
+        if not self.use_format_policy or formats is None:
+            return formats
+        info = self.video_info if self._video_info_url == url else None
+        size = format_policy.source_size(info)
+        if size is None:
+            return format_policy.VIDEO_ONLY_FORMATS
+        edit = edit or ClipEdit()
+        width, height = size
+        if not edit.crop:
+            width, height = edit.output_size(width, height)
+            if max_bytes and output_format == OUTPUT_FORMAT_GIF:
+                import size_target
+                if width > size_target.MAX_WIDTH:
+                    width, height = size_target.MAX_WIDTH, max(1, height * size_target.MAX_WIDTH // width)
+        rendition = format_policy.select_rendition(info, width, height, fps,
+                                                   progressive=self.stream_convert or self.http_fetcher)
+        self._download_rendition = rendition
+        if rendition is not None:
+            self.job_stats["download_format"] = {
+                "format_id": rendition["format_id"], "width": rendition["width"], "height": rendition["height"],
+                "estimated_bytes": format_policy.estimated_bytes(rendition, info.get("duration")),
+            }
+        return format_policy.format_spec(rendition)
+
+    def _download_media(self, url: str, output_file: str, progress_callback=None, skip_conversion=False, fps: int = 15,
+                        max_bytes: Optional[int] = None, edit: Optional[ClipEdit] = None,
+                        auto_fps: bool = False, output_format: str = OUTPUT_FORMAT_GIF) -> bool:
         """
-        Download media from the platform.
+        Download media from the platform and convert it if needed.
         Returns True if successful, False otherwise.
         
         Raises:
             DownloadError: On download failures with user-friendly messages
         """
+        reporter = ProgressReporter(progress_callback)
         try:
             # For video downloads, download directly to output file
             if skip_conversion:
@@ -240,7 +687,26 @@ class PlatformDownloader(ABC):
                     os.remove(self.temp_file)
                 download_target = self.temp_file
 
-            formats = self.get_download_formats()
+            formats = self.get_download_formats() if skip_conversion else \
+                self.select_download_formats(url, output_format, fps, max_bytes, edit)
+
+            stream_source = None if skip_conversion else \
+                self._stream_source(url, output_format, max_bytes, edit, auto_fps)
+            if stream_source is not None:
+                converted, downloaded = self._stream_convert(stream_source, output_file, output_format,
+                                                             progress_callback, fps, edit, auto_fps)
+                if converted:
+                    return True
+                if downloaded:
+                    return self._convert_download(output_file, progress_callback, fps, max_bytes, edit, auto_fps,
+                                                  output_format)
+
+            direct_source = self._direct_source(url) if self.http_fetcher and not skip_conversion else None
+            if direct_source is not None and self._fetch_direct(direct_source, reporter):
+                return self._convert_download(output_file, progress_callback, fps, max_bytes, edit, auto_fps,
+                                              output_format)
+
+            cached_info = self.get_cached_info(url)
             yt_dlp_command_dl = [
                 self.yt_dlp_executable,
                 '-o', download_target,
@@ -253,10 +719,72 @@ class PlatformDownloader(ABC):
                 yt_dlp_command_dl.insert(1, '-f')
                 yt_dlp_command_dl.insert(2, formats)
 
-            # Download with retry mechanism
-            self._run_with_retry(yt_dlp_command_dl, "download media")
+            # Cap the download at what's left of the shared workspace quota
+            max_filesize = None
+            if self.workspace is not None and not skip_conversion:
+                max_filesize = self.workspace.remaining_quota()
+                if max_filesize is not None:
+                    if max_filesize <= 0:
+                        raise WorkspaceQuotaError("No temporary disk space left under the workspace quota")
+                    yt_dlp_command_dl[1:1] = ['--max-filesize', str(max_filesize)]
+
+            # Stream yt-dlp's progress as ProgressEvents when someone is listening
+            def emit_hook_progress(status):
+                # Raising here aborts the in-process download between chunks
+                self._check_cancelled()
+                event = event_from_ytdlp_hook(status)
+                if event is not None:
+                    reporter.emit(event)
+
+            def emit_line_progress(line):
+                event = parse_ytdlp_progress_line(line)
+                if event is not None:
+                    reporter.emit(event)
+
+            progress_hook = on_output_line = None
+            if reporter:
+                yt_dlp_command_dl[1:1] = ['--newline', '--progress-template', YTDLP_PROGRESS_TEMPLATE]
+                progress_hook, on_output_line = emit_hook_progress, emit_line_progress
+            elif self.cancel_token is not None:
+                progress_hook = emit_hook_progress
+
+            # Download with retry mechanism, reporting stalls while no bytes arrive
+            with reporter.heartbeat(STAGE_DOWNLOAD):
+                if self._use_in_process_engine():
+                    engine = ytdlp_engine.get_shared_engine(self.timeout)
+                    if cached_info is not None:
+                        logging.info("Reusing extracted video info for download")
+                        self._call_with_retry(
+                            lambda: engine.download_info(cached_info, download_target, formats, max_filesize,
+                                                         progress_hook),
+                            "download media"
+                        )
+                    else:
+                        self._call_with_retry(
+                            lambda: engine.download(url, download_target, formats, max_filesize, progress_hook),
+                            "download media"
+                        )
+                else:
+                    if cached_info is not None:
+                        # Hand the already-extracted info to yt-dlp instead of re-extracting the URL
+                        logging.info("Reusing extracted video info for download")
+                        with open(self.info_file, 'w', encoding='utf-8') as f:
+                            json.dump(cached_info, f)
+                        yt_dlp_command_dl[-1:] = ['--load-info-json', self.info_file]
+                        try:
+                            self._run_with_retry(yt_dlp_command_dl, "download media", on_output_line)
+                        except DownloadError as e:
+                            # The stored format URLs may have expired; extract the post again
+                            logging.warning(f"Stored info failed to download: {e}; trying with URL {url}")
+                            self._forget_cached_info(url)
+                            self._run_with_retry(yt_dlp_command_dl[:-2] + [url], "download media", on_output_line)
+                    else:
+                        self._run_with_retry(yt_dlp_command_dl, "download media", on_output_line)
 
             if not os.path.exists(download_target):
+                if max_filesize is not None:
+                    # yt-dlp skips files larger than --max-filesize without failing
+                    raise WorkspaceQuotaError("The video is larger than the remaining workspace quota")
                 raise DownloadError(
                     "Download completed but file not found.",
                     "• Try downloading again\n"
@@ -264,22 +792,31 @@ class PlatformDownloader(ABC):
                     "• Your antivirus might be blocking the file"
                 )
 
+            try:
+                self.job_stats["downloaded_bytes"] = os.path.getsize(download_target)
+            except OSError as e:
+                logging.warning(f"Could not measure the download: {e}")
+            if self.workspace is not None:
+                self.workspace.check_quota()
+            self._check_cancelled()
+
             # If we downloaded directly to output (video download), we're done
             if skip_conversion:
                 return True
 
-            # Otherwise, check if it's already a GIF
-            if self.temp_file.lower().endswith('.gif'):
-                # Just copy the GIF file
-                import shutil
-                shutil.copy2(self.temp_file, output_file)
-                return True
-
-            # Convert video to GIF
-            return self.convert_to_gif(self.temp_file, output_file, progress_callback, fps)
+            return self._convert_download(output_file, progress_callback, fps, max_bytes, edit, auto_fps,
+                                          output_format)
 
-        except (NetworkError, DownloadError):
+        except (NetworkError, DownloadError, JobCancelledError):
             raise
+        except WorkspaceQuotaError as e:
+            logging.error(f"Workspace quota error: {e}")
+            raise DownloadError(
+                "Not enough temporary disk space for this download.",
+                "• Wait for other downloads to finish and try again\n"
+                "• Increase workspace_quota_bytes in the config file\n"
+                f"• Error: {str(e)[:100]}"
+            )
         except Exception as e:
             logging.error(f"Download error: {e}")
             raise DownloadError(
@@ -290,14 +827,642 @@ class PlatformDownloader(ABC):
                 f"• Error: {str(e)[:100]}"
             )
 
-    def convert_to_gif(self, input_file: str, output_file: str, progress_callback=None, fps: int = 15) -> bool:
+    def _convert_download(self, output_file: str, progress_callback=None, fps: int = 15,
+                          max_bytes: Optional[int] = None, edit: Optional[ClipEdit] = None,
+                          auto_fps: bool = False, output_format: str = OUTPUT_FORMAT_GIF) -> bool:
+        """Turn the downloaded temp file into output_file, passing it through when possible."""
+        # Sources already in the requested format skip the decode and re-encode
+        if self._pass_through(output_file, output_format, fps, max_bytes, edit):
+            return True
+
+        if output_format != OUTPUT_FORMAT_GIF:
+            return self.convert_animation(self.temp_file, output_file, output_format, progress_callback, fps,
+                                          edit, auto_fps)
+
+        # Convert video to GIF
+        return self.convert_to_gif(self.temp_file, output_file, progress_callback, fps, max_bytes, edit,
+                                   auto_fps)
+
+    def _stream_source(self, url: str, output_format: str, max_bytes: Optional[int] = None,
+                       edit: Optional[ClipEdit] = None, auto_fps: bool = False) -> Optional[dict]:
+        """
+        The progressive format to decode while it downloads, or None if the job
+        has to download first: stream_convert is off, the extracted info has no
+        single-file URL, the encoder needs the whole file (a GIF engine other
+        than FFmpeg, or a max_bytes target), or the file would be passed through.
+        """
+        if not self.stream_convert:
+            return None
+        if output_format == OUTPUT_FORMAT_GIF and (self.gif_engine != GIF_ENGINE_FFMPEG or max_bytes):
+            return None
+        info = self.video_info if self._video_info_url == url else None
+        if info is None or (auto_fps and not info.get('fps')):
+            return None
+        source = self._direct_source(url)
+        if source is None:
+            return None
+        if output_format == OUTPUT_FORMAT_LOOP_MP4 and not edit and \
+                str(source.get('vcodec', '')).startswith(('avc1', 'h264')):
+            # _pass_through remuxes these without re-encoding
+            return None
+        return source
+
+    def _direct_source(self, url: str) -> Optional[dict]:
+        """The rendition chosen for url (or its info dict) if it has a single-file URL to fetch directly."""
+        info = self.video_info if self._video_info_url == url else None
+        if info is None:
+            return None
+        source = self._download_rendition or info
+        return source if format_policy.progressive_url(source) else None
+
+    def _fetch_direct(self, source: dict, reporter: ProgressReporter) -> bool:
+        """
+        Download the source's single-file URL into temp_file with the shared
+        media_fetcher, whose keep-alive connections are reused across jobs.
+        Returns False when the fetch fails so the caller downloads with yt-dlp
+        instead. Records the fetch in job_stats["http_fetch"].
         """
-        Convert video file to GIF format.
+        max_filesize = self.workspace.remaining_quota() if self.workspace is not None else None
+        if max_filesize is not None and max_filesize <= 0:
+            raise WorkspaceQuotaError("No temporary disk space left under the workspace quota")
+
+        def on_progress(done, total):
+            reporter.emit(ProgressEvent(STAGE_DOWNLOAD, done, total))
+
+        stop = threading.Event()
+        if self.cancel_token is not None:
+            self.cancel_token.add_callback(stop.set)
+        fetcher = media_fetcher.get_shared_fetcher(self.timeout)
+        try:
+            with reporter.heartbeat(STAGE_DOWNLOAD):
+                result = fetcher.fetch(format_policy.progressive_url(source), self.temp_file,
+                                       source.get('http_headers'), on_progress if reporter else None, max_filesize,
+                                       stop=stop)
+        except media_fetcher.FetchError as e:
+            self._check_cancelled()
+            logging.warning(f"Direct fetch failed, falling back to yt-dlp: {e}")
+            return False
+        finally:
+            if self.cancel_token is not None:
+                self.cancel_token.remove_callback(stop.set)
+        logging.info(f"Fetched {result.bytes} bytes in {result.segments} segment(s) "
+                     f"with {result.connections_reused} reused connection(s)")
+        self.job_stats["http_fetch"] = result.to_dict()
+        self.job_stats["downloaded_bytes"] = result.bytes
+        if self.workspace is not None:
+            self.workspace.check_quota()
+        self._check_cancelled()
+        return True
+
+    def _stream_convert(self, source: dict, output_file: str, output_format: str, progress_callback=None,
+                        fps: int = 15, edit: Optional[ClipEdit] = None, auto_fps: bool = False) -> Tuple[bool, bool]:
+        """
+        Download the progressive source into temp_file while FFmpeg encodes it
+        from a pipe. Returns (converted, downloaded). An encode that fails
+        (e.g. an MP4 with its index at the end can't be decoded from a pipe)
+        leaves downloaded True so the caller converts the finished file; a
+        failed download leaves both False so the caller retries with yt-dlp.
+        Records timings in job_stats["stream_convert"].
+        """
+        builders = {
+            OUTPUT_FORMAT_GIF: ffmpeg_encoder.build_gif_command,
+            OUTPUT_FORMAT_WEBP: ffmpeg_encoder.build_webp_command,
+            OUTPUT_FORMAT_LOOP_MP4: ffmpeg_encoder.build_loop_mp4_command,
+        }
+        fps, _ = self._resolve_fps(self.temp_file, fps, auto_fps)
+        command = builders[output_format](ffmpeg_utils.get_ffmpeg_exe(), 'pipe:0', output_file, fps, edit=edit)
+        reporter = ProgressReporter(progress_callback)
+
+        def on_download_progress(done, total):
+            reporter.emit(ProgressEvent(STAGE_DOWNLOAD, done, total))
+
+        max_filesize = self.workspace.remaining_quota() if self.workspace is not None else None
+        fetcher = media_fetcher.get_shared_fetcher(self.timeout) if self.http_fetcher else None
+        tee = media_stream.TeeDownload(format_policy.progressive_url(source), self.temp_file,
+                                       source.get('http_headers'), self.timeout,
+                                       on_download_progress if reporter else None, max_filesize, fetcher)
+        if self.cancel_token is not None:
+            self.cancel_token.add_callback(tee.stop)
+        logging.info(f"Encoding {output_format} with FFmpeg at {fps} FPS while downloading")
+        start = time.monotonic()
+        read_fd = tee.start()
+        converted = False
+        try:
+            self._run_ffmpeg_encode(command, output_file, progress_callback,
+                                    ffmpeg_encoder.expected_frames(self._clip_duration(self.temp_file, edit), fps),
+                                    stdin=read_fd, output_format=output_format)
+            converted = True
+        except (RuntimeError, subprocess.SubprocessError) as e:
+            logging.warning(f"Streaming encode failed, converting the downloaded file instead: {e}")
+        except BaseException:
+            # Cancelled: don't finish the download either
+            tee.stop()
+            raise
+        finally:
+            # Unblocks the feeder if FFmpeg stopped reading
+            os.close(read_fd)
+            downloaded = tee.wait()
+            if self.cancel_token is not None:
+                self.cancel_token.remove_callback(tee.stop)
+        self._check_cancelled()
+
+        self.job_stats["downloaded_bytes"] = tee.bytes_done
+        self.job_stats["stream_convert"] = {
+            "download_seconds": round(tee.seconds, 3),
+            "total_seconds": round(time.monotonic() - start, 3),
+            "converted": converted and downloaded,
+        }
+        if not downloaded:
+            logging.warning(f"Streaming download failed, falling back to yt-dlp: {tee.error}")
+            return False, False
+        if not converted:
+            return False, True
+        if output_format == OUTPUT_FORMAT_GIF:
+            self.job_stats["gif_engine"] = GIF_ENGINE_FFMPEG
+            if self.gif_optimize:
+                self._optimize_gif(output_file)
+        else:
+            self.job_stats["output_format"] = output_format
+        logging.info(f"Streaming {output_format} encode completed at {fps} FPS")
+        return True, True
+
+    def _pass_through(self, output_file: str, output_format: str, fps, max_bytes: Optional[int] = None,
+                      edit: Optional[ClipEdit] = None) -> bool:
+        """
+        Deliver the downloaded file without re-encoding it when its content is
+        already what was asked for: a GIF (within max_bytes) for GIF output, an
+        animated WebP for WebP output, or H.264/yuv420p video no faster than fps
+        for a looping MP4, which is remuxed. The format is sniffed from the file
+        itself since yt-dlp names every download after temp_file. A GIF is still
+        losslessly optimized when gif_optimize is set. Returns False when the
+        file has to be converted, e.g. because an edit was requested.
+        """
+        source_format = ffmpeg_encoder.sniff_format(self.temp_file)
+        self.job_stats["source_format"] = source_format
+        if edit or source_format is None:
+            return False
+
+        if source_format == "gif" and output_format == OUTPUT_FORMAT_GIF:
+            if max_bytes is not None and os.path.getsize(self.temp_file) > max_bytes:
+                return False
+            import shutil
+            shutil.move(self.temp_file, output_file)
+            logging.info("Source is already a GIF, skipping conversion")
+            self.job_stats["passthrough"] = "copy"
+            if self.gif_optimize:
+                self._optimize_gif(output_file)
+            return True
+
+        if source_format == "webp" and output_format == OUTPUT_FORMAT_WEBP:
+            import shutil
+            shutil.move(self.temp_file, output_file)
+            logging.info("Source is already a WebP, skipping conversion")
+            self.job_stats["passthrough"] = "copy"
+            return True
+
+        if source_format == "mp4" and output_format == OUTPUT_FORMAT_LOOP_MP4:
+            ffmpeg_exe = ffmpeg_utils.get_ffmpeg_exe()
+            info = ffmpeg_encoder.probe_video(ffmpeg_exe, self.temp_file)
+            if info["codec"] != "h264" or info["pix_fmt"] != "yuv420p" or not info["fps"] or info["fps"] > fps:
+                return False
+            logging.info("Source is already H.264, remuxing to a looping MP4 without re-encoding")
+            try:
+                self._run_ffmpeg_encode(ffmpeg_encoder.build_remux_mp4_command(ffmpeg_exe, self.temp_file,
+                                                                               output_file), output_file,
+                                        output_format=OUTPUT_FORMAT_LOOP_MP4)
+            except RuntimeError as e:
+                logging.warning(f"Remux failed, re-encoding instead: {e}")
+                return False
+            self.job_stats["passthrough"] = "remux"
+            self.job_stats["output_format"] = output_format
+            return True
+
+        return False
+
+    def convert_to_gif(self, input_file: str, output_file: str, progress_callback=None, fps: int = 15,
+                       max_bytes: Optional[int] = None, edit: Optional[ClipEdit] = None,
+                       auto_fps: bool = False) -> bool:
+        """
+        Convert video file to GIF format with the configured engine.
+        With auto_fps, fps is a cap: the GIF uses the largest whole divisor of
+        the source frame rate at or below it, so every nth source frame is kept.
+        edit (a ClipEdit) limits the conversion to a time range, crop and maximum
+        size; it is applied while decoding, so discarded frames and pixels are
+        never scaled or quantized. With max_bytes, the frame rate (at most fps),
+        width and palette size are first chosen by size_target so the GIF fits
+        in that many bytes. With gif_optimize set, the finished GIF is then
+        losslessly re-optimized.
+        If an FFmpeg-based encoder fails, the conversion is retried with moviepy.
+        
+        Raises:
+            DownloadError: If conversion fails
+        """
+        fps, source_fps = self._resolve_fps(input_file, fps, auto_fps)
+        width, colors = None, 256
+        if max_bytes:
+            try:
+                settings = self._fit_to_size(input_file, fps, max_bytes, edit, source_fps)
+            except (JobCancelledError, DownloadError):
+                raise
+            except Exception as e:
+                logging.error(f"GIF size target error: {e}")
+                raise DownloadError(
+                    "Failed to fit the GIF in the size limit.",
+                    "• The video file might be corrupted\n"
+                    "• Try again without a maximum GIF size\n"
+                    "• Make sure you have enough disk space\n"
+                    "• FFmpeg might not be installed correctly"
+                )
+            fps, width, colors = settings.fps, settings.width, settings.colors
+
+        result = self._encode_gif(input_file, output_file, progress_callback, fps, width, colors, edit)
+        if self.gif_optimize:
+            self._optimize_gif(output_file)
+        if max_bytes:
+            output_bytes = os.path.getsize(output_file)
+            self.job_stats["target_size"]["output_bytes"] = output_bytes
+            self.job_stats["target_size"]["met"] = output_bytes <= max_bytes
+            if output_bytes > max_bytes:
+                logging.warning(f"GIF is {output_bytes} bytes, over the {max_bytes} byte target")
+        return result
+
+    def _optimize_gif(self, output_file: str) -> None:
+        """Losslessly shrink a finished GIF in place; on failure the GIF is kept as encoded."""
+        import gif_optimizer
+
+        self._check_cancelled()
+        try:
+            result = gif_optimizer.optimize_gif(output_file)
+        except (OSError, ValueError) as e:
+            logging.warning(f"GIF optimization failed, keeping the unoptimized GIF: {e}")
+            return
+        self.job_stats["gif_optimize"] = result.to_dict()
+
+    def _resolve_fps(self, input_file: str, fps, auto_fps: bool) -> Tuple[Any, Optional[Fraction]]:
+        """
+        The frame rate to convert at and, in auto mode, the exact source rate
+        whose divisor grid it lies on. Records the choice in job_stats["fps"].
+        """
+        source_fps = (self.video_info or {}).get('fps')
+        if auto_fps and not source_fps:
+            source_fps = ffmpeg_encoder.probe_video(ffmpeg_utils.get_ffmpeg_exe(), input_file)["fps"]
+        stats: Dict[str, Any] = {"mode": "auto" if auto_fps else "fixed", "requested": fps,
+                                 "source_fps": source_fps}
+        self.job_stats["fps"] = stats
+        if not auto_fps:
+            stats["fps"] = fps
+            return fps, None
+        if not source_fps:
+            logging.warning(f"Source frame rate unknown, converting at {fps} FPS")
+            stats["fps"] = fps
+            return fps, None
+
+        rate, divisor = ffmpeg_encoder.divisor_fps(source_fps, fps)
+        stats.update({"divisor": divisor, "fps": round(float(rate), 3)})
+        logging.info(f"Auto FPS: every {divisor} of {float(ffmpeg_encoder.source_rate(source_fps)):.3f} "
+                     f"source frames, {float(rate):.3f} FPS (cap {fps})")
+        return rate, ffmpeg_encoder.source_rate(source_fps)
+
+    def _encode_gif(self, input_file: str, output_file: str, progress_callback=None, fps: int = 15,
+                    width: Optional[int] = None, colors: int = 256, edit: Optional[ClipEdit] = None) -> bool:
+        """Run the configured GIF engine, falling back to moviepy if it fails."""
+        encoders = {
+            GIF_ENGINE_FFMPEG: self._convert_with_ffmpeg,
+            GIF_ENGINE_STREAM: self._convert_streaming,
+            GIF_ENGINE_NUMPY: self._convert_with_numpy,
+        }
+        encoder = encoders.get(self.gif_engine)
+        if encoder is not None:
+            try:
+                result = encoder(input_file, output_file, progress_callback, fps, width, colors, edit)
+                self.job_stats["gif_engine"] = self.gif_engine
+                return result
+            except JobCancelledError:
+                raise
+            except Exception as e:
+                logging.warning(f"{self.gif_engine} GIF encoder failed, falling back to moviepy: {e}")
+
+        result = self._convert_with_moviepy(input_file, output_file, progress_callback, fps, width, colors, edit)
+        self.job_stats["gif_engine"] = GIF_ENGINE_MOVIEPY
+        return result
+
+    def _fit_to_size(self, input_file: str, fps, max_bytes: int, edit: Optional[ClipEdit] = None,
+                     source_fps: Optional[Fraction] = None):
+        """
+        Pick the best fps, width and palette size whose GIF should fit max_bytes.
+        Short segments sampled across the clip are cut into a small lossless
+        clip, and candidate settings are encoded from it with the configured
+        engine; each preview's size is scaled up to the full (edited) clip length.
+        With source_fps, only frame rates that divide it are tried.
+        Returns a size_target.GifSettings and records the search in job_stats.
+        """
+        import size_target
+
+        ffmpeg_exe = ffmpeg_utils.get_ffmpeg_exe()
+        edit = edit or ClipEdit()
+        source = ffmpeg_encoder.probe_video(ffmpeg_exe, input_file)
+        duration = edit.duration((self.video_info or {}).get('duration') or source["duration"])
+        width = size_target.MAX_WIDTH
+        if source["width"] and source["height"]:
+            width = edit.output_size(source["width"], source["height"])[0]
+        ladder = size_target.quality_ladder(fps, width, source_fps)
+        segments = size_target.plan_sample(duration)
+        sample_seconds = sum(length for _, length in segments)
+
+        base = os.path.splitext(self.temp_file)[0]
+        sample_file, preview_file = base + ".sample.mkv", base + ".preview.gif"
+        logging.info(f"Sampling {len(segments)} segment(s) to fit the GIF in {max_bytes} bytes")
+        command = size_target.build_sample_command(ffmpeg_exe, input_file, sample_file, segments, fps,
+                                                   ladder[0].width, edit)
+        result = self._run_streaming(command)
+        self._check_cancelled()
+        if result.returncode != 0 or not os.path.exists(sample_file):
+            raise RuntimeError(f"FFmpeg could not cut the size sample: {result.stderr.strip()[-300:]}")
+
+        def estimate(settings):
+            # Preview encodes must not see the full clip's info or touch the job's stats
+            saved_info, saved_stats = self.video_info, self.job_stats
+            self.video_info, self.job_stats = None, {}
+            try:
+                self._encode_gif(sample_file, preview_file, None, settings.fps, settings.width, settings.colors)
+            finally:
+                self.video_info, self.job_stats = saved_info, saved_stats
+            self._check_cancelled()
+            preview_bytes = os.path.getsize(preview_file)
+            if not duration:
+                return preview_bytes
+            return int(preview_bytes * max(1.0, duration / sample_seconds))
+
+        search = size_target.SizeSearch(ladder, estimate, max_bytes)
+        try:
+            settings, estimated = search.run()
+        finally:
+            for path in (sample_file, preview_file):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        self.job_stats["target_size"] = {
+            "max_bytes": max_bytes,
+            **settings.to_dict(),
+            "estimated_bytes": estimated,
+            "previews": len(search.estimates),
+        }
+        logging.info(f"Encoding at {float(settings.fps):.3f} FPS, {settings.width}px wide, {settings.colors} colors "
+                     f"(~{estimated} bytes after {len(search.estimates)} preview(s))")
+        return settings
+
+    def _convert_with_ffmpeg(self, input_file: str, output_file: str, progress_callback=None, fps: int = 15,
+                             width: Optional[int] = None, colors: int = 256, edit: Optional[ClipEdit] = None) -> bool:
+        """
+        Convert in a single FFmpeg pass (fps, palettegen, paletteuse) without
+        decoding frames into Python.
+        
+        Raises:
+            RuntimeError: If FFmpeg exits with an error
+        """
+        command = ffmpeg_encoder.build_gif_command(ffmpeg_utils.get_ffmpeg_exe(), input_file, output_file, fps,
+                                                   width, colors=colors, edit=edit)
+        logging.info(f"Encoding GIF with FFmpeg at {fps} FPS")
+        self._run_ffmpeg_encode(command, output_file, progress_callback,
+                                ffmpeg_encoder.expected_frames(self._clip_duration(input_file, edit), fps),
+                                output_format=OUTPUT_FORMAT_GIF)
+        logging.info(f"FFmpeg GIF encode completed at {fps} FPS")
+        return True
+
+    def _run_ffmpeg_encode(self, command: list, output_file: str, progress_callback=None,
+                           total_frames: Optional[int] = None, stdin=None,
+                           output_format: str = OUTPUT_FORMAT_GIF) -> None:
+        """
+        Run an FFmpeg encode that writes -progress to stdout, reporting its frames
+        as convert progress for output_format. stdin is passed on to _run_streaming.
+        
+        Raises:
+            RuntimeError: If FFmpeg exits with an error
+        """
+        reporter = ProgressReporter(progress_callback, output_format)
+        progress_state: Dict[str, str] = {}
+
+        def on_output_line(line):
+            frame = ffmpeg_encoder.parse_progress_line(line, progress_state)
+            if frame is not None and reporter:
+                done = min(frame, total_frames) if total_frames else frame
+                reporter.emit(ProgressEvent(STAGE_CONVERT, done, total_frames))
+
+        result = self._run_streaming(command, on_output_line, stdin)
+        self._check_cancelled()
+        if result.returncode != 0 or not os.path.exists(output_file):
+            raise RuntimeError(f"FFmpeg exited with code {result.returncode}: {result.stderr.strip()[-300:]}")
+
+    def convert_animation(self, input_file: str, output_file: str, output_format: str, progress_callback=None,
+                          fps: int = 15, edit: Optional[ClipEdit] = None, auto_fps: bool = False) -> bool:
+        """
+        Transcode a video straight to an animated WebP or a silent looping MP4
+        with the bundled FFmpeg. Both are much smaller than a GIF, and the MP4
+        also encodes faster. fps, edit and auto_fps work as in convert_to_gif.
+        
+        Raises:
+            DownloadError: If conversion fails
+        """
+        builders = {
+            OUTPUT_FORMAT_WEBP: ffmpeg_encoder.build_webp_command,
+            OUTPUT_FORMAT_LOOP_MP4: ffmpeg_encoder.build_loop_mp4_command,
+        }
+        if output_format not in builders:
+            raise ValueError(f"Unsupported animation format: {output_format}")
+
+        fps, _ = self._resolve_fps(input_file, fps, auto_fps)
+        self.job_stats["output_format"] = output_format
+        command = builders[output_format](ffmpeg_utils.get_ffmpeg_exe(), input_file, output_file, fps, edit=edit)
+        logging.info(f"Encoding {output_format} with FFmpeg at {fps} FPS")
+        try:
+            self._run_ffmpeg_encode(command, output_file, progress_callback,
+                                    ffmpeg_encoder.expected_frames(self._clip_duration(input_file, edit), fps),
+                                    output_format=output_format)
+        except JobCancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"{output_format} conversion error: {e}")
+            raise DownloadError(
+                f"Failed to convert video to {output_format.replace('_', ' ').upper()} format.",
+                "• The video file might be corrupted\n"
+                "• Try downloading as video (MP4) or GIF instead\n"
+                "• Make sure you have enough disk space\n"
+                "• FFmpeg might not be installed correctly"
+            )
+        logging.info(f"{output_format} encode completed at {fps} FPS")
+        return True
+
+    def _convert_streaming(self, input_file: str, output_file: str, progress_callback=None, fps: int = 15,
+                           width: Optional[int] = None, colors: int = 256, edit: Optional[ClipEdit] = None) -> bool:
+        """
+        Convert with bounded memory: FFmpeg decodes raw frames into a pipe, a few
+        frames at a time pass through a bounded queue, and each one is quantized
+        and appended to the GIF as it arrives.
+        
+        Raises:
+            RuntimeError: If FFmpeg fails or produces no frames
+        """
+        import frame_pipeline
+
+        command = ffmpeg_encoder.build_rawvideo_command(ffmpeg_utils.get_ffmpeg_exe(), input_file, fps, width,
+                                                        edit=edit)
+        duration = self._clip_duration(input_file, edit)
+        total_frames = ffmpeg_encoder.expected_frames(duration, fps)
+        on_frame = self._frame_callback(progress_callback, total_frames)
+
+        logging.info(f"Streaming GIF encode at {fps} FPS")
+        reader = ffmpeg_encoder.RawFrameReader(command)
+        try:
+            size = reader.start()
+            frame_count = frame_pipeline.stream_to_gif(reader.frames(), size, output_file, fps, on_frame=on_frame,
+                                                       duplicates=self._duplicate_filter(), colors=colors)
+        finally:
+            reader.close()
+        self._record_dropped_frames(frame_count)
+        logging.info(f"Streaming GIF encode completed: {frame_count} frames at {size[0]}x{size[1]}")
+        return True
+
+    def _clip_duration(self, input_file: str, edit: Optional[ClipEdit] = None, probe: bool = False) -> Optional[float]:
+        """
+        Length of the part of input_file being converted, from the extracted
+        video info or, with probe, from FFmpeg. None if unknown.
+        """
+        duration = (self.video_info or {}).get('duration')
+        if not duration and probe:
+            duration = ffmpeg_encoder.probe_duration(ffmpeg_utils.get_ffmpeg_exe(), input_file)
+        return (edit or ClipEdit()).duration(duration)
+
+    def _frame_callback(self, progress_callback, total_frames: Optional[int]):
+        """
+        on_frame callback for the frame pipelines: stops between frames if the job
+        was cancelled, reports convert progress and counts the frames read.
+        """
+        reporter = ProgressReporter(progress_callback, OUTPUT_FORMAT_GIF)
+        self.job_stats["frames_read"] = 0
+
+        def on_frame(count):
+            self._check_cancelled()
+            self.job_stats["frames_read"] = count
+            if reporter:
+                done = min(count, total_frames) if total_frames else count
+                reporter.emit(ProgressEvent(STAGE_CONVERT, done, total_frames))
+
+        return on_frame
+
+    def _duplicate_filter(self):
+        """A frame_delta.DuplicateFilter for the configured threshold, or None if merging is off."""
+        if self.gif_duplicate_threshold <= 0:
+            return None
+        from frame_delta import DuplicateFilter
+        return DuplicateFilter(self.gif_duplicate_threshold)
+
+    def _record_dropped_frames(self, frame_count: int) -> None:
+        dropped = max(0, self.job_stats.pop("frames_read", frame_count) - frame_count)
+        self.job_stats["frames_dropped"] = dropped
+        if dropped:
+            logging.info(f"Merged {dropped} near-duplicate frames into longer delays")
+
+    def _build_palette(self, input_file: str, fps: int, duration: Optional[float] = None, colors: int = 256,
+                       width: Optional[int] = None, edit: Optional[ClipEdit] = None):
+        """
+        Decode a sample of frames spread over the clip (edited by edit and scaled
+        down to width, if given) and build a global palette of up to colors
+        entries from them.
+        Returns a quantizer.Quantizer.
+        """
+        import quantizer
+        import numpy as np
+
+        # About PALETTE_SAMPLE_FRAMES frames over a known duration, else one per second
+        sample_fps = min(fps, quantizer.PALETTE_SAMPLE_FRAMES / duration) if duration else min(fps, 1)
+        command = ffmpeg_encoder.build_rawvideo_command(ffmpeg_utils.get_ffmpeg_exe(), input_file, sample_fps, width,
+                                                        edit=edit)
+        reader = ffmpeg_encoder.RawFrameReader(command)
+        try:
+            width, height = reader.start()
+
+            def sampled_frames():
+                for frame in reader.frames():
+                    self._check_cancelled()
+                    yield np.frombuffer(frame, dtype=np.uint8).reshape(height, width, 3)
+
+            return quantizer.Quantizer.from_frames(sampled_frames(), colors)
+        finally:
+            reader.close()
+
+    def _convert_with_numpy(self, input_file: str, output_file: str, progress_callback=None, fps: int = 15,
+                            width: Optional[int] = None, colors: int = 256, edit: Optional[ClipEdit] = None) -> bool:
+        """
+        Convert with the NumPy quantizer: one palette is built from frames sampled
+        across the clip, then frames stream through the bounded pipeline and are
+        mapped onto it through a lookup table with the configured dithering.
+        With more than one GIF worker, segments of the clip are quantized and
+        encoded in parallel processes instead. With delta frames enabled, each
+        frame only carries the region that changed, with unchanged pixels in it
+        transparent.
+        
+        Raises:
+            RuntimeError: If FFmpeg fails or produces no frames
+        """
+        ffmpeg_exe = ffmpeg_utils.get_ffmpeg_exe()
+        duration = self._clip_duration(input_file, edit, probe=True)
+        logging.info("Building global GIF palette from sampled frames")
+        # Delta frames keep one palette slot free for the transparent index
+        palette_quantizer = self._build_palette(input_file, fps, duration, min(colors, 255 if self.gif_delta else 256),
+                                                width, edit)
+        self._check_cancelled()
+
+        total_frames = ffmpeg_encoder.expected_frames(duration, fps)
+        on_frame = self._frame_callback(progress_callback, total_frames)
+
+        workers = self.gif_workers or os.cpu_count() or 1
+        if workers > 1:
+            import parallel_gif
+            frame_count = parallel_gif.encode_parallel(ffmpeg_exe, input_file, output_file, fps, palette_quantizer,
+                                                       self.gif_dither, total_frames, workers, on_frame,
+                                                       delta=self.gif_delta,
+                                                       duplicate_threshold=self.gif_duplicate_threshold,
+                                                       width=width, edit=edit)
+            self._record_dropped_frames(frame_count)
+            logging.info(f"Parallel GIF encode completed: {frame_count} frames with {workers} workers")
+            return True
+
+        import frame_pipeline
+
+        logging.info(f"Quantizing GIF frames with NumPy at {fps} FPS ({self.gif_dither} dithering)")
+        command = ffmpeg_encoder.build_rawvideo_command(ffmpeg_exe, input_file, fps, width, edit=edit)
+        reader = ffmpeg_encoder.RawFrameReader(command)
+        try:
+            size = reader.start()
+            delta = None
+            if self.gif_delta:
+                from frame_delta import DeltaFrames
+                delta = DeltaFrames(palette_quantizer.transparent_index)
+            frame_count = frame_pipeline.stream_to_gif(reader.frames(), size, output_file, fps, on_frame=on_frame,
+                                                       quantizer=palette_quantizer, dither=self.gif_dither,
+                                                       delta=delta, duplicates=self._duplicate_filter())
+        finally:
+            reader.close()
+        self._record_dropped_frames(frame_count)
+        logging.info(f"NumPy GIF encode completed: {frame_count} frames, {len(palette_quantizer.palette)} colors")
+        return True
+
+    def _convert_with_moviepy(self, input_file: str, output_file: str, progress_callback=None, fps: int = 15,
+                              width: Optional[int] = None, colors: int = 256, edit: Optional[ClipEdit] = None) -> bool:
+        """
+        Convert by decoding frames with moviepy and writing them with write_gif.
+        edit's time range and crop are applied to the clip before any frame is
+        read, and edit's size bounds and width scale it down; moviepy always
+        writes 256-color palettes, so colors is ignored. An auto FPS rate (a
+        Fraction of the source rate) keeps every nth frame by index rather than
+        sampling by time.
         
         Raises:
             DownloadError: If conversion fails
         """
         try:
+            # FFmpeg and moviepy are only loaded once a conversion actually runs
+            ffmpeg_utils.configure_ffmpeg()
             from moviepy.video.io.VideoFileClip import VideoFileClip
 
             logging.info("Creating VideoFileClip...")
@@ -306,6 +1471,7 @@ class PlatformDownloader(ABC):
 
             if clip is None:
                 raise ValueError("VideoFileClip returned None")
+            clip = self._edit_moviepy_clip(clip, edit, width)
 
             # Disable moviepy's default logger to prevent tqdm issues in bundled apps
             try:
@@ -318,7 +1484,17 @@ class PlatformDownloader(ABC):
                 logging.warning("Could not import moviepy logger, proceeding without logger management")
 
             try:
-                clip.write_gif(output_file, fps=fps, logger=None)
+                # Report encoder frame progress through progress_callback, if one was given,
+                # and stop between frames if the job is cancelled
+                reporter = ProgressReporter(progress_callback, OUTPUT_FORMAT_GIF)
+                frame_logger = None
+                if isinstance(fps, Fraction):
+                    # Auto FPS: keep exactly every nth source frame, like the FFmpeg-based engines
+                    self._write_moviepy_gif_on_grid(clip, output_file, fps, reporter)
+                else:
+                    if reporter or self.cancel_token is not None:
+                        frame_logger = reporter.frame_logger(self.cancel_token)
+                    clip.write_gif(output_file, fps=float(fps), logger=frame_logger)
                 logging.info(f"write_gif completed at {fps} FPS")
                 return True
             finally:
@@ -329,6 +1505,9 @@ class PlatformDownloader(ABC):
                     except Exception as e:
                         logging.warning(f"Could not restore moviepy logger: {e}")
 
+        except JobCancelledError:
+            logging.info("GIF conversion cancelled")
+            raise
         except Exception as e:
             logging.error(f"GIF conversion error: {e}")
             raise DownloadError(
@@ -347,19 +1526,79 @@ class PlatformDownloader(ABC):
             except Exception as e:
                 logging.warning(f"Error closing clip: {e}")
 
+    def _write_moviepy_gif_on_grid(self, clip, output_file: str, fps: Fraction, reporter: ProgressReporter) -> None:
+        """
+        Write a moviepy clip as a GIF from every nth source frame, where fps is
+        the source rate divided by n. write_gif samples by time instead, and its
+        frame count truncates a duration FFmpeg rounds to 10 ms, which can drop
+        the last frame; here frames are picked by index, as many as FFmpeg's fps
+        filter keeps from the clip's source frames (the rounded duration times
+        the clip's frame rate). Frames are written the way write_gif writes them.
+        """
+        import imageio.v3 as iio
+
+        divisor = max(1, round(clip.fps / fps))
+        # The fps filter snaps each output time to the nearest source frame, so it
+        # keeps a trailing partial group of frames only if it is at least half full
+        total = (2 * round(clip.duration * clip.fps) + divisor) // (2 * divisor)
+        with iio.imopen(output_file, "w", plugin="pillow") as writer:
+            for number in range(total):
+                self._check_cancelled()
+                frame = clip.get_frame(number * divisor / clip.fps)
+                writer.write(frame.astype("uint8", copy=False), duration=1000 / float(fps), loop=0)
+                if reporter:
+                    reporter.emit(ProgressEvent(STAGE_CONVERT, number + 1, total))
+
+    @staticmethod
+    def _edit_moviepy_clip(clip, edit: Optional[ClipEdit], width: Optional[int]):
+        """Trim, crop and scale down a moviepy clip lazily, before frames are decoded."""
+        edit = edit or ClipEdit()
+        # moviepy 2.x renamed subclip/crop/resize to subclipped/cropped/resized
+        if edit.start or edit.end is not None:
+            end = min(edit.end, clip.duration) if edit.end is not None else None
+            clip = clip.subclipped(edit.start, end) if hasattr(clip, "subclipped") else clip.subclip(edit.start, end)
+        if edit.crop:
+            crop_width, crop_height, x, y = edit.crop
+            if hasattr(clip, "cropped"):
+                clip = clip.cropped(x1=x, y1=y, width=crop_width, height=crop_height)
+            else:
+                from moviepy.video.fx.crop import crop
+                clip = crop(clip, x1=x, y1=y, width=crop_width, height=crop_height)
+        if width:
+            edit = ClipEdit(max_width=min(width, edit.max_width or width), max_height=edit.max_height)
+        new_size = edit.output_size(clip.w, clip.h)
+        if new_size != (clip.w, clip.h):
+            if hasattr(clip, "resized"):
+                clip = clip.resized(new_size)
+            else:
+                from moviepy.video.fx.resize import resize
+                clip = resize(clip, newsize=new_size)
+        return clip
+
     def cleanup(self):
-        """Clean up temporary files."""
+        """Clean up temporary files, releasing the job's workspace if it has one."""
+        if self.workspace is not None:
+            self.workspace.release()
+            return
         if os.path.exists(self.temp_file):
             try:
                 os.remove(self.temp_file)
                 logging.info("Temporary file removed")
             except PermissionError:
                 logging.warning("PermissionError removing temp file - file may still be in use")
+        if os.path.exists(self.info_file):
+            try:
+                os.remove(self.info_file)
+            except OSError as e:
+                logging.warning(f"Could not remove info file: {e}")
 
 
 class TwitterDownloader(PlatformDownloader):
     """Downloader for Twitter/X videos."""
 
+    platform_name = "twitter"
+    fallback_id = "tweet_video"
+
     def detect_platform(self, url: str) -> bool:
         return 'twitter.com' in url or 'x.com' in url
 
@@ -368,12 +1607,15 @@ class TwitterDownloader(PlatformDownloader):
 
     def get_id_from_url(self, url: str) -> str:
         match = re.search(r"status/(\d+)", url)
-        return match.group(1) if match else "tweet_video"
+        return match.group(1) if match else self.fallback_id
 
 
 class PinterestDownloader(PlatformDownloader):
     """Downloader for Pinterest videos and GIFs."""
 
+    platform_name = "pinterest"
+    fallback_id = "pinterest_pin"
+
     def detect_platform(self, url: str) -> bool:
         return 'pinterest.com' in url
 
@@ -383,12 +1625,15 @@ class PinterestDownloader(PlatformDownloader):
 
     def get_id_from_url(self, url: str) -> str:
         match = re.search(r"pin/(\d+)/?", url)
-        return match.group(1) if match else "pinterest_pin"
+        return match.group(1) if match else self.fallback_id
 
 
 class InstagramDownloader(PlatformDownloader):
     """Downloader for Instagram videos (posts and reels only)."""
 
+    platform_name = "instagram"
+    fallback_id = "instagram_post"
+
     def detect_platform(self, url: str) -> bool:
         return 'instagram.com' in url
 
@@ -398,15 +1643,18 @@ class InstagramDownloader(PlatformDownloader):
     def get_id_from_url(self, url: str) -> str:
         # Handle both posts (/p/) and reels (/reel/)
         match = re.search(r"(?:p|reel)/([A-Za-z0-9_-]+)", url)
-        return match.group(1) if match else "instagram_post"
+        return match.group(1) if match else self.fallback_id
 
 
-def get_platform_downloader(url: str, temp_file: str) -> Optional[PlatformDownloader]:
-    """Factory function to get the appropriate downloader for a URL."""
+def get_platform_downloader(url: str, temp_file: str, **kwargs) -> Optional[PlatformDownloader]:
+    """
+    Factory function to get the appropriate downloader for a URL.
+    Extra keyword arguments (e.g. engine) are passed to the downloader.
+    """
     downloaders = [
-        TwitterDownloader(temp_file=temp_file),
-        PinterestDownloader(temp_file=temp_file),
-        InstagramDownloader(temp_file=temp_file)
+        TwitterDownloader(temp_file=temp_file, **kwargs),
+        PinterestDownloader(temp_file=temp_file, **kwargs),
+        InstagramDownloader(temp_file=temp_file, **kwargs)
     ]
 
     for downloader in downloaders:
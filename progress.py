@@ -0,0 +1,232 @@
+"""
+Progress reporting for Social Media GIF Downloader.
+Turns yt-dlp's download progress and the GIF encoder's frame counter into
+ProgressEvent objects delivered through a job's progress_callback.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional, Dict, Any, Iterator
+
+from cancellation import CancelToken
+
+
+STAGE_DOWNLOAD = "download"
+STAGE_CONVERT = "convert"
+
+# Machine-readable progress lines for the yt-dlp executable (used with --newline)
+PROGRESS_PREFIX = "[smgd-progress]"
+YTDLP_PROGRESS_TEMPLATE = (
+    "download:" + PROGRESS_PREFIX + " %(progress.downloaded_bytes)s %(progress.total_bytes)s "
+    "%(progress.total_bytes_estimate)s %(progress.speed)s %(progress.eta)s"
+)
+
+# Seconds of silence after which ProgressReporter.heartbeat repeats the last event
+HEARTBEAT_INTERVAL = 1.0
+
+# How format_progress names each output format while converting
+FORMAT_LABELS = {"gif": "GIF", "webp": "WebP", "loop_mp4": "looping MP4", "mp4": "MP4"}
+
+
+class ProgressEvent:
+    """A single progress update for a download or conversion."""
+
+    def __init__(self, stage: str, done: float = 0, total: Optional[float] = None,
+                 speed: Optional[float] = None, eta: Optional[float] = None,
+                 stalled_for: float = 0.0, output_format: Optional[str] = None):
+        self.stage = stage
+        # Bytes for the download stage, frames for the convert stage
+        self.done = done
+        self.total = total
+        # Bytes per second while downloading
+        self.speed = speed
+        # Seconds remaining, when known
+        self.eta = eta
+        # Seconds since the last forward progress in this stage
+        self.stalled_for = stalled_for
+        # Output format being encoded (convert stage), e.g. "gif" or "webp"
+        self.output_format = output_format
+        self.timestamp = time.time()
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Completed fraction of this stage (0-1), or None if the total is unknown."""
+        if not self.total:
+            return None
+        return max(0.0, min(1.0, self.done / self.total))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "stage": self.stage,
+            "done": self.done,
+            "total": self.total,
+            "fraction": self.fraction,
+            "speed": self.speed,
+            "eta": self.eta,
+            "stalled_for": round(self.stalled_for, 3),
+            "output_format": self.output_format,
+        }
+
+    def __repr__(self) -> str:
+        return f"ProgressEvent({self.to_dict()!r})"
+
+
+def _parse_number(value: str) -> Optional[float]:
+    """Parse a number from yt-dlp output, treating 'NA'/'None' as unknown."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_ytdlp_progress_line(line: str) -> Optional[ProgressEvent]:
+    """Parse a line printed with YTDLP_PROGRESS_TEMPLATE. Returns None for any other line."""
+    line = line.strip()
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    fields = line[len(PROGRESS_PREFIX):].split()
+    if len(fields) != 5:
+        return None
+    downloaded, total, estimate, speed, eta = (_parse_number(field) for field in fields)
+    if downloaded is None:
+        return None
+    return ProgressEvent(STAGE_DOWNLOAD, downloaded, total or estimate, speed, eta)
+
+
+def event_from_ytdlp_hook(status: Dict[str, Any]) -> Optional[ProgressEvent]:
+    """Build an event from a yt-dlp progress hook dict (in-process engine)."""
+    if status.get("status") not in ("downloading", "finished"):
+        return None
+    downloaded = status.get("downloaded_bytes")
+    if downloaded is None:
+        return None
+    total = status.get("total_bytes") or status.get("total_bytes_estimate")
+    return ProgressEvent(STAGE_DOWNLOAD, downloaded, total, status.get("speed"), status.get("eta"))
+
+
+class ProgressReporter:
+    """
+    Forwards progress events to a callback, filling in how long the current
+    stage has gone without moving forward so callers can spot stalls, and
+    tagging convert events with the output_format being encoded.
+    """
+
+    def __init__(self, callback: Optional[Callable[[ProgressEvent], None]], output_format: Optional[str] = None):
+        self.callback = callback
+        self.output_format = output_format
+        self._lock = threading.Lock()
+        self._stage: Optional[str] = None
+        self._last_done = -1.0
+        self._last_advance = time.monotonic()
+        self._last_event: Optional[ProgressEvent] = None
+        self._last_emit = self._last_advance
+
+    def __bool__(self) -> bool:
+        return self.callback is not None
+
+    def emit(self, event: ProgressEvent) -> None:
+        if self.callback is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if event.stage != self._stage or event.done > self._last_done:
+                self._stage = event.stage
+                self._last_done = event.done
+                self._last_advance = now
+            event.stalled_for = now - self._last_advance
+            self._last_event = event
+            self._last_emit = now
+        if event.stage == STAGE_CONVERT and event.output_format is None:
+            event.output_format = self.output_format
+        try:
+            self.callback(event)
+        except Exception as e:
+            logging.warning(f"Progress callback failed: {e}")
+
+    @contextmanager
+    def heartbeat(self, stage: str, interval: Optional[float] = None) -> Iterator[None]:
+        """
+        While the block runs, repeat the last event every interval seconds that
+        nothing new is emitted, so a stalled stage keeps reporting a growing
+        stalled_for instead of going silent. Before the first event, the stage
+        is reported at zero progress from when the block started. interval
+        defaults to HEARTBEAT_INTERVAL.
+        """
+        if self.callback is None:
+            yield
+            return
+        interval = HEARTBEAT_INTERVAL if interval is None else interval
+        with self._lock:
+            if self._last_event is None or self._last_event.stage != stage:
+                self._stage, self._last_done = stage, 0
+                self._last_advance = self._last_emit = time.monotonic()
+                self._last_event = ProgressEvent(stage)
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(interval):
+                with self._lock:
+                    last = self._last_event
+                    due = time.monotonic() - self._last_emit >= interval
+                if due:
+                    # A stalled stage moves at no known speed, so speed and ETA are left out
+                    self.emit(ProgressEvent(last.stage, last.done, last.total, output_format=last.output_format))
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def frame_logger(self, cancel_token: Optional[CancelToken] = None) -> Any:
+        """
+        A proglog logger that reports moviepy's frame counter as convert events.
+        With a cancel_token, it also aborts the encode between frames once cancelled.
+        """
+        import proglog
+
+        reporter = self
+
+        class _FrameLogger(proglog.ProgressBarLogger):
+            def bars_callback(self, bar, attr, value, old_value=None):
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                if attr == "index":
+                    total = self.bars[bar].get("total")
+                    # index is 0-based while frames are encoded; proglog bumps it to total at the end
+                    done = min(value + 1, total) if total else value + 1
+                    reporter.emit(ProgressEvent(STAGE_CONVERT, done, total))
+
+        return _FrameLogger()
+
+
+def _format_bytes(num_bytes: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GB"
+
+
+def format_progress(event: ProgressEvent) -> str:
+    """Human-readable one-line summary of an event for status displays."""
+    if event.stage == STAGE_CONVERT:
+        label = FORMAT_LABELS.get(event.output_format or "gif", str(event.output_format).upper())
+        text = f"Converting to {label}... frame {int(event.done)}"
+        if event.total:
+            text += f" of {int(event.total)}"
+    else:
+        text = f"Downloading... {_format_bytes(event.done)}"
+        if event.total:
+            text += f" of {_format_bytes(event.total)}"
+        if event.speed:
+            text += f" at {_format_bytes(event.speed)}/s"
+        if event.eta is not None:
+            text += f", {int(event.eta)}s left"
+    if event.stalled_for >= 10:
+        text += f" (no progress for {int(event.stalled_for)}s)"
+    return text
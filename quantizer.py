@@ -0,0 +1,238 @@
+"""
+NumPy color quantizer for Social Media GIF Downloader.
+Builds one global palette from a sample of frames with a weighted median cut
+over a 5-bit RGB histogram, then maps pixels through a precomputed lookup
+table instead of searching for the nearest color per pixel. Ordered (Bayer)
+and Floyd-Steinberg dithering are vectorized across the frame.
+"""
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+DITHER_NONE = "none"
+DITHER_ORDERED = "ordered"
+DITHER_FLOYD_STEINBERG = "floyd_steinberg"
+DITHER_MODES = (DITHER_NONE, DITHER_ORDERED, DITHER_FLOYD_STEINBERG)
+
+# Frames sampled across the clip to build the palette
+PALETTE_SAMPLE_FRAMES = 32
+
+# Histogram and lookup table resolution: 5 bits per channel, 32768 cells
+LUT_BITS = 5
+_SHIFT = 8 - LUT_BITS
+_LEVELS = 1 << LUT_BITS
+
+# Upper bound on the ordered dither amplitude, so sparse palettes aren't drowned in noise
+_MAX_ORDERED_SPREAD = 32.0
+
+# Rows of the LUT computed at once; bounds the distance matrix to a few MB
+_LUT_CHUNK = 4096
+
+_BAYER_8 = np.array([
+    [0, 32, 8, 40, 2, 34, 10, 42],
+    [48, 16, 56, 24, 50, 18, 58, 26],
+    [12, 44, 4, 36, 14, 46, 6, 38],
+    [60, 28, 52, 20, 62, 30, 54, 22],
+    [3, 35, 11, 43, 1, 33, 9, 41],
+    [51, 19, 59, 27, 49, 17, 57, 25],
+    [15, 47, 7, 39, 13, 45, 5, 37],
+    [63, 31, 55, 23, 61, 29, 53, 21],
+], dtype=np.float32)
+
+
+def _cell_index(pixels: np.ndarray) -> np.ndarray:
+    """Histogram/LUT cell of each RGB pixel with values 0-255 (last axis = channels)."""
+    # 15-bit cell numbers fit in uint16, which halves the memory traffic of intp
+    cells = (pixels >> _SHIFT).astype(np.uint16)
+    return (cells[..., 0] << (2 * LUT_BITS)) | (cells[..., 1] << LUT_BITS) | cells[..., 2]
+
+
+def _cell_centers() -> np.ndarray:
+    """RGB center of every LUT cell, in cell-index order."""
+    levels = (np.arange(_LEVELS, dtype=np.float32) + 0.5) * (1 << _SHIFT)
+    r, g, b = np.meshgrid(levels, levels, levels, indexing="ij")
+    return np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+
+
+def _median_cut(colors: np.ndarray, weights: np.ndarray, max_colors: int) -> np.ndarray:
+    """
+    Weighted median cut. colors are the mean colors of occupied histogram cells
+    and weights their pixel counts. Returns up to max_colors palette entries.
+    """
+    def split_score(members: np.ndarray) -> Tuple[float, int]:
+        """Weighted spread along the widest channel, and that channel."""
+        if len(members) < 2:
+            return 0.0, 0
+        box_colors = colors[members]
+        spread = box_colors.max(axis=0) - box_colors.min(axis=0)
+        axis = int(spread.argmax())
+        return float(spread[axis]) * float(weights[members].sum()), axis
+
+    boxes = [np.arange(len(colors))]
+    scores = [split_score(boxes[0])]
+    while len(boxes) < max_colors:
+        # Split the box with the largest weighted spread
+        best = max(range(len(boxes)), key=lambda i: scores[i][0])
+        score, axis = scores[best]
+        if score <= 0:
+            break
+
+        members = boxes.pop(best)
+        scores.pop(best)
+        order = members[np.argsort(colors[members, axis], kind="stable")]
+        cumulative = np.cumsum(weights[order])
+        split = int(np.searchsorted(cumulative, cumulative[-1] / 2))
+        split = min(max(split, 1), len(order) - 1)
+        for half in (order[:split], order[split:]):
+            boxes.append(half)
+            scores.append(split_score(half))
+
+    palette = np.empty((len(boxes), 3), dtype=np.float64)
+    for i, members in enumerate(boxes):
+        palette[i] = np.average(colors[members], axis=0, weights=weights[members])
+    return np.clip(np.rint(palette), 0, 255).astype(np.uint8)
+
+
+def build_lut(palette: np.ndarray) -> np.ndarray:
+    """Nearest palette index for every 5-bit RGB cell."""
+    centers = _cell_centers()
+    colors = palette.astype(np.float32)
+    lut = np.empty(len(centers), dtype=np.uint8)
+    for start in range(0, len(centers), _LUT_CHUNK):
+        chunk = centers[start:start + _LUT_CHUNK]
+        distances = ((chunk[:, None, :] - colors[None, :, :]) ** 2).sum(axis=2)
+        lut[start:start + _LUT_CHUNK] = distances.argmin(axis=1)
+    return lut
+
+
+class Quantizer:
+    """
+    A fixed palette plus its lookup table. Build one per clip with from_frames
+    and reuse it for every frame, so all frames share one GIF color table.
+    """
+
+    def __init__(self, palette: np.ndarray):
+        palette = np.asarray(palette, dtype=np.uint8).reshape(-1, 3)
+        if not 1 <= len(palette) <= 256:
+            raise ValueError(f"A GIF palette holds 1-256 colors, got {len(palette)}")
+        self.palette = palette
+        self.lut = build_lut(palette)
+        self._ordered_spread = self._palette_spacing()
+        self._ordered_offsets: Dict[Tuple[int, int], np.ndarray] = {}
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[np.ndarray], colors: int = 256) -> "Quantizer":
+        """Build a palette of up to colors entries from (height, width, 3) uint8 frames."""
+        cells = _LEVELS ** 3
+        counts = np.zeros(cells, dtype=np.float64)
+        sums = np.zeros((cells, 3), dtype=np.float64)
+        for frame in frames:
+            pixels = np.asarray(frame, dtype=np.uint8).reshape(-1, 3)
+            index = _cell_index(pixels)
+            counts += np.bincount(index, minlength=cells)
+            for channel in range(3):
+                sums[:, channel] += np.bincount(index, weights=pixels[:, channel], minlength=cells)
+
+        occupied = np.flatnonzero(counts)
+        if len(occupied) == 0:
+            raise ValueError("Cannot build a palette without any frames")
+        weights = counts[occupied]
+        mean_colors = sums[occupied] / weights[:, None]
+        return cls(_median_cut(mean_colors, weights, colors))
+
+    def _palette_spacing(self) -> float:
+        """Typical distance between neighbouring palette colors; sets the ordered dither strength."""
+        if len(self.palette) < 2:
+            return 0.0
+        colors = self.palette.astype(np.float32)
+        distances = np.sqrt(((colors[:, None, :] - colors[None, :, :]) ** 2).sum(axis=2))
+        np.fill_diagonal(distances, np.inf)
+        return min(float(np.median(distances.min(axis=1))), _MAX_ORDERED_SPREAD)
+
+    @property
+    def transparent_index(self) -> Optional[int]:
+        """First palette slot no color uses (free for transparency), or None if the palette is full."""
+        return len(self.palette) if len(self.palette) < 256 else None
+
+    @property
+    def palette_bytes(self) -> bytes:
+        """Palette as a 256-entry RGB table."""
+        return self.palette.tobytes().ljust(768, b"\x00")
+
+    def quantize(self, frame: np.ndarray, dither: Optional[str] = DITHER_ORDERED) -> np.ndarray:
+        """Map a (height, width, 3) uint8 frame to a (height, width) array of palette indices."""
+        frame = np.asarray(frame, dtype=np.uint8)
+        if dither is None:
+            dither = DITHER_ORDERED
+        if dither == DITHER_NONE:
+            return np.take(self.lut, _cell_index(frame))
+        if dither == DITHER_ORDERED:
+            return self._quantize_ordered(frame)
+        if dither == DITHER_FLOYD_STEINBERG:
+            return self._quantize_floyd_steinberg(frame)
+        raise ValueError(f"Unknown dither mode: {dither}")
+
+    def _quantize_ordered(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        offset = self._ordered_offsets.get((height, width))
+        if offset is None:
+            # Frames of a clip share one size, so the tiled threshold map is built once
+            threshold = np.tile(_BAYER_8, ((height + 7) // 8, (width + 7) // 8))[:height, :width]
+            offset = np.rint((threshold / 64.0 - 0.5) * self._ordered_spread).astype(np.int16)[:, :, None]
+            self._ordered_offsets[(height, width)] = offset
+        shifted = frame.astype(np.int16)
+        shifted += offset
+        np.clip(shifted, 0, 255, out=shifted)
+        return np.take(self.lut, _cell_index(shifted))
+
+    def _quantize_floyd_steinberg(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Error diffusion processed in wavefronts: pixel (y, x) only depends on
+        pixels with a smaller x + 2y, so every pixel on one wavefront is
+        quantized in a single vectorized step.
+        """
+        height, width = frame.shape[:2]
+        # One spare row below and a spare column on each side absorb edge error
+        work = np.zeros((height + 1, width + 2, 3), dtype=np.float32)
+        work[:height, 1:width + 1] = frame
+        palette = self.palette.astype(np.float32)
+        indices = np.empty((height, width), dtype=np.uint8)
+
+        for t in range(width + 2 * (height - 1)):
+            y_min = max(0, (t - width + 2) // 2)
+            y_max = min(height - 1, t // 2)
+            ys = np.arange(y_min, y_max + 1)
+            xs = t - 2 * ys
+            cols = xs + 1
+
+            pixels = np.clip(work[ys, cols], 0, 255)
+            chosen = self.lut[_cell_index(pixels.astype(np.uint8))]
+            indices[ys, xs] = chosen
+            error = pixels - palette[chosen]
+
+            # Targets can coincide across neighbours on one wavefront, so each
+            # neighbour gets its own (duplicate-free) update
+            work[ys, cols + 1] += error * (7 / 16)
+            work[ys + 1, cols - 1] += error * (3 / 16)
+            work[ys + 1, cols] += error * (5 / 16)
+            work[ys + 1, cols + 1] += error * (1 / 16)
+        return indices
+
+    def to_indices(self, frame: bytes, size: Tuple[int, int], dither: Optional[str] = DITHER_ORDERED) -> np.ndarray:
+        """Quantize a packed RGB24 frame into a (height, width) array of palette indices."""
+        width, height = size
+        pixels = np.frombuffer(frame, dtype=np.uint8).reshape(height, width, 3)
+        return self.quantize(pixels, dither)
+
+    def indices_image(self, indices: np.ndarray) -> Image.Image:
+        """Wrap palette indices in a palette image using this palette."""
+        image = Image.fromarray(np.ascontiguousarray(indices, dtype=np.uint8))
+        image.putpalette(self.palette_bytes)
+        return image
+
+    def to_image(self, frame: bytes, size: Tuple[int, int], dither: Optional[str] = DITHER_ORDERED) -> Image.Image:
+        """Quantize a packed RGB24 frame into a palette image using this palette."""
+        return self.indices_image(self.to_indices(frame, size, dither))
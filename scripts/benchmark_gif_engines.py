@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Side-by-side benchmark of the GIF conversion engines.
+
+Generates synthetic clips with FFmpeg's test sources (including one with a
+static background and a small moving region, and a slideshow), converts each one with every
+engine in a fresh process, and reports wall time, peak RSS (including the
+FFmpeg child) and output size.
+
+Usage:
+    python scripts/benchmark_gif_engines.py [--fps 15] [--gif-workers N] [--no-gif-delta]
+                                            [--duplicate-threshold T] [--keep DIR]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+# (name, FFmpeg filter graph producing the clip)
+CLIPS = [
+    ("small_480p_5s", "testsrc2=size=854x480:rate=30:duration=5"),
+    ("hd_720p_10s", "testsrc2=size=1280x720:rate=30:duration=10"),
+    # Mostly static: a small moving test pattern over still colour bars
+    ("static_720p_10s", "smptehdbars=size=1280x720:rate=30:duration=10[bg];"
+                        "testsrc2=size=320x180:rate=30:duration=10[fg];"
+                        "[bg][fg]overlay=x='mod(t*96,960)':y=270"),
+    # Slideshow: one new picture per second, repeated at 30 fps
+    ("slides_720p_10s", "testsrc2=size=1280x720:rate=1:duration=10,fps=30"),
+]
+ENGINES = ["moviepy", "ffmpeg", "stream", "numpy"]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak RSS of this process and of its largest waited-for child, in MB."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return max(own, children) / divisor
+
+
+def make_clip(ffmpeg_exe: str, path: str, graph: str) -> None:
+    """Render a synthetic H.264 clip from an FFmpeg source filter graph."""
+    subprocess.run(
+        [ffmpeg_exe, "-hide_banner", "-loglevel", "error", "-y",
+         "-filter_complex", graph,
+         "-c:v", "libx264", "-pix_fmt", "yuv420p", path],
+        check=True
+    )
+
+
+def run_worker(engine: str, input_file: str, output_file: str, fps: int, options: Dict) -> None:
+    """Convert one clip in this process and print the measurements as JSON."""
+    import logging
+    logging.disable(logging.CRITICAL)
+    from platforms import TwitterDownloader
+
+    downloader = TwitterDownloader(gif_engine=engine, **options)
+    start = time.perf_counter()
+    downloader.convert_to_gif(input_file, output_file, fps=fps)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "wall_s": elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "bytes": os.path.getsize(output_file),
+        "engine_used": downloader.job_stats.get("gif_engine"),
+        "frames_dropped": downloader.job_stats.get("frames_dropped", 0),
+    }))
+
+
+def benchmark(fps: int, work_dir: str, options: Dict) -> List[Dict]:
+    """Run every engine on every clip; options are extra downloader keyword arguments."""
+    import ffmpeg_utils
+    ffmpeg_exe = ffmpeg_utils.get_ffmpeg_exe()
+
+    rows = []
+    for name, graph in CLIPS:
+        clip = os.path.join(work_dir, f"{name}.mp4")
+        make_clip(ffmpeg_exe, clip, graph)
+        for engine in ENGINES:
+            output = os.path.join(work_dir, f"{name}_{engine}.gif")
+            result = subprocess.run(
+                [sys.executable, __file__, "--worker", engine, clip, output, str(fps), json.dumps(options)],
+                capture_output=True, text=True, cwd=str(REPO_ROOT)
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"{engine} failed on {name}: {result.stderr[-500:]}")
+            row = json.loads(result.stdout.strip().splitlines()[-1])
+            row.update({"clip": name, "engine": engine})
+            rows.append(row)
+    return rows
+
+
+def print_table(rows: List[Dict]) -> None:
+    print(f"{'clip':<16} {'engine':<8} {'wall (s)':>9} {'peak RSS (MB)':>14} {'size (KB)':>10} {'dropped':>8}")
+    for row in rows:
+        rss = f"{row['peak_rss_mb']:.0f}" if row["peak_rss_mb"] is not None else "n/a"
+        print(f"{row['clip']:<16} {row['engine']:<8} {row['wall_s']:>9.2f} {rss:>14} {row['bytes'] / 1024:>10.0f} {row['frames_dropped']:>8}")
+
+
+def main() -> int:
+    if len(sys.argv) == 7 and sys.argv[1] == "--worker":
+        run_worker(sys.argv[2], sys.argv[3], sys.argv[4], int(sys.argv[5]), json.loads(sys.argv[6]))
+        return 0
+
+    parser = argparse.ArgumentParser(description="Benchmark GIF conversion engines on synthetic clips")
+    parser.add_argument("--fps", type=int, default=15, help="GIF frame rate (default: 15)")
+    parser.add_argument("--gif-workers", type=int, default=0,
+                        help="Processes for the numpy engine, 0 for one per core (default: 0)")
+    parser.add_argument("--no-gif-delta", action="store_true",
+                        help="Write full frames with the numpy engine instead of changed regions")
+    parser.add_argument("--duplicate-threshold", type=float, default=2.0,
+                        help="Near-duplicate merge threshold for the stream and numpy engines, 0 = off (default: 2.0)")
+    parser.add_argument("--keep", help="Write clips and GIFs to this directory instead of a temp dir")
+    args = parser.parse_args()
+    options = {
+        "gif_workers": args.gif_workers,
+        "gif_delta": not args.no_gif_delta,
+        "gif_duplicate_threshold": args.duplicate_threshold,
+    }
+
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        print_table(benchmark(args.fps, args.keep, options))
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            print_table(benchmark(args.fps, work_dir, options))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
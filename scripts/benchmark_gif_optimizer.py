@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the lossless GIF optimizer.
+
+Builds a corpus of GIFs from the synthetic clips of benchmark_gif_engines.py
+(plus a flat-color animation) with several engines, optimizes each one, and
+reports bytes saved, frames merged and time spent. Every optimized GIF is
+checked to render exactly the same frames as the original.
+
+Usage:
+    python scripts/benchmark_gif_optimizer.py [--fps 15] [--engines ffmpeg,stream,numpy] [--keep DIR]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from benchmark_gif_engines import CLIPS, make_clip  # noqa: E402
+
+# Few colors and long still stretches: a box sliding over a flat background
+CORPUS_CLIPS = CLIPS + [
+    ("flat_480p_5s", "color=c=white:size=854x480:rate=30:duration=5,"
+                     "drawbox=x='mod(t*150,774)':y=200:w=80:h=80:color=red:t=fill"),
+]
+
+
+def rendered_frames(path: str) -> List[List]:
+    """The frames a GIF shows as [RGBA bytes, duration], with consecutive identical frames combined."""
+    import numpy as np
+    from PIL import Image, ImageSequence
+
+    frames: List[List] = []
+    with Image.open(path) as image:
+        for frame in ImageSequence.Iterator(image):
+            rgba = np.array(frame.convert("RGBA"))
+            # Fully transparent pixels look the same whatever their color
+            rgba[rgba[..., 3] == 0] = 0
+            pixels = rgba.tobytes()
+            duration = frame.info.get("duration", 0)
+            if frames and frames[-1][0] == pixels:
+                frames[-1][1] += duration
+            else:
+                frames.append([pixels, duration])
+    return frames
+
+
+def benchmark(fps: int, engines: List[str], work_dir: str) -> List[Dict]:
+    """Encode every clip with every engine, then optimize and verify each GIF."""
+    import ffmpeg_utils
+    import gif_optimizer
+    from platforms import TwitterDownloader
+    ffmpeg_exe = ffmpeg_utils.get_ffmpeg_exe()
+
+    rows = []
+    for name, graph in CORPUS_CLIPS:
+        clip = os.path.join(work_dir, f"{name}.mp4")
+        make_clip(ffmpeg_exe, clip, graph)
+        for engine in engines:
+            original = os.path.join(work_dir, f"{name}_{engine}.gif")
+            optimized = os.path.join(work_dir, f"{name}_{engine}.optimized.gif")
+            TwitterDownloader(gif_engine=engine).convert_to_gif(clip, original, fps=fps)
+            result = gif_optimizer.optimize_gif(original, optimized)
+            row = result.to_dict()
+            row.update({"clip": name, "engine": engine,
+                        "lossless": rendered_frames(original) == rendered_frames(optimized)})
+            rows.append(row)
+    return rows
+
+
+def print_table(rows: List[Dict]) -> None:
+    print(f"{'clip':<16} {'engine':<8} {'input (KB)':>11} {'output (KB)':>12} {'saved':>7} {'merged':>7} "
+          f"{'time (s)':>9} {'lossless':>9}")
+    for row in rows:
+        saved = row["saved_bytes"] / row["input_bytes"]
+        print(f"{row['clip']:<16} {row['engine']:<8} {row['input_bytes'] / 1024:>11.0f} "
+              f"{row['output_bytes'] / 1024:>12.0f} {saved:>7.1%} {row['frames_merged']:>7} "
+              f"{row['seconds']:>9.2f} {'yes' if row['lossless'] else 'NO':>9}")
+    total_in = sum(row["input_bytes"] for row in rows)
+    total_out = sum(row["output_bytes"] for row in rows)
+    print(f"total: {total_in / 1024:.0f} KB -> {total_out / 1024:.0f} KB "
+          f"({(total_in - total_out) / total_in:.1%} saved) in {sum(row['seconds'] for row in rows):.2f} s")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the lossless GIF optimizer on generated GIFs")
+    parser.add_argument("--fps", type=int, default=15, help="GIF frame rate (default: 15)")
+    parser.add_argument("--engines", default="ffmpeg,stream,numpy",
+                        help="Comma-separated GIF engines that build the corpus (default: ffmpeg,stream,numpy)")
+    parser.add_argument("--keep", help="Write clips and GIFs to this directory instead of a temp dir")
+    args = parser.parse_args()
+    engines = [engine.strip() for engine in args.engines.split(",") if engine.strip()]
+    logging.disable(logging.CRITICAL)
+
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        print_table(benchmark(args.fps, engines, args.keep))
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            print_table(benchmark(args.fps, engines, work_dir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the animated output formats against GIF.
+
+Converts the synthetic clips from benchmark_gif_engines.py to a GIF (with
+the FFmpeg engine), an animated WebP and a looping MP4 at the same frame
+rate, and reports encode wall time and output size.
+
+Usage:
+    python scripts/benchmark_output_formats.py [--fps 15] [--keep DIR]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from benchmark_gif_engines import CLIPS, make_clip  # noqa: E402
+
+FORMATS = ["gif", "webp", "loop_mp4"]
+
+
+def convert(input_file: str, output_file: str, output_format: str, fps: int) -> float:
+    """Convert one clip and return the wall time in seconds."""
+    from platforms import TwitterDownloader, GIF_ENGINE_FFMPEG
+
+    downloader = TwitterDownloader(gif_engine=GIF_ENGINE_FFMPEG)
+    start = time.perf_counter()
+    if output_format == "gif":
+        downloader.convert_to_gif(input_file, output_file, fps=fps)
+    else:
+        downloader.convert_animation(input_file, output_file, output_format, fps=fps)
+    return time.perf_counter() - start
+
+
+def benchmark(fps: int, work_dir: str) -> List[Dict]:
+    """Convert every clip to every format."""
+    import ffmpeg_utils
+    from platforms import OUTPUT_EXTENSIONS
+    ffmpeg_exe = ffmpeg_utils.get_ffmpeg_exe()
+
+    rows = []
+    for name, graph in CLIPS:
+        clip = os.path.join(work_dir, f"{name}.mp4")
+        make_clip(ffmpeg_exe, clip, graph)
+        gif_bytes = None
+        for output_format in FORMATS:
+            output = os.path.join(work_dir, f"{name}_{output_format}{OUTPUT_EXTENSIONS[output_format]}")
+            elapsed = convert(clip, output, output_format, fps)
+            size = os.path.getsize(output)
+            gif_bytes = gif_bytes or size
+            rows.append({"clip": name, "format": output_format, "wall_s": elapsed, "bytes": size,
+                         "vs_gif": size / gif_bytes})
+    return rows
+
+
+def print_table(rows: List[Dict]) -> None:
+    print(f"{'clip':<16} {'format':<9} {'wall (s)':>9} {'size (KB)':>10} {'vs GIF':>7}")
+    for row in rows:
+        print(f"{row['clip']:<16} {row['format']:<9} {row['wall_s']:>9.2f} {row['bytes'] / 1024:>10.0f} "
+              f"{row['vs_gif']:>6.0%}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark GIF, animated WebP and looping MP4 output")
+    parser.add_argument("--fps", type=int, default=15, help="Output frame rate (default: 15)")
+    parser.add_argument("--keep", help="Write clips and outputs to this directory instead of a temp dir")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        print_table(benchmark(args.fps, args.keep))
+    else:
+        with tempfile.TemporaryDirectory() as work_dir:
+            print_table(benchmark(args.fps, work_dir))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
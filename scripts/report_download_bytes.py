@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Report of bytes downloaded per job with and without the download format policy.
+
+For each URL (or info JSON saved with `yt-dlp --dump-json`), compares the
+formats the platform's default selection downloads with the rendition the
+format policy picks for the requested output, using yt-dlp's own format
+selector and the sizes in the formats list. With --download, every job is
+also run for real both ways and the bytes actually downloaded are reported.
+
+Usage:
+    python scripts/report_download_bytes.py URL_OR_INFO_JSON... [-f gif] [--fps 15]
+        [--max-width 480] [--max-height 0] [--max-bytes 0] [--download]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+
+def selected_bytes(info: Dict[str, Any], spec: Optional[str]) -> Optional[int]:
+    """Estimated bytes of the formats yt-dlp selects from info's formats list for spec."""
+    import yt_dlp
+    import format_policy
+
+    formats = info.get('formats') or []
+    selector = yt_dlp.YoutubeDL({'quiet': True}).build_format_selector(spec or 'bestvideo*+bestaudio/best')
+    chosen = next(iter(selector({
+        'formats': formats,
+        'has_merged_format': any('none' not in (f.get('acodec'), f.get('vcodec')) for f in formats),
+        'incomplete_formats': (all(f.get('vcodec') == 'none' for f in formats)
+                               or all(f.get('acodec') == 'none' for f in formats)),
+    })), None)
+    if chosen is None:
+        return None
+    sizes = [format_policy.estimated_bytes(part, info.get('duration'))
+             for part in chosen.get('requested_formats') or [chosen]]
+    return None if None in sizes else sum(sizes)
+
+
+def load_job(source: str, options: Dict[str, Any]):
+    """A downloader holding the extracted info for a URL or saved info JSON, and the job's URL."""
+    from platforms import get_platform_downloader, TwitterDownloader
+
+    if os.path.isfile(source):
+        with open(source, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        url = info.get('webpage_url') or source
+        downloader = get_platform_downloader(url, "", **options) or TwitterDownloader(**options)
+        downloader.video_info, downloader._video_info_url = info, url
+        return downloader, url
+    downloader = get_platform_downloader(source, "", **options)
+    if downloader is None:
+        raise ValueError(f"Unsupported platform: {source}")
+    downloader.get_video_info(source)
+    return downloader, source
+
+
+def report(sources: List[str], output_format: str, fps: int, max_bytes: Optional[int], edit,
+           download: bool) -> List[Dict]:
+    """Compare the default and policy selections (and downloads) for every source."""
+    from platforms import OUTPUT_EXTENSIONS
+
+    rows = []
+    for source in sources:
+        downloader, url = load_job(source, {})
+        info = downloader.video_info or {}
+        legacy_spec = downloader.get_download_formats()
+        policy_spec = downloader.select_download_formats(url, output_format, fps, max_bytes, edit)
+        row = {"source": source, "rendition": downloader.job_stats.get("download_format"),
+               "default_estimate": selected_bytes(info, legacy_spec),
+               "policy_estimate": selected_bytes(info, policy_spec)}
+        if download:
+            for key, enabled in (("default_downloaded", False), ("policy_downloaded", True)):
+                with tempfile.TemporaryDirectory() as work_dir:
+                    job, url = load_job(source, {"use_format_policy": enabled,
+                                                 "temp_file": os.path.join(work_dir, "temp_video.mp4")})
+                    output = os.path.join(work_dir, "out" + OUTPUT_EXTENSIONS[output_format])
+                    job.download_media(url, output, fps=fps, max_bytes=max_bytes, edit=edit,
+                                       output_format=output_format)
+                    row[key] = job.job_stats.get("downloaded_bytes")
+                    job.cleanup()
+        rows.append(row)
+    return rows
+
+
+def _kb(value: Optional[int]) -> str:
+    return "?" if value is None else f"{value / 1024:.0f}"
+
+
+def print_table(rows: List[Dict], download: bool) -> None:
+    columns = ["default est (KB)", "policy est (KB)"] + (["default dl (KB)", "policy dl (KB)"] if download else [])
+    print(f"{'source':<48} {'rendition':<20} " + " ".join(f"{column:>16}" for column in columns))
+    totals = {"default": 0, "policy": 0}
+    for row in rows:
+        rendition = row["rendition"]
+        label = f"{rendition['format_id']} {rendition['width']}x{rendition['height']}" if rendition else "video only"
+        values = [row["default_estimate"], row["policy_estimate"]]
+        if download:
+            values += [row["default_downloaded"], row["policy_downloaded"]]
+        print(f"{row['source'][-48:]:<48} {label[:20]:<20} " + " ".join(f"{_kb(value):>16}" for value in values))
+        default, policy = values[-2], values[-1]
+        if default and policy:
+            totals["default"] += default
+            totals["policy"] += policy
+    if totals["default"]:
+        saved = 1 - totals["policy"] / totals["default"]
+        print(f"total: {_kb(totals['default'])} KB -> {_kb(totals['policy'])} KB ({saved:.1%} saved)")
+
+
+def main() -> int:
+    from ffmpeg_encoder import ClipEdit
+    from platforms import OUTPUT_EXTENSIONS
+
+    parser = argparse.ArgumentParser(description="Report bytes downloaded with and without the format policy")
+    parser.add_argument("sources", nargs="+", help="Post URLs or info JSON files saved with yt-dlp --dump-json")
+    parser.add_argument("-f", "--format", choices=[key for key in OUTPUT_EXTENSIONS if key != "mp4"], default="gif",
+                        help="Output format (default: gif)")
+    parser.add_argument("--fps", type=int, default=15, help="Output frame rate (default: 15)")
+    parser.add_argument("--max-width", type=int, default=0, help="Maximum output width, 0 = no limit")
+    parser.add_argument("--max-height", type=int, default=0, help="Maximum output height, 0 = no limit")
+    parser.add_argument("--max-bytes", type=int, default=0, help="GIF size target, 0 = no limit")
+    parser.add_argument("--download", action="store_true",
+                        help="Also run every job both ways and report the bytes actually downloaded")
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    edit = ClipEdit(max_width=args.max_width or None, max_height=args.max_height or None)
+    rows = report(args.sources, args.format, args.fps, args.max_bytes or None, edit, args.download)
+    print_table(rows, args.download)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
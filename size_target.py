@@ -0,0 +1,160 @@
+"""
+Target-size GIF encoding for Social Media GIF Downloader.
+Finds the highest-quality fps, width and palette size whose GIF fits a byte
+budget. A few short segments are cut from the clip into a small lossless
+sample, candidate settings are encoded on the sample only, and their sizes
+are scaled up to the full clip length. A binary search over a quality
+ladder keeps the number of preview encodes logarithmic; the caller then
+runs the full encode once with the chosen settings.
+"""
+
+import logging
+import math
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from ffmpeg_encoder import ClipEdit
+
+
+# Sampled segments and their length in seconds; clips shorter than the
+# total sample are previewed whole
+SAMPLE_SEGMENTS = 3
+SAMPLE_SECONDS = 1.0
+
+# Estimates aim this far under the budget to absorb estimation error
+SAFETY_MARGIN = 0.9
+
+# Bounds of the search; the top width is also capped so the sample stays small
+MAX_WIDTH = 1280
+MIN_WIDTH = 160
+WIDTH_STEP = 0.85
+COLOR_STEPS = (256, 192, 128, 96, 64, 48, 32)
+FPS_STEPS = (30, 24, 20, 15, 12, 10, 8, 6, 5)
+
+
+@dataclass(frozen=True)
+class GifSettings:
+    """One candidate encode: frame rate, output width and palette size."""
+    fps: Union[int, Fraction]
+    width: int
+    colors: int
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"fps": float(self.fps), "width": self.width, "colors": self.colors}
+
+
+def _even(value: float) -> int:
+    return max(2, int(value) // 2 * 2)
+
+
+def _fps_steps(fps: Union[int, Fraction], source_fps: Optional[Fraction] = None) -> List[Union[int, Fraction]]:
+    """Frame rates to try, from fps down; with source_fps, only whole divisors of it."""
+    if source_fps is None:
+        return [fps] + [step for step in FPS_STEPS if step < fps]
+    steps: List[Union[int, Fraction]] = []
+    divisor = max(1, math.ceil(source_fps / fps))
+    while not steps or source_fps / divisor >= FPS_STEPS[-1]:
+        steps.append(source_fps / divisor)
+        divisor += 1
+    return steps
+
+
+def quality_ladder(fps: Union[int, Fraction], width: int,
+                   source_fps: Optional[Fraction] = None) -> List[GifSettings]:
+    """
+    Candidate settings from best to worst. Each rung lowers one of width,
+    palette size or frame rate, in the order width, colors, width, fps, so no
+    single dimension collapses first. With source_fps, the frame rates stay on
+    its divisor grid (see ffmpeg_encoder.divisor_fps).
+    """
+    widths = [_even(min(width, MAX_WIDTH))]
+    while widths[-1] * WIDTH_STEP >= MIN_WIDTH:
+        widths.append(_even(widths[-1] * WIDTH_STEP))
+    fps_steps = _fps_steps(fps, source_fps)
+    steps = {"width": widths, "colors": list(COLOR_STEPS), "fps": fps_steps}
+    position = {"width": 0, "colors": 0, "fps": 0}
+
+    ladder = [GifSettings(fps_steps[0], widths[0], COLOR_STEPS[0])]
+    order = ("width", "colors", "width", "fps")
+    while True:
+        advanced = False
+        for dimension in order:
+            if position[dimension] + 1 < len(steps[dimension]):
+                position[dimension] += 1
+                advanced = True
+                ladder.append(GifSettings(steps["fps"][position["fps"]], steps["width"][position["width"]],
+                                          steps["colors"][position["colors"]]))
+        if not advanced:
+            return ladder
+
+
+def plan_sample(duration: Optional[float]) -> List[Tuple[float, float]]:
+    """(start, length) of the segments to sample, spread evenly over a clip of duration seconds."""
+    total = SAMPLE_SEGMENTS * SAMPLE_SECONDS
+    if not duration or duration <= total:
+        return [(0.0, duration or total)]
+    return [
+        ((index + 0.5) * duration / SAMPLE_SEGMENTS - SAMPLE_SECONDS / 2, SAMPLE_SECONDS)
+        for index in range(SAMPLE_SEGMENTS)
+    ]
+
+
+def build_sample_command(ffmpeg_exe: str, input_file: str, output_file: str,
+                         segments: List[Tuple[float, float]], fps: float, width: int,
+                         edit: Optional[ClipEdit] = None) -> List[str]:
+    """
+    FFmpeg command line cutting segments (relative to edit's start) out of
+    input_file, at fps, cropped and scaled by edit and down to width, and
+    joining them into one lossless FFV1 clip.
+    """
+    edit = edit or ClipEdit()
+    command = [ffmpeg_exe, '-hide_banner', '-nostdin', '-loglevel', 'error', '-y']
+    for start, length in segments:
+        command += ['-ss', f"{edit.start + start:.3f}", '-t', f"{length:.3f}", '-i', input_file]
+    chain = ",".join([f"fps={fps}"] + edit.filters(width) + ["setsar=1"])
+    chains = [f"[{index}:v]{chain}[v{index}]" for index in range(len(segments))]
+    inputs = "".join(f"[v{index}]" for index in range(len(segments)))
+    graph = ";".join(chains) + f";{inputs}concat=n={len(segments)}:v=1:a=0[out]"
+    # RGB keeps odd frame sizes and avoids a chroma round trip before quantizing
+    return command + ['-filter_complex', graph, '-map', '[out]', '-an', '-c:v', 'ffv1', '-pix_fmt', 'bgr0',
+                      output_file]
+
+
+class SizeSearch:
+    """
+    Binary search over a quality ladder for the best rung whose estimated size
+    fits the budget. estimate(settings) returns the projected full-clip size in
+    bytes; results are cached so every rung is previewed at most once.
+    """
+
+    def __init__(self, ladder: List[GifSettings], estimate: Callable[[GifSettings], int], max_bytes: int):
+        self.ladder = ladder
+        self.estimate = estimate
+        self.budget = int(max_bytes * SAFETY_MARGIN)
+        self.estimates: Dict[GifSettings, int] = {}
+
+    def _estimate(self, index: int) -> int:
+        settings = self.ladder[index]
+        if settings not in self.estimates:
+            self.estimates[settings] = self.estimate(settings)
+            logging.info(f"Preview {settings.to_dict()}: ~{self.estimates[settings]} bytes "
+                         f"(budget {self.budget})")
+        return self.estimates[settings]
+
+    def run(self) -> Tuple[GifSettings, int]:
+        """Return the best settings that fit and their estimate (the smallest rung if none fit)."""
+        if self._estimate(0) <= self.budget:
+            return self.ladder[0], self.estimates[self.ladder[0]]
+        low, high = 0, len(self.ladder) - 1
+        if self._estimate(high) > self.budget:
+            logging.warning("No settings fit the size budget; using the smallest")
+            return self.ladder[high], self.estimates[self.ladder[high]]
+        # Invariant: ladder[low] doesn't fit, ladder[high] does
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self._estimate(middle) <= self.budget:
+                high = middle
+            else:
+                low = middle
+        return self.ladder[high], self.estimates[self.ladder[high]]
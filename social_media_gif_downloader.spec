@@ -63,6 +63,26 @@ hiddenimports += [
     'urllib3',
     'platforms',
     'config',
+    'ytdlp_engine',
+    'metadata_cache',
+    'output_cache',
+    'job_queue',
+    'workspace',
+    'ffmpeg_utils',
+    'gui',
+    'progress',
+    'cancellation',
+    'ffmpeg_encoder',
+    'gif_writer',
+    'frame_pipeline',
+    'quantizer',
+    'parallel_gif',
+    'frame_delta',
+    'size_target',
+    'gif_optimizer',
+    'format_policy',
+    'media_stream',
+    'media_fetcher',
 ]
 
 # Add platform-specific hidden imports
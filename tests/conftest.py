@@ -1,8 +1,11 @@
 import pytest
+import subprocess
 import tempfile
 import os
 from unittest.mock import Mock, patch
 
+import ffmpeg_utils
+
 
 def is_headless():
     """
@@ -27,6 +30,30 @@ def temp_dir():
         yield tmpdir
 
 
+@pytest.fixture
+def render_clip(temp_dir):
+    """
+    Renders silent yuv420p clips with FFmpeg's test source into temp_dir.
+    Call it with the file name, frame size, frame rate and duration in seconds,
+    plus any extra FFmpeg output options; it returns the clip's path. Skips
+    the test if FFmpeg is not available.
+    """
+    def render(name="clip.mp4", size="160x90", rate=30, duration=1, args=()):
+        path = os.path.join(temp_dir, name)
+        try:
+            subprocess.run(
+                [ffmpeg_utils.get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y",
+                 "-f", "lavfi", "-i", f"testsrc2=size={size}:rate={rate}:duration={duration}",
+                 "-pix_fmt", "yuv420p", *args, path],
+                check=True, capture_output=True, timeout=300
+            )
+        except (OSError, subprocess.SubprocessError):
+            pytest.skip("FFmpeg is not available")
+        return path
+
+    return render
+
+
 @pytest.fixture
 def mock_subprocess():
     """Mocks subprocess.run for testing."""
@@ -0,0 +1,133 @@
+import io
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+import batch_cli
+from workspace import WorkspaceManager
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestBatchCli:
+    """Tests for the headless batch entry point."""
+
+    @pytest.fixture(autouse=True)
+    def mock_home(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Path, "home", lambda: tmp_path)
+        return tmp_path
+
+    def test_does_not_import_gui_toolkits(self):
+        """Test that importing and running the CLI never loads tkinter or customtkinter."""
+        code = (
+            "import sys, batch_cli\n"
+            "try:\n"
+            "    batch_cli.parse_args(['--help'])\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "print([m for m in ('tkinter', '_tkinter', 'customtkinter') if m in sys.modules])\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=REPO_ROOT,
+            capture_output=True, text=True, timeout=60
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == "[]"
+
+    def test_read_urls_from_args_file_and_stdin(self, tmp_path):
+        """Test collecting URLs from every supported source."""
+        url_file = tmp_path / "urls.txt"
+        url_file.write_text("https://x.com/a/status/1\n\n# comment\nhttps://x.com/a/status/2\n")
+
+        args = batch_cli.parse_args(["https://x.com/a/status/0", "-i", str(url_file)])
+        assert batch_cli.read_urls(args) == [
+            "https://x.com/a/status/0", "https://x.com/a/status/1", "https://x.com/a/status/2"
+        ]
+
+        args = batch_cli.parse_args([])
+        assert batch_cli.read_urls(args, io.StringIO("https://x.com/a/status/3\n")) == ["https://x.com/a/status/3"]
+
+    def test_main_writes_json_lines(self, tmp_path, capsys):
+        """Test that main emits one JSON result per URL and a failing exit code on errors."""
+        def fake_process(url, output_file, workspaces, output_format, fps, options, **kwargs):
+            ok = "status/1" in url
+            return {"url": url, "status": "ok" if ok else "error",
+                    "output": output_file if ok else None, "format": output_format, "fps": fps}
+
+        with patch('batch_cli.process_url', side_effect=fake_process):
+            code = batch_cli.main([
+                "https://x.com/a/status/1", "https://example.com/video",
+                "-o", str(tmp_path / "out"), "-f", "gif", "--fps", "12", "--no-cache", "-j", "1"
+            ])
+
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert code == 1
+        assert [line["status"] for line in lines] == ["ok", "error"]
+        assert lines[0]["output"] == os.path.join(str(tmp_path / "out"), "1.gif")
+        assert lines[0]["fps"] == 12
+
+    def test_loop_mp4_output_path(self, tmp_path, capsys):
+        """Test that looping MP4 outputs get an .mp4 extension."""
+        def fake_process(url, output_file, workspaces, output_format, fps, options, **kwargs):
+            return {"url": url, "status": "ok", "output": output_file}
+
+        with patch('batch_cli.process_url', side_effect=fake_process):
+            assert batch_cli.main(["https://x.com/a/status/1", "https://x.com/b/status/1",
+                                   "-o", str(tmp_path), "-f", "loop_mp4", "--no-cache"]) == 0
+
+        outputs = sorted(json.loads(line)["output"] for line in capsys.readouterr().out.splitlines())
+        assert outputs == [os.path.join(str(tmp_path), "1.mp4"), os.path.join(str(tmp_path), "1_1.mp4")]
+
+    def test_process_url_unsupported_platform(self, tmp_path):
+        """Test that unsupported URLs produce an error result instead of raising."""
+        workspaces = WorkspaceManager(root=str(tmp_path / "jobs"))
+        result = batch_cli.process_url(
+            "https://example.com/video", str(tmp_path / "o.gif"), workspaces, "gif", 15, {}
+        )
+        assert result["status"] == "error"
+        assert result["error"] == "Unsupported platform"
+
+    def test_process_url_reports_download_error(self, tmp_path):
+        """Test that DownloadError messages are reported in the JSON result."""
+        from platforms import DownloadError
+        workspaces = WorkspaceManager(root=str(tmp_path / "jobs"))
+        with patch('platforms.PlatformDownloader.download_media',
+                   side_effect=DownloadError("Content not found")):
+            result = batch_cli.process_url(
+                "https://x.com/a/status/5", str(tmp_path / "o.mp4"), workspaces, "mp4", 15, {}
+            )
+        assert os.listdir(workspaces.root) == []
+        assert result["status"] == "error"
+        assert result["platform"] == "twitter"
+        assert result["error"] == "Content not found"
+
+    def test_no_urls_is_usage_error(self):
+        """Test that running without any URLs exits with code 2."""
+        with patch('sys.stdin', io.StringIO("")):
+            assert batch_cli.main([]) == 2
+
+    def test_clip_edit_options(self, tmp_path):
+        """Test that trim, size and crop flags reach process_url as a ClipEdit."""
+        from ffmpeg_encoder import ClipEdit
+        calls = []
+
+        def fake_process(url, output_file, workspaces, output_format, fps, options, **kwargs):
+            calls.append(kwargs["edit"])
+            return {"url": url, "status": "ok", "output": output_file}
+
+        with patch('batch_cli.process_url', side_effect=fake_process):
+            assert batch_cli.main([
+                "https://x.com/a/status/1", "-o", str(tmp_path / "out"), "-f", "gif", "--no-cache",
+                "--start", "2", "--end", "6", "--max-width", "480", "--crop", "640:360:0:60"
+            ]) == 0
+        assert calls == [ClipEdit(start=2.0, end=6.0, max_width=480, crop=(640, 360, 0, 60))]
+
+        with pytest.raises(SystemExit):
+            batch_cli.parse_args(["--crop", "640x360"])
+        assert batch_cli.main(["https://x.com/a/status/1", "--start", "5", "--end", "1"]) == 2
@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+
+from cancellation import CancelToken, JobCancelledError
+from job_queue import JobQueue, JOB_CANCELLED
+from platforms import TwitterDownloader, ENGINE_IN_PROCESS
+from progress import ProgressReporter
+
+
+class TestCancelToken:
+    """Tests for the cancellation token."""
+
+    def test_callbacks_run_once(self):
+        """Test that callbacks run on the first cancel only, and immediately once cancelled."""
+        token = CancelToken()
+        calls = []
+        token.add_callback(lambda: calls.append("a"))
+        token.cancel()
+        token.cancel()
+        token.add_callback(lambda: calls.append("b"))
+
+        assert calls == ["a", "b"]
+        assert token.wait(0)
+        with pytest.raises(JobCancelledError):
+            token.raise_if_cancelled()
+
+
+class TestJobQueueCancellation:
+    """Tests for cancelling queued and running jobs."""
+
+    def test_cancel_queued_and_running_jobs(self):
+        """Test that a queued job never runs and a running job stops at its next check."""
+        started = threading.Event()
+        ran = []
+
+        def running(job):
+            started.set()
+            job.cancel_token.wait(5)
+            job.cancel_token.raise_if_cancelled()
+
+        queue = JobQueue(max_workers=1)
+        first = queue.submit("https://x.com/a/status/1", running, platform="twitter")
+        second = queue.submit("https://x.com/a/status/2", lambda job: ran.append(job), platform="twitter")
+        assert started.wait(5)
+
+        queue.cancel_all()
+        assert queue.wait(timeout=5)
+        queue.shutdown()
+
+        assert first.state == JOB_CANCELLED
+        assert second.state == JOB_CANCELLED
+        assert ran == []
+
+
+class TestDownloaderCancellation:
+    """Tests for cancelling in-flight downloads and conversions."""
+
+    def test_cancel_kills_running_process(self):
+        """Test that cancelling kills the yt-dlp child process instead of waiting for it."""
+        downloader = TwitterDownloader(max_retries=3, timeout=30, cancel_token=CancelToken())
+        threading.Timer(0.3, downloader.cancel).start()
+
+        start = time.monotonic()
+        with pytest.raises(JobCancelledError):
+            downloader._run_with_retry([sys.executable, "-c", "import time; time.sleep(30)"], "test")
+        assert time.monotonic() - start < 10
+
+    def test_cancel_removes_partial_output(self, temp_dir):
+        """Test that a cancelled download leaves no partial output behind."""
+        output = os.path.join(temp_dir, "out.mp4")
+        downloader = TwitterDownloader(cancel_token=CancelToken())
+
+        def killed_midway(command, on_output_line=None):
+            open(output, 'w').close()
+            downloader.cancel()
+            return subprocess.CompletedProcess(command, -9, "", "")
+
+        with patch.object(downloader, '_run_streaming', side_effect=killed_midway):
+            with pytest.raises(JobCancelledError):
+                downloader.download_media("https://x.com/user/status/123", output, skip_conversion=True)
+        assert not os.path.exists(output)
+
+    def test_in_process_download_aborts_from_progress_hook(self, temp_dir):
+        """Test that the in-process engine is interrupted through its progress hook."""
+        output = os.path.join(temp_dir, "out.mp4")
+        downloader = TwitterDownloader(engine=ENGINE_IN_PROCESS, cancel_token=CancelToken())
+        engine = Mock()
+
+        def download(url, target, fmt, max_filesize, progress_hook):
+            progress_hook({"status": "downloading", "downloaded_bytes": 10, "total_bytes": 100})
+            downloader.cancel()
+            progress_hook({"status": "downloading", "downloaded_bytes": 20, "total_bytes": 100})
+            open(target, 'w').close()
+
+        engine.download.side_effect = download
+        with patch('ytdlp_engine.get_shared_engine', return_value=engine):
+            with pytest.raises(JobCancelledError):
+                downloader.download_media("https://x.com/user/status/123", output, skip_conversion=True)
+        assert not os.path.exists(output)
+
+    def test_encoder_stops_between_frames(self):
+        """Test that the encoder's frame logger aborts once the token is cancelled."""
+        token = CancelToken()
+        logger = ProgressReporter(None).frame_logger(token)
+        encoded = []
+        with pytest.raises(JobCancelledError):
+            for frame in logger.iter_bar(frame_index=range(100)):
+                encoded.append(frame)
+                if frame == 4:
+                    token.cancel()
+        assert encoded == [0, 1, 2, 3, 4]
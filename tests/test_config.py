@@ -94,6 +94,10 @@ class TestConfig:
         config.set_preferred_output_format("gif")
         assert config.get_preferred_output_format() == "gif"
 
+        for output_format in ("webp", "loop_mp4"):
+            config.set_preferred_output_format(output_format)
+            assert config.get_preferred_output_format() == output_format
+
     def test_set_preferred_output_format_invalid(self, mock_home):
         """Test setting invalid output format defaults to 'gif'."""
         config = Config()
@@ -0,0 +1,207 @@
+import os
+from fractions import Fraction
+import pytest
+from unittest.mock import patch
+
+import ffmpeg_encoder
+import ffmpeg_utils
+from PIL import Image
+
+from ffmpeg_encoder import ClipEdit
+from platforms import (
+    TwitterDownloader, GIF_ENGINE_FFMPEG, GIF_ENGINE_MOVIEPY, GIF_ENGINE_NUMPY, GIF_ENGINE_STREAM,
+)
+
+
+@pytest.fixture
+def tiny_clip(render_clip):
+    """A one-second synthetic clip rendered with FFmpeg's test source."""
+    return render_clip()
+
+
+class TestFfmpegEncoder:
+    """Tests for the FFmpeg palettegen/paletteuse GIF engine."""
+
+    def test_filter_graph(self):
+        """Test that the filter graph resamples, optionally scales, and uses a clip-wide palette."""
+        graph = ffmpeg_encoder.build_gif_filter(12)
+        assert graph.startswith("[0:v]fps=12,split[a][b];")
+        assert "palettegen" in graph and "paletteuse" in graph
+        assert "lanczos" not in graph
+        assert "scale='min(320,iw)':-1" in ffmpeg_encoder.build_gif_filter(12, width=320)
+        assert "max_colors" not in graph
+        assert "palettegen=stats_mode=diff:max_colors=64" in ffmpeg_encoder.build_gif_filter(12, colors=64)
+
+    def test_probe_video(self, tiny_clip):
+        """Test that the duration and frame size are read from FFmpeg's input description."""
+        info = ffmpeg_encoder.probe_video(ffmpeg_utils.get_ffmpeg_exe(), tiny_clip)
+        assert info["width"] == 160 and info["height"] == 90
+        assert info["duration"] == pytest.approx(1.0, abs=0.1)
+        assert info["fps"] == 30.0
+
+    def test_parse_progress(self):
+        """Test that frame counts are reported once per -progress block."""
+        state = {}
+        lines = ["frame=3", "fps=0.0", "progress=continue", "frame=9", "progress=end"]
+        frames = [ffmpeg_encoder.parse_progress_line(line, state) for line in lines]
+        assert frames == [None, None, 3, None, 9]
+        assert ffmpeg_encoder.expected_frames(2.0, 15) == 30
+        assert ffmpeg_encoder.expected_frames(None, 15) is None
+
+    def test_divisor_fps(self):
+        """Test that auto FPS picks the largest whole divisor of the source rate under the cap."""
+        assert ffmpeg_encoder.divisor_fps(30, 20) == (Fraction(15), 2)
+        assert ffmpeg_encoder.divisor_fps(30, 15) == (Fraction(15), 2)
+        assert ffmpeg_encoder.divisor_fps(24, 30) == (Fraction(24), 1)
+        assert ffmpeg_encoder.divisor_fps(60, 25) == (Fraction(20), 3)
+        assert ffmpeg_encoder.divisor_fps(29.97, 15) == (Fraction(15000, 1001), 2)
+        assert ffmpeg_encoder.source_rate(23.976) == Fraction(24000, 1001)
+        assert "fps=15000/1001," in ffmpeg_encoder.build_gif_filter(Fraction(15000, 1001))
+
+    def test_auto_fps(self, tiny_clip, temp_dir):
+        """Test that auto FPS samples every nth source frame and reports the choice."""
+        output = os.path.join(temp_dir, "out.gif")
+        downloader = TwitterDownloader(gif_engine=GIF_ENGINE_FFMPEG)
+
+        assert downloader.convert_to_gif(tiny_clip, output, fps=20, auto_fps=True)
+
+        assert downloader.job_stats["fps"] == {"mode": "auto", "requested": 20, "source_fps": 30.0,
+                                               "divisor": 2, "fps": 15.0}
+        with Image.open(output) as gif:
+            assert gif.n_frames == 15
+
+    def test_auto_fps_moviepy_keeps_every_nth_frame(self, render_clip, temp_dir):
+        """Test that the moviepy engine keeps the same source frames as FFmpeg's fps filter."""
+        # 79 NTSC frames whose brightness counts up by frame number; moviepy reads the
+        # duration as 2.64 s, which time-based sampling at 14.985 FPS cuts to 39 frames
+        clip = render_clip(rate="30000/1001", duration=3,
+                           args=("-vf", "geq=lum='16+N*2':cb=128:cr=128", "-frames:v", "79"))
+        downloader = TwitterDownloader(gif_engine=GIF_ENGINE_MOVIEPY)
+        output = os.path.join(temp_dir, "out.gif")
+        events = []
+
+        assert downloader.convert_to_gif(clip, output, events.append, fps=15, auto_fps=True)
+
+        assert downloader.job_stats["fps"]["divisor"] == 2
+        assert downloader.job_stats["gif_engine"] == GIF_ENGINE_MOVIEPY
+        assert events[-1].done == events[-1].total == 40
+        with Image.open(output) as gif:
+            assert gif.n_frames == 40
+            for number in range(gif.n_frames):
+                gif.seek(number)
+                # Source frame 2 * number, expanded from limited to full range
+                brightness = sum(gif.convert("L").getdata()) / (gif.width * gif.height)
+                assert brightness == pytest.approx(4 * number * 255 / 219, abs=2)
+
+    def test_encodes_gif_with_progress(self, tiny_clip, temp_dir):
+        """Test a real FFmpeg encode, including frame progress events."""
+        output = os.path.join(temp_dir, "out.gif")
+        downloader = TwitterDownloader(gif_engine=GIF_ENGINE_FFMPEG)
+        downloader.video_info = {"duration": 1.0}
+        events = []
+
+        assert downloader.convert_to_gif(tiny_clip, output, events.append, fps=10)
+
+        with open(output, 'rb') as f:
+            assert f.read(6) == b"GIF89a"
+        assert downloader.job_stats["gif_engine"] == GIF_ENGINE_FFMPEG
+        assert events and events[-1].done == events[-1].total == 10
+
+    def test_falls_back_to_moviepy(self, temp_dir):
+        """Test that an FFmpeg failure retries the conversion with moviepy."""
+        downloader = TwitterDownloader(gif_engine=GIF_ENGINE_FFMPEG)
+        with patch.object(downloader, '_convert_with_ffmpeg', side_effect=RuntimeError("boom")), \
+             patch.object(downloader, '_convert_with_moviepy', return_value=True) as mock_moviepy:
+            assert downloader.convert_to_gif("in.mp4", os.path.join(temp_dir, "out.gif"))
+
+        mock_moviepy.assert_called_once()
+        assert downloader.job_stats["gif_engine"] == GIF_ENGINE_MOVIEPY
+
+
+class TestAnimationFormats:
+    """Tests for the animated WebP and looping MP4 outputs."""
+
+    def test_commands(self):
+        """Test that WebP loops like a GIF and MP4 is silent, even-sized yuv420p with fast start."""
+        webp = ffmpeg_encoder.build_webp_command("ffmpeg", "in.mp4", "out.webp", 12, width=320)
+        assert webp[webp.index('-c:v') + 1] == 'libwebp_anim'
+        assert webp[webp.index('-loop') + 1] == '0'
+        assert webp[webp.index('-vf') + 1] == "fps=12,scale='min(320,iw)':-1:flags=lanczos"
+
+        mp4 = ffmpeg_encoder.build_loop_mp4_command("ffmpeg", "in.mp4", "out.mp4", 12,
+                                                    edit=ClipEdit(start=1.0, crop=(99, 99, 0, 0)))
+        assert mp4[mp4.index('-c:v') + 1] == 'libx264'
+        assert mp4[mp4.index('-pix_fmt') + 1] == 'yuv420p'
+        assert '+faststart' in mp4 and '-an' in mp4
+        assert mp4.index('-ss') < mp4.index('-i')
+        chain = mp4[mp4.index('-vf') + 1]
+        assert chain.startswith("fps=12,crop=99:99:0:0,") and "trunc(iw/2)*2" in chain
+
+    @pytest.mark.parametrize("output_format, magic", [("webp", b"WEBP"), ("loop_mp4", b"ftyp")])
+    def test_convert_animation(self, output_format, magic, tiny_clip, temp_dir):
+        """Test a real encode of each format straight from the video."""
+        output = os.path.join(temp_dir, "out")
+        downloader = TwitterDownloader()
+        events = []
+
+        assert downloader.convert_animation(tiny_clip, output, output_format, events.append, fps=10,
+                                            edit=ClipEdit(max_width=80))
+
+        with open(output, 'rb') as f:
+            assert f.read(12)[8 if output_format == "webp" else 4:][:4] == magic
+        assert downloader.job_stats["output_format"] == output_format
+        assert events and all(event.output_format == output_format for event in events)
+
+    def test_rejects_unknown_format(self, temp_dir):
+        """Test that only the animated formats are accepted."""
+        with pytest.raises(ValueError):
+            TwitterDownloader().convert_animation("in.mp4", os.path.join(temp_dir, "out"), "gif")
+
+
+class TestClipEdit:
+    """Tests for decode-time trimming, cropping and scaling."""
+
+    def test_arguments(self):
+        """Test that the time range becomes input options and crop/scale become filters."""
+        edit = ClipEdit(start=2.0, end=6.0, max_width=480, crop=(640, 360, 10, 20))
+        assert edit.input_args() == ['-ss', '2.000000', '-t', '4.000000']
+        assert edit.input_args(1.5) == ['-ss', '3.500000', '-t', '2.500000']
+        assert edit.filters() == ["crop=640:360:10:20", "scale='min(480,iw)':-1:flags=lanczos"]
+        assert edit.filters(width=320)[1] == "scale='min(320,iw)':-1:flags=lanczos"
+        assert "force_original_aspect_ratio=decrease" in ClipEdit(max_width=480, max_height=200).filters()[0]
+        assert edit.duration(60.0) == 4.0
+        assert ClipEdit(start=2.0).duration(5.0) == 3.0
+        assert ClipEdit(start=2.0).duration(None) is None
+        assert edit.output_size(1920, 1080) == (480, 270)
+        assert ClipEdit(max_height=90).output_size(320, 180) == (160, 90)
+        assert not ClipEdit() and ClipEdit().input_args() == [] and ClipEdit().filters() == []
+        assert edit.to_dict() == {"start": 2.0, "end": 6.0, "max_width": 480, "crop": [640, 360, 10, 20]}
+
+    def test_rejects_invalid_edits(self):
+        """Test that empty time ranges and crops are refused."""
+        for kwargs in ({"start": 3.0, "end": 2.0}, {"start": -1.0}, {"crop": (0, 10, 0, 0)}, {"crop": (10, 10)}):
+            with pytest.raises(ValueError):
+                ClipEdit(**kwargs)
+
+    def test_rawvideo_command_seeks_within_range(self):
+        """Test that segment seeks are relative to the edit's start and stay inside its end."""
+        edit = ClipEdit(start=10.0, end=20.0, max_height=240)
+        command = ffmpeg_encoder.build_rawvideo_command("ffmpeg", "in.mp4", 15, start=4.0, max_frames=30, edit=edit)
+        assert command[command.index('-ss') + 1] == '14.000000'
+        assert command[command.index('-t') + 1] == '6.000000'
+        assert command.index('-t') < command.index('-i')
+        assert command[command.index('-vf') + 1] == "fps=15,scale=-1:'min(240,ih)':flags=lanczos"
+
+    @pytest.mark.parametrize("engine", [GIF_ENGINE_FFMPEG, GIF_ENGINE_STREAM, GIF_ENGINE_NUMPY, GIF_ENGINE_MOVIEPY])
+    def test_engines_apply_edit(self, engine, tiny_clip, temp_dir):
+        """Test that every engine converts only the trimmed, cropped and scaled region."""
+        output = os.path.join(temp_dir, f"{engine}.gif")
+        downloader = TwitterDownloader(gif_engine=engine, gif_workers=1, gif_duplicate_threshold=0)
+        edit = ClipEdit(start=0.5, max_width=40, crop=(80, 60, 40, 10))
+
+        assert downloader.convert_to_gif(tiny_clip, output, fps=10, edit=edit)
+
+        assert downloader.job_stats["gif_engine"] == engine
+        with Image.open(output) as gif:
+            assert gif.size == (40, 30)
+            assert gif.n_frames == 5
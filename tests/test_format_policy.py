@@ -0,0 +1,114 @@
+import os
+from unittest.mock import Mock, patch
+
+import format_policy
+from ffmpeg_encoder import ClipEdit
+from platforms import TwitterDownloader, PinterestDownloader
+
+
+URL = "https://x.com/user/status/123"
+
+SIZES = {256: (480, 270), 832: (640, 360), 2176: (1280, 720), 10368: (1920, 1080)}
+
+
+def _tweet_info():
+    """Info JSON shaped like a tweet's: HLS video-only renditions, an audio track and muxed MP4s."""
+    formats = [{"format_id": "hls-audio", "ext": "mp4", "vcodec": "none", "acodec": "mp4a.40.2", "tbr": 128}]
+    for tbr, (width, height) in SIZES.items():
+        formats.append({"format_id": f"http-{tbr}", "ext": "mp4", "width": width, "height": height,
+                        "tbr": tbr + 128})
+        formats.append({"format_id": f"hls-{tbr}", "ext": "mp4", "vcodec": "avc1", "acodec": "none",
+                        "width": width, "height": height, "fps": 30, "tbr": tbr})
+    return {"id": "123", "duration": 10.0, "fps": 30, "formats": formats}
+
+
+def _downloader(**kwargs):
+    downloader = TwitterDownloader(**kwargs)
+    downloader.video_info, downloader._video_info_url = _tweet_info(), URL
+    return downloader
+
+
+class TestFormatPolicy:
+    """Tests for choosing the cheapest adequate rendition for silent outputs."""
+
+    def test_select_rendition(self):
+        """Test that the smallest large-enough rendition wins, video-only before muxed."""
+        info = _tweet_info()
+        assert format_policy.select_rendition(info, 480, 270)["format_id"] == "hls-256"
+        assert format_policy.select_rendition(info, 500, 281)["format_id"] == "hls-832"
+        assert format_policy.select_rendition(info, 1920, 1080)["format_id"] == "hls-10368"
+        # Nothing is large enough: take the largest
+        assert format_policy.select_rendition(info, 3840, 2160)["format_id"] == "hls-10368"
+        assert format_policy.select_rendition({"formats": info["formats"][:1]}, 480, 270) is None
+        assert format_policy.source_size(info) == (1920, 1080)
+
+    def test_frame_rate_must_be_kept(self):
+        """Test that a rendition slower than the requested rate is skipped."""
+        info = _tweet_info()
+        info["formats"][2]["fps"] = 15
+        assert format_policy.select_rendition(info, 480, 270, fps=24)["format_id"] == "http-256"
+        assert format_policy.select_rendition(info, 480, 270, fps=15)["format_id"] == "hls-256"
+
+    def test_progressive_preferred_for_streaming(self):
+        """Test that streaming prefers a single-file rendition over a cheaper segmented one."""
+        info = _tweet_info()
+        for fmt in info["formats"]:
+            fmt["url"] = f"https://video.example/{fmt['format_id']}"
+            fmt["protocol"] = "https" if fmt["format_id"].startswith("http") else "m3u8_native"
+        assert format_policy.select_rendition(info, 480, 270, progressive=True)["format_id"] == "http-256"
+        assert format_policy.select_rendition(info, 480, 270)["format_id"] == "hls-256"
+        assert format_policy.progressive_url(info["formats"][1]) == "https://video.example/http-256"
+        assert format_policy.progressive_url(info["formats"][2]) is None
+
+    def test_estimated_bytes(self):
+        """Test that filesize wins over the bitrate estimate."""
+        assert format_policy.estimated_bytes({"filesize": 1000, "tbr": 8}, 10) == 1000
+        assert format_policy.estimated_bytes({"tbr": 8}, 10) == 10000
+        assert format_policy.estimated_bytes({"tbr": 8}) is None
+
+    def test_select_download_formats(self):
+        """Test that the output size after edits and the size target picks the rendition."""
+        downloader = _downloader()
+
+        spec = downloader.select_download_formats(URL, "gif", 15, edit=ClipEdit(max_width=480))
+        assert spec == f"hls-256/{format_policy.VIDEO_ONLY_FORMATS}"
+        assert downloader.job_stats["download_format"] == {
+            "format_id": "hls-256", "width": 480, "height": 270, "estimated_bytes": 320000,
+        }
+        assert downloader.select_download_formats(URL, "webp", 15).startswith("hls-10368/")
+        # size_target never encodes wider than 1280 pixels
+        assert downloader.select_download_formats(URL, "gif", 15, max_bytes=10 ** 6).startswith("hls-2176/")
+        assert downloader.select_download_formats(URL, "loop_mp4", 15, max_bytes=10 ** 6).startswith("hls-10368/")
+        # Crop coordinates are in source pixels
+        crop = ClipEdit(max_width=480, crop=(960, 540, 0, 0))
+        assert downloader.select_download_formats(URL, "gif", 15, edit=crop).startswith("hls-10368/")
+
+    def test_policy_fallbacks(self):
+        """Test the selection without extracted info, with the policy off and on Pinterest."""
+        legacy = TwitterDownloader().get_download_formats()
+        assert TwitterDownloader().select_download_formats(URL, "gif", 15) == format_policy.VIDEO_ONLY_FORMATS
+        assert _downloader(use_format_policy=False).select_download_formats(URL, "gif", 15) == legacy
+        assert PinterestDownloader().select_download_formats("https://pinterest.com/pin/1/", "gif", 15) is None
+        assert _downloader(use_format_policy=False).get_conversion_params()["format_policy"] is False
+        assert "format_policy" not in _downloader().get_conversion_params()
+
+    def test_download_uses_policy_and_counts_bytes(self, temp_dir):
+        """Test that conversion downloads request the chosen rendition and MP4 downloads keep the audio."""
+        downloader = _downloader(temp_file=os.path.join(temp_dir, "temp_video.mp4"))
+        commands = []
+
+        def fake_download(command, *args):
+            commands.append(command)
+            with open(command[command.index('-o') + 1], 'wb') as f:
+                f.write(b"\0" * 1234)
+            return Mock(returncode=0, stdout="", stderr="")
+
+        with patch.object(downloader, '_run_with_retry', side_effect=fake_download), \
+                patch.object(downloader, 'convert_to_gif', return_value=True):
+            assert downloader.download_media(URL, os.path.join(temp_dir, "out.gif"), fps=15,
+                                             edit=ClipEdit(max_width=640))
+            assert downloader.job_stats["downloaded_bytes"] == 1234
+            assert downloader.download_media(URL, os.path.join(temp_dir, "out.mp4"), skip_conversion=True)
+
+        assert commands[0][commands[0].index('-f') + 1].startswith("hls-832/")
+        assert commands[1][commands[1].index('-f') + 1] == downloader.get_download_formats()
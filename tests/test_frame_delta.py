@@ -0,0 +1,132 @@
+import io
+import os
+import numpy as np
+from PIL import Image
+
+from frame_delta import DeltaFrames, DuplicateFilter
+from frame_pipeline import merge_duplicates, stream_to_gif
+from gif_writer import frame_delays
+from platforms import TwitterDownloader, GIF_ENGINE_STREAM
+from quantizer import Quantizer, DITHER_NONE
+
+
+def _moving_square_frames(count: int = 6, size=(64, 48)):
+    """Static gradient background with a small square moving across it."""
+    width, height = size
+    y, x = np.mgrid[0:height, 0:width]
+    background = np.stack([x * 4, y * 5, np.full_like(x, 90)], axis=-1).astype(np.uint8)
+    frames = []
+    for i in range(count):
+        frame = background.copy()
+        frame[10:18, 4 + i * 6:12 + i * 6] = (250, 250, 30)
+        frames.append(frame)
+    return frames
+
+
+class TestFrameDelta:
+    """Tests for the inter-frame delta optimizer."""
+
+    def test_update_crops_to_changed_region(self):
+        """Test that only the bounding box of changed pixels is kept, with the rest transparent."""
+        deltas = DeltaFrames(transparent_index=9)
+        first = np.zeros((10, 10), dtype=np.uint8)
+        second = first.copy()
+        second[2, 3] = 1
+        second[5, 6] = 2
+
+        region, position, transparency = deltas.update(first)
+        assert region.shape == (10, 10) and position == (0, 0) and transparency is None
+
+        region, position, transparency = deltas.update(second)
+        assert position == (3, 2) and transparency == 9
+        assert region.shape == (4, 4)
+        assert region[0, 0] == 1 and region[3, 3] == 2
+        assert (region == 9).sum() == 14
+
+        region, position, _ = deltas.update(second.copy())
+        assert region.shape == (1, 1) and position == (0, 0)
+
+    def test_crop_only_without_transparent_index(self):
+        """Test that a full palette still gets cropped frames, written as-is."""
+        deltas = DeltaFrames()
+        deltas.update(np.zeros((4, 4), dtype=np.uint8))
+        frame = np.zeros((4, 4), dtype=np.uint8)
+        frame[1:3, 1] = 5
+        region, position, transparency = deltas.update(frame)
+        assert transparency is None and position == (1, 1)
+        assert region.tolist() == [[5], [5]]
+
+    def test_delta_gif_decodes_to_full_frames(self):
+        """Test that a delta-encoded GIF shows the same pictures as full frames, in less space."""
+        frames = _moving_square_frames()
+        quantizer = Quantizer.from_frames(frames, colors=255)
+        raw = [frame.tobytes() for frame in frames]
+
+        full, delta = io.BytesIO(), io.BytesIO()
+        stream_to_gif(iter(raw), (64, 48), full, 10, quantizer=quantizer, dither=DITHER_NONE)
+        stream_to_gif(iter(raw), (64, 48), delta, 10, quantizer=quantizer, dither=DITHER_NONE,
+                      delta=DeltaFrames(quantizer.transparent_index))
+
+        assert len(delta.getvalue()) < len(full.getvalue())
+        full_gif, delta_gif = Image.open(full), Image.open(delta)
+        assert delta_gif.n_frames == len(frames)
+        for index, frame in enumerate(frames):
+            full_gif.seek(index)
+            delta_gif.seek(index)
+            expected = quantizer.palette[quantizer.quantize(frame, DITHER_NONE)]
+            assert np.array_equal(np.array(delta_gif.convert("RGB")), expected)
+            assert np.array_equal(np.array(full_gif.convert("RGB")), expected)
+
+
+class TestDuplicateFilter:
+    """Tests for near-duplicate frame merging."""
+
+    def test_noise_is_duplicate_but_small_motion_is_not(self):
+        """Test that faint noise counts as a duplicate while a small moving object does not."""
+        frames = _moving_square_frames(2, size=(320, 240))
+        rng = np.random.RandomState(0)
+        noisy = np.clip(frames[0].astype(int) + rng.randint(-2, 3, frames[0].shape), 0, 255).astype(np.uint8)
+        duplicates = DuplicateFilter(2.0)
+
+        assert not duplicates.is_duplicate(frames[0].tobytes(), (320, 240))
+        assert duplicates.is_duplicate(frames[0].tobytes(), (320, 240))
+        assert duplicates.is_duplicate(noisy.tobytes(), (320, 240))
+        assert not duplicates.is_duplicate(frames[1].tobytes(), (320, 240))
+        assert duplicates.dropped == 2
+
+    def test_merge_keeps_total_duration(self):
+        """Test that dropped frames extend the delay of the frame they repeat."""
+        a, b = bytes(16 * 16 * 3), bytes([200]) * (16 * 16 * 3)
+        merged = list(merge_duplicates([a, a, a, b, b, a], frame_delays(10), (16, 16), DuplicateFilter(1.0)))
+        assert [(frame, delay, consumed) for frame, delay, consumed in merged] == [
+            (a, 30, 3), (b, 20, 5), (a, 10, 6)
+        ]
+        assert [delay for _, delay, _ in merge_duplicates([a, a], frame_delays(10), (16, 16))] == [10, 10]
+
+    def test_stream_to_gif_merges_slideshow(self):
+        """Test that a slideshow is written as one frame per slide with the same total duration."""
+        slides = [bytes([value]) * (32 * 24 * 3) for value in (0, 120, 240)]
+        frames = [slide for slide in slides for _ in range(5)]
+        counts = []
+        buffer = io.BytesIO()
+
+        assert stream_to_gif(iter(frames), (32, 24), buffer, 10, on_frame=counts.append,
+                             duplicates=DuplicateFilter(1.0)) == 3
+
+        assert counts == [5, 10, 15]
+        gif = Image.open(buffer)
+        durations = []
+        for index in range(gif.n_frames):
+            gif.seek(index)
+            durations.append(gif.info["duration"])
+        assert durations == [500, 500, 500]
+
+    def test_engine_reports_dropped_frames(self, temp_dir, render_clip):
+        """Test that a converted slideshow clip reports its merged frames in the job stats."""
+        clip = render_clip("slides.mp4", rate=1, duration=3, args=("-r", "30"))
+        downloader = TwitterDownloader(gif_engine=GIF_ENGINE_STREAM)
+
+        assert downloader.convert_to_gif(clip, os.path.join(temp_dir, "out.gif"), fps=10)
+
+        assert downloader.job_stats["gif_engine"] == GIF_ENGINE_STREAM
+        assert downloader.job_stats["frames_dropped"] >= 20
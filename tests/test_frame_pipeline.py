@@ -0,0 +1,106 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import pytest
+from PIL import Image
+
+from gif_writer import GifWriter, frame_delays
+from frame_pipeline import stream_to_gif
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestGifWriter:
+    """Tests for the incremental GIF writer."""
+
+    def test_frames_round_trip(self):
+        """Test that streamed frames decode with the right colors, timing and loop."""
+        buffer = io.BytesIO()
+        delays = frame_delays(15)
+        with GifWriter(buffer) as writer:
+            for i in range(4):
+                writer.add_frame(Image.new("RGB", (32, 24), (i * 60, 100, 200)), next(delays))
+
+        buffer.seek(0)
+        gif = Image.open(buffer)
+        assert gif.n_frames == 4
+        assert gif.info["loop"] == 0
+        colors = []
+        for index in range(4):
+            gif.seek(index)
+            colors.append(gif.convert("RGB").getpixel((5, 5)))
+        assert colors == [(i * 60, 100, 200) for i in range(4)]
+
+    def test_detailed_frame_round_trips_exactly(self):
+        """Test that large palette frames keep their pixel layout (Pillow interlaces by default)."""
+        image = Image.effect_noise((64, 48), 64).convert("P")
+        buffer = io.BytesIO()
+        with GifWriter(buffer) as writer:
+            writer.add_frame(image, 10)
+
+        buffer.seek(0)
+        decoded = Image.open(buffer).convert("RGB")
+        assert list(decoded.getdata()) == list(image.convert("RGB").getdata())
+
+    def test_delays_do_not_drift(self):
+        """Test that centisecond rounding doesn't accumulate over many frames."""
+        delays = frame_delays(15)
+        assert sum(next(delays) for _ in range(150)) == 1000
+
+    def test_stream_to_gif(self):
+        """Test the bounded queue pipeline end to end with in-memory frames."""
+        frames = (bytes([i * 10]) * (8 * 6 * 3) for i in range(10))
+        counts = []
+        buffer = io.BytesIO()
+        assert stream_to_gif(frames, (8, 6), buffer, 10, queue_frames=2, on_frame=counts.append) == 10
+        assert counts == list(range(1, 11))
+        buffer.seek(0)
+        assert Image.open(buffer).n_frames == 10
+
+    def test_stream_to_gif_aborts_from_callback(self):
+        """Test that raising from on_frame stops the pipeline."""
+        frames = (bytes(8 * 6 * 3) for _ in range(1000))
+
+        def stop_at_three(count):
+            if count == 3:
+                raise KeyError("stop")
+
+        with pytest.raises(KeyError):
+            stream_to_gif(frames, (8, 6), io.BytesIO(), 10, on_frame=stop_at_three)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Peak RSS is measured with the resource module")
+class TestStreamingMemory:
+    """Tests that the streaming engine's memory use doesn't grow with clip length."""
+
+    def test_peak_rss_ceiling_on_long_1080p_clip(self, temp_dir, render_clip):
+        """Test peak RSS on a generated 60-second 1080p clip stays within a few frames of baseline."""
+        clip = render_clip("long_1080p.mp4", "1920x1080", rate=5, duration=60,
+                           args=("-c:v", "libx264", "-preset", "ultrafast"))
+        output = os.path.join(temp_dir, "long.gif")
+
+        code = (
+            "import json, logging, resource, sys\n"
+            "logging.disable(logging.CRITICAL)\n"
+            "from platforms import TwitterDownloader, GIF_ENGINE_STREAM\n"
+            "from PIL import Image\n"
+            "downloader = TwitterDownloader(gif_engine=GIF_ENGINE_STREAM)\n"
+            "baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+            f"downloader.convert_to_gif({clip!r}, {output!r}, fps=2)\n"
+            "peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+            "scale = 1 if sys.platform == 'darwin' else 1024\n"
+            "print(json.dumps({'baseline': baseline * scale, 'peak': peak * scale,\n"
+            "                  'engine': downloader.job_stats.get('gif_engine')}))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=600)
+        assert result.returncode == 0, result.stderr[-2000:]
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+
+        frame_bytes = 1920 * 1080 * 3
+        assert stats["engine"] == "stream"
+        # Queue, reader, writer and quantizer buffers: a handful of frames, never the clip
+        assert stats["peak"] - stats["baseline"] < 16 * frame_bytes
+        assert Image.open(output).n_frames == 120
@@ -0,0 +1,173 @@
+import os
+import numpy as np
+import pytest
+from unittest.mock import patch
+from PIL import Image, ImageSequence
+
+import gif_optimizer
+from gif_writer import GifWriter
+from platforms import TwitterDownloader
+
+COLORS = bytes([250, 250, 250, 200, 30, 30, 30, 30, 200]) + bytes(i % 256 for i in range(3 * 253))
+
+
+def _rendered(path):
+    """The frames a GIF shows as (RGBA bytes, duration), with consecutive identical frames combined."""
+    frames = []
+    with Image.open(path) as image:
+        for frame in ImageSequence.Iterator(image):
+            rgba = np.array(frame.convert("RGBA"))
+            # Fully transparent pixels look the same whatever their color
+            rgba[rgba[..., 3] == 0] = 0
+            pixels = rgba.tobytes()
+            duration = frame.info.get("duration", 0)
+            if frames and frames[-1][0] == pixels:
+                frames[-1] = (pixels, frames[-1][1] + duration)
+            else:
+                frames.append((pixels, duration))
+    return frames
+
+
+def _palette_frame(indices, colors):
+    image = Image.frombytes("P", (indices.shape[1], indices.shape[0]), indices.astype(np.uint8).tobytes())
+    image.putpalette(colors)
+    return image
+
+
+def _slideshow_frames():
+    """A few-color square moving over a flat background, holding still for some frames."""
+    for position in (0, 0, 0, 8, 16, 16, 24):
+        indices = np.zeros((48, 64), dtype=np.uint8)
+        indices[10:20, position:position + 10] = 1
+        indices[30:34, 5:60] = 2
+        yield _palette_frame(indices, COLORS)
+
+
+def _slideshow_gif(path, disposal=1, transparency=None):
+    """The slideshow as full frames against a 256-color global palette, as the numpy engine writes them."""
+    with GifWriter(path, palette=COLORS) as writer:
+        for frame in _slideshow_frames():
+            writer.add_frame(frame, 10, transparency=transparency, disposal=disposal)
+
+
+class TestGifOptimizer:
+    """Tests for the lossless GIF post-pass."""
+
+    def test_lossless_and_smaller(self, temp_dir):
+        """Test that held frames merge, unused colors go, and the animation looks the same."""
+        original = os.path.join(temp_dir, "in.gif")
+        optimized = os.path.join(temp_dir, "out.gif")
+        _slideshow_gif(original)
+
+        result = gif_optimizer.optimize_gif(original, optimized)
+
+        assert result.frames_in == 7 and result.frames_out == 4
+        assert result.output_bytes == os.path.getsize(optimized) < result.input_bytes
+        assert result.to_dict()["saved_bytes"] == result.input_bytes - result.output_bytes
+        assert _rendered(optimized) == _rendered(original)
+        gif = gif_optimizer.parse_gif(open(optimized, 'rb').read())
+        # Three colors (plus a transparent slot) fit a 4-entry table and 2-bit LZW codes
+        assert len(gif.global_table) == 12
+        assert all(frame.image_data[0] == 2 for frame in gif.frames)
+        # Later frames are cropped to the moving square
+        assert (gif.frames[1].width, gif.frames[1].height) == (18, 10)
+
+    def test_disposal_and_transparency(self, temp_dir):
+        """Test frames that clear their rectangle or carry transparency stay pixel-identical."""
+        original = os.path.join(temp_dir, "in.gif")
+        optimized = os.path.join(temp_dir, "out.gif")
+        for options in ({"disposal": 2}, {"disposal": 3}, {"transparency": 0}, {"disposal": 2, "transparency": 0}):
+            _slideshow_gif(original, **options)
+
+            gif_optimizer.optimize_gif(original, optimized)
+
+            assert _rendered(optimized) == _rendered(original), options
+
+    @pytest.mark.parametrize("disposal", [2, 3])
+    def test_disposal_keeps_unused_transparency(self, disposal, temp_dir):
+        """Test that a disposed frame keeps its transparent index even when none of its pixels use it."""
+        original = os.path.join(temp_dir, "in.gif")
+        optimized = os.path.join(temp_dir, "out.gif")
+        background = np.zeros((48, 64), dtype=np.uint8)
+        square = np.ones((10, 10), dtype=np.uint8)
+        # Later frames are cropped to the square, so they never draw the transparent index
+        with GifWriter(original, palette=COLORS) as writer:
+            writer.add_frame(_palette_frame(background, COLORS), 10, transparency=0, disposal=disposal)
+            for position in (8, 16, 24):
+                writer.add_frame(_palette_frame(square, COLORS), 10, (position, 10), transparency=0, disposal=disposal)
+
+        gif_optimizer.optimize_gif(original, optimized)
+
+        assert _rendered(optimized) == _rendered(original)
+        assert all(frame.transparency is not None
+                   for frame in gif_optimizer.parse_gif(open(optimized, 'rb').read()).frames)
+
+    def test_local_palettes(self, temp_dir):
+        """Test a Pillow-written GIF with a local color table per frame."""
+        original = os.path.join(temp_dir, "in.gif")
+        optimized = os.path.join(temp_dir, "out.gif")
+        frames = list(_slideshow_frames())
+        for number, frame in enumerate(frames):
+            frame.putpalette(bytes([number * 30, 90, 90]) + COLORS[3:])
+        frames[0].save(original, save_all=True, append_images=frames[1:], duration=100, optimize=False)
+
+        result = gif_optimizer.optimize_gif(original, optimized)
+
+        assert result.saved_bytes > 0
+        assert _rendered(optimized) == _rendered(original)
+
+    def test_interlaced(self, temp_dir):
+        """Test that an interlaced frame is decoded in the right row order."""
+        original = os.path.join(temp_dir, "in.gif")
+        optimized = os.path.join(temp_dir, "out.gif")
+        next(_slideshow_frames()).save(original, interlace=True)
+        assert gif_optimizer.parse_gif(open(original, 'rb').read()).frames[0].interlaced
+
+        gif_optimizer.optimize_gif(original, optimized)
+
+        assert _rendered(optimized) == _rendered(original)
+
+    def test_keeps_original_when_not_smaller(self, temp_dir):
+        """Test that a GIF the optimizer can't shrink is left byte for byte."""
+        path = os.path.join(temp_dir, "noise.gif")
+        noise = np.random.RandomState(0).randint(0, 256, (32, 32))
+        _palette_frame(noise, bytes(np.random.RandomState(1).randint(0, 256, 768).astype(np.uint8))).save(path)
+        data = open(path, 'rb').read()
+
+        result = gif_optimizer.optimize_gif(path)
+
+        assert result.saved_bytes == 0 and result.frames_out == result.frames_in
+        assert open(path, 'rb').read() == data
+
+    def test_rejects_non_gif(self, temp_dir):
+        """Test that other files raise ValueError and the CLI reports them."""
+        path = os.path.join(temp_dir, "not.gif")
+        with open(path, 'wb') as f:
+            f.write(b"\x89PNG\r\n\x1a\n")
+        with pytest.raises(ValueError):
+            gif_optimizer.optimize_gif(path)
+        assert gif_optimizer.main([path]) == 1
+
+    def test_command_line(self, temp_dir, capsys):
+        """Test the standalone entry point writing to a separate output."""
+        original = os.path.join(temp_dir, "in.gif")
+        optimized = os.path.join(temp_dir, "out.gif")
+        _slideshow_gif(original)
+
+        assert gif_optimizer.main([original, "-o", optimized]) == 0
+
+        assert os.path.getsize(optimized) < os.path.getsize(original)
+        assert "3 frames merged" in capsys.readouterr().out
+
+    def test_convert_to_gif_runs_post_pass(self, temp_dir):
+        """Test that gif_optimize shrinks the engine's output and reports it in the job stats."""
+        output = os.path.join(temp_dir, "out.gif")
+        downloader = TwitterDownloader(gif_optimize=True)
+
+        with patch.object(downloader, '_encode_gif', side_effect=lambda _in, out, *args: _slideshow_gif(out)):
+            downloader.convert_to_gif("in.mp4", output, fps=10)
+
+        stats = downloader.job_stats["gif_optimize"]
+        assert stats["frames_merged"] == 3 and stats["saved_bytes"] > 0
+        assert stats["output_bytes"] == os.path.getsize(output)
+        assert downloader.get_conversion_params()["gif_optimize"] is True
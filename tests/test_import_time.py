@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+
+# Cold import of the entry-point modules must stay well under this budget
+IMPORT_BUDGET_SECONDS = 0.5
+HEAVY_MODULES = ["moviepy", "customtkinter", "tkinter", "numpy", "imageio", "yt_dlp", "PIL"]
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _cold_import(module: str) -> dict:
+    """Import a module in a fresh interpreter and report timing and loaded heavy modules."""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'elapsed': elapsed, 'heavy': heavy}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestImportTime:
+    """Tests that startup doesn't pay for conversion and GUI dependencies."""
+
+    @pytest.mark.parametrize("module", ["social_media_gif_downloader", "batch_cli"])
+    def test_heavy_dependencies_are_deferred(self, module):
+        """Test that importing an entry point doesn't load moviepy, PIL, customtkinter and friends."""
+        assert _cold_import(module)["heavy"] == []
+
+    @pytest.mark.parametrize("module", ["social_media_gif_downloader", "batch_cli"])
+    def test_cold_import_within_budget(self, module):
+        """Test that cold import of an entry point stays within the import-time budget."""
+        # Take the best of a few runs so a busy machine doesn't cause a false failure
+        elapsed = min(_cold_import(module)["elapsed"] for _ in range(3))
+        assert elapsed < IMPORT_BUDGET_SECONDS, f"{module} took {elapsed:.3f}s to import"
+
+    def test_configure_ffmpeg_is_idempotent(self):
+        """Test that FFmpeg resolution runs once and yields an executable path."""
+        import ffmpeg_utils
+        ffmpeg_utils.configure_ffmpeg()
+        ffmpeg_utils.configure_ffmpeg()
+        assert ffmpeg_utils.get_ffmpeg_exe()
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from job_queue import JobQueue, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED
+
+
+class TestJobQueue:
+    """Tests for the concurrent job queue."""
+
+    def test_runs_jobs_and_collects_results(self):
+        """Test that every job runs and its return value is stored."""
+        queue = JobQueue(max_workers=3)
+        jobs = [queue.submit(f"url{i}", lambda job, i=i: i * 2, platform="twitter") for i in range(5)]
+        assert queue.wait(timeout=10)
+        assert [job.result for job in jobs] == [0, 2, 4, 6, 8]
+        assert all(job.state == JOB_SUCCEEDED for job in jobs)
+        queue.shutdown()
+
+    def test_failed_job_records_error(self):
+        """Test that an exception marks the job failed without stopping the queue."""
+        queue = JobQueue(max_workers=1)
+
+        def boom(job):
+            raise ValueError("boom")
+
+        failed = queue.submit("bad", boom)
+        ok = queue.submit("good", lambda job: "done")
+        queue.shutdown()
+        assert failed.state == JOB_FAILED
+        assert isinstance(failed.error, ValueError)
+        assert ok.result == "done"
+
+    def test_global_and_platform_limits(self):
+        """Test that neither the worker cap nor a platform cap is exceeded."""
+        queue = JobQueue(max_workers=3, platform_limits={"twitter": 1, "pinterest": 2})
+        lock = threading.Lock()
+        running = {"twitter": 0, "pinterest": 0, "total": 0}
+        peaks = {"twitter": 0, "pinterest": 0, "total": 0}
+
+        def work(job):
+            with lock:
+                for key in (job.platform, "total"):
+                    running[key] += 1
+                    peaks[key] = max(peaks[key], running[key])
+            time.sleep(0.05)
+            with lock:
+                for key in (job.platform, "total"):
+                    running[key] -= 1
+
+        for i in range(4):
+            queue.submit(f"t{i}", work, platform="twitter")
+            queue.submit(f"p{i}", work, platform="pinterest")
+        queue.shutdown()
+
+        assert peaks["twitter"] == 1
+        assert peaks["pinterest"] == 2
+        assert peaks["total"] <= 3
+
+    def test_capped_platform_does_not_starve_others(self):
+        """Test that jobs for a free platform run while another platform is at its cap."""
+        queue = JobQueue(max_workers=2, platform_limits={"instagram": 1})
+        release = threading.Event()
+
+        slow = [queue.submit(f"i{i}", lambda job: release.wait(10), platform="instagram") for i in range(3)]
+        fast = queue.submit("t", lambda job: "fast", platform="twitter")
+
+        assert fast.wait(timeout=5)
+        assert fast.result == "fast"
+        assert slow[1].state == JOB_QUEUED
+        release.set()
+        queue.shutdown()
+
+    def test_state_transitions_reported(self):
+        """Test that the callback sees queued, running and finished states in order."""
+        seen = []
+        lock = threading.Lock()
+
+        def record(job):
+            with lock:
+                seen.append(job.state)
+
+        queue = JobQueue(max_workers=1, on_state_change=record)
+        queue.submit("url", lambda job: None)
+        queue.shutdown()
+        assert seen == [JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED]
+
+    def test_submit_after_shutdown_raises(self):
+        """Test that a shut down queue rejects new jobs."""
+        queue = JobQueue()
+        queue.shutdown()
+        with pytest.raises(RuntimeError):
+            queue.submit("url", lambda job: None)
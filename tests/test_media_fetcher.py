@@ -0,0 +1,332 @@
+import os
+import re
+import socket
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import media_fetcher
+from media_fetcher import FetchError, MediaFetcher
+from media_stream import TeeDownload
+from platforms import TwitterDownloader
+
+
+URL = "https://x.com/user/status/123"
+
+# Delay before each response and bytes per second sent on each connection
+LATENCY = 0.05
+THROTTLE = 512 * 1024
+# Read timeout of the fetchers under test; a stalled response outlasts it
+TIMEOUT = 1
+
+
+@pytest.fixture
+def media_server():
+    """
+    A local keep-alive HTTP server with injected latency and a per-connection
+    throughput limit. Serves the files in its dict, honours Range requests
+    unless ranges is False, and counts the connections and requests it gets.
+    faults maps the first byte of a range (None for a request without Range)
+    to (bytes, "stall" or "reset"): the next such response stops after that
+    many bytes and either goes silent past the read timeout or hangs up.
+    """
+    files, redirects, faults = {}, {}, {}
+    stats = {"connections": 0, "requests": [], "ranges": True}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            with lock:
+                stats["connections"] += 1
+
+        def do_GET(self):
+            time.sleep(LATENCY)
+            with lock:
+                stats["requests"].append((self.path, self.headers.get("Range")))
+            if self.path in redirects:
+                self.send_response(302)
+                self.send_header("Location", redirects[self.path])
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            data = files.get(self.path)
+            if data is None:
+                self.send_error(404)
+                return
+            match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range") or "")
+            with lock:
+                fault = faults.pop(int(match[1]) if match else None, None)
+            if match and stats["ranges"]:
+                first = int(match[1])
+                last = min(int(match[2]) if match[2] else len(data) - 1, len(data) - 1)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {first}-{last}/{len(data)}")
+                body = data[first:last + 1]
+            else:
+                self.send_response(200)
+                body = data
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            chunk = THROTTLE // 20
+            for offset in range(0, len(body), chunk):
+                if fault is not None and offset + chunk > fault[0]:
+                    self.wfile.write(body[offset:fault[0]])
+                    self.wfile.flush()
+                    if fault[1] == "stall":
+                        time.sleep(TIMEOUT + 0.5)
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    return
+                self.wfile.write(body[offset:offset + chunk])
+                time.sleep(0.05)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    # Aborted fetches hang up mid-body; that's expected, not worth a traceback
+    server.handle_error = lambda request, client_address: None
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.files, server.redirects, server.faults, server.stats = files, redirects, faults, stats
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher():
+    """A fetcher splitting anything over 256 KiB into 128 KiB segments."""
+    fetcher = MediaFetcher(timeout=TIMEOUT, segment_bytes=128 * 1024, parallel_min_bytes=256 * 1024)
+    yield fetcher
+    fetcher.close()
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _assert_counted_once(progress, size):
+    """Progress only ever grows and ends at the file size, so no byte was counted twice."""
+    done = [value for value, _ in progress]
+    assert done == sorted(set(done)) and done[-1] == size
+
+
+class TestMediaFetcher:
+    """Tests for the pooled, ranged HTTP media fetcher."""
+
+    def test_parallel_segments_reassembled(self, temp_dir, media_server, fetcher):
+        """Test that a large file is fetched as Range segments and reassembled in place."""
+        data = os.urandom(1024 * 1024 + 1000)
+        media_server.files["/video.mp4"] = data
+        path = os.path.join(temp_dir, "video.mp4")
+        progress = []
+
+        result = fetcher.fetch(media_server.base_url + "/video.mp4", path,
+                               on_progress=lambda done, total: progress.append((done, total)))
+
+        assert _read(path) == data
+        assert result.bytes == len(data) and result.segments == 9
+        assert progress[-1] == (len(data), len(data))
+        ranges = [byte_range for _, byte_range in media_server.stats["requests"]]
+        assert ranges[0] == "bytes=0-131071" and ranges[-1] is not None
+        # The first request's connection plus three range workers
+        assert media_server.stats["connections"] <= fetcher.max_parallel
+
+    def test_parallel_faster_than_one_connection(self, temp_dir, media_server, fetcher):
+        """Test that parallel ranges beat a single throttled connection."""
+        media_server.files["/video.mp4"] = os.urandom(1024 * 1024)
+        url = media_server.base_url + "/video.mp4"
+
+        sequential = fetcher.fetch(url, os.path.join(temp_dir, "sequential.mp4"), parallel=False)
+        parallel = fetcher.fetch(url, os.path.join(temp_dir, "parallel.mp4"))
+
+        assert sequential.segments == 1 and parallel.segments == 8
+        assert parallel.seconds < sequential.seconds * 0.7
+
+    def test_keep_alive_across_fetches(self, temp_dir, media_server, fetcher):
+        """Test that consecutive jobs reuse the pooled connection."""
+        media_server.files["/a.mp4"] = os.urandom(10000)
+        media_server.files["/b.mp4"] = os.urandom(20000)
+
+        first = fetcher.fetch(media_server.base_url + "/a.mp4", os.path.join(temp_dir, "a.mp4"))
+        second = fetcher.fetch(media_server.base_url + "/b.mp4", os.path.join(temp_dir, "b.mp4"))
+
+        assert first.connections_reused == 0 and second.connections_reused == 1
+        assert media_server.stats["connections"] == 1
+        assert _read(os.path.join(temp_dir, "b.mp4")) == media_server.files["/b.mp4"]
+
+    def test_stale_connection_retried(self, temp_dir, media_server, fetcher):
+        """Test that a pooled connection closed in the meantime is replaced."""
+        media_server.files["/a.mp4"] = os.urandom(10000)
+        url = media_server.base_url + "/a.mp4"
+        fetcher.fetch(url, os.path.join(temp_dir, "a.mp4"))
+        for connections in fetcher.pool._idle.values():
+            for connection in connections:
+                connection.sock.close()
+
+        fetcher.fetch(url, os.path.join(temp_dir, "again.mp4"))
+
+        assert _read(os.path.join(temp_dir, "again.mp4")) == media_server.files["/a.mp4"]
+        assert media_server.stats["connections"] == 2
+
+    def test_server_without_ranges(self, temp_dir, media_server, fetcher):
+        """Test that a server ignoring Range is read in one stream."""
+        data = os.urandom(512 * 1024)
+        media_server.files["/video.mp4"] = data
+        media_server.stats["ranges"] = False
+        path = os.path.join(temp_dir, "video.mp4")
+
+        result = fetcher.fetch(media_server.base_url + "/video.mp4", path)
+
+        assert result.segments == 1 and _read(path) == data
+
+    def test_redirect_followed(self, temp_dir, media_server, fetcher):
+        """Test that a redirect to the media URL is followed."""
+        media_server.files["/video.mp4"] = os.urandom(300 * 1024)
+        media_server.redirects["/watch"] = "/video.mp4"
+        path = os.path.join(temp_dir, "video.mp4")
+
+        fetcher.fetch(media_server.base_url + "/watch", path)
+
+        assert _read(path) == media_server.files["/video.mp4"]
+
+    @pytest.mark.parametrize("mode", ["stall", "reset"])
+    def test_interrupted_range_resumed(self, temp_dir, media_server, fetcher, mode):
+        """Test that a range cut off partway is resumed from the first byte not yet written."""
+        data = os.urandom(1024 * 1024)
+        media_server.files["/video.mp4"] = data
+        media_server.faults[256 * 1024] = (100 * 1024, mode)
+        path = os.path.join(temp_dir, "video.mp4")
+        progress = []
+
+        result = fetcher.fetch(media_server.base_url + "/video.mp4", path,
+                               on_progress=lambda done, total: progress.append((done, total)))
+
+        assert _read(path) == data and result.bytes == len(data)
+        _assert_counted_once(progress, len(data))
+        resumed = [byte_range for _, byte_range in media_server.stats["requests"]
+                   if byte_range and byte_range.endswith("-393215")]
+        assert resumed[0] == "bytes=262144-393215"
+        # Resumed after what reached the file, which is at most what the server sent
+        resumed_from = int(resumed[1][len("bytes="):].split("-")[0])
+        assert 256 * 1024 < resumed_from <= 356 * 1024
+
+    @pytest.mark.parametrize("mode", ["stall", "reset"])
+    def test_interrupted_stream_resumed(self, temp_dir, media_server, fetcher, mode):
+        """Test that a sequential download cut off partway carries on in order."""
+        data = os.urandom(300 * 1024)
+        media_server.files["/video.mp4"] = data
+        media_server.faults[None] = (100 * 1024, mode)
+        path = os.path.join(temp_dir, "video.mp4")
+        progress = []
+
+        fetcher.fetch(media_server.base_url + "/video.mp4", path, parallel=False,
+                      on_progress=lambda done, total: progress.append((done, total)))
+
+        assert _read(path) == data
+        _assert_counted_once(progress, len(data))
+        _, byte_range = media_server.stats["requests"][-1]
+        resumed_from = int(byte_range[len("bytes="):].split("-")[0])
+        assert byte_range.endswith(f"-{len(data) - 1}") and 0 < resumed_from <= 100 * 1024
+
+    def test_errors(self, temp_dir, media_server, fetcher):
+        """Test HTTP errors, the size limit and stopping."""
+        media_server.files["/video.mp4"] = os.urandom(512 * 1024)
+        url = media_server.base_url + "/video.mp4"
+        path = os.path.join(temp_dir, "video.mp4")
+        stop = threading.Event()
+        stop.set()
+
+        with pytest.raises(FetchError, match="404"):
+            fetcher.fetch(media_server.base_url + "/missing.mp4", path)
+        with pytest.raises(FetchError, match="limit"):
+            fetcher.fetch(url, path, max_bytes=1000)
+        with pytest.raises(FetchError, match="stopped"):
+            fetcher.fetch(url, path, stop=stop)
+        with pytest.raises(FetchError):
+            fetcher.fetch("ftp://example.com/video.mp4", path)
+
+    def test_tee_download_with_fetcher(self, temp_dir, media_server, fetcher):
+        """Test that streaming conversion can download over the fetcher's pool."""
+        data = os.urandom(300 * 1024)
+        media_server.files["/video.mp4"] = data
+        tee = TeeDownload(media_server.base_url + "/video.mp4", os.path.join(temp_dir, "video.mp4"),
+                          fetcher=fetcher)
+
+        read_fd = tee.start()
+        with os.fdopen(read_fd, 'rb') as pipe:
+            piped = pipe.read()
+
+        assert tee.wait() and piped == data
+        assert media_server.stats["requests"] == [("/video.mp4", None)]
+
+    def test_tee_download_resumed(self, temp_dir, media_server, fetcher):
+        """Test that the decoder gets every byte once when the stream is resumed."""
+        data = os.urandom(300 * 1024)
+        media_server.files["/video.mp4"] = data
+        media_server.faults[None] = (100 * 1024, "reset")
+        tee = TeeDownload(media_server.base_url + "/video.mp4", os.path.join(temp_dir, "video.mp4"),
+                          fetcher=fetcher)
+
+        read_fd = tee.start()
+        with os.fdopen(read_fd, 'rb') as pipe:
+            piped = pipe.read()
+
+        assert tee.wait() and piped == data and tee.bytes_done == len(data)
+
+
+class TestDownloaderFetch:
+    """Tests for downloading through the fetcher instead of yt-dlp."""
+
+    def _downloader(self, temp_dir, url):
+        downloader = TwitterDownloader(temp_file=os.path.join(temp_dir, "temp_video.mp4"), http_fetcher=True)
+        downloader.video_info = {"id": "123", "duration": 4.0, "fps": 30, "formats": [
+            {"format_id": "http-832", "ext": "mp4", "width": 320, "height": 180, "fps": 30, "protocol": "https",
+             "url": url, "vcodec": "avc1.64000d"},
+        ]}
+        downloader._video_info_url = URL
+        return downloader
+
+    def test_download_media_fetches_directly(self, temp_dir, media_server):
+        """Test that the job's media comes from the fetcher and yt-dlp isn't run."""
+        data = os.urandom(600 * 1024)
+        media_server.files["/video.mp4"] = data
+        downloader = self._downloader(temp_dir, media_server.base_url + "/video.mp4")
+
+        with patch.object(downloader, '_run_with_retry', side_effect=AssertionError("yt-dlp was called")), \
+                patch.object(downloader, 'convert_to_gif', return_value=True) as convert:
+            assert downloader.download_media(URL, os.path.join(temp_dir, "out.gif"), fps=15)
+
+        convert.assert_called_once()
+        assert _read(downloader.temp_file) == data
+        assert downloader.job_stats["downloaded_bytes"] == len(data)
+        assert downloader.job_stats["http_fetch"]["bytes"] == len(data)
+
+    def test_failed_fetch_falls_back_to_ytdlp(self, temp_dir, media_server):
+        """Test that yt-dlp downloads the job when the direct URL fails."""
+        downloader = self._downloader(temp_dir, media_server.base_url + "/gone.mp4")
+
+        def fake_download(command, *args):
+            with open(command[command.index('-o') + 1], 'wb') as f:
+                f.write(b"\0" * 1234)
+
+        with patch.object(downloader, '_run_with_retry', side_effect=fake_download) as ytdlp, \
+                patch.object(downloader, 'convert_to_gif', return_value=True):
+            assert downloader.download_media(URL, os.path.join(temp_dir, "out.gif"), fps=15)
+
+        ytdlp.assert_called_once()
+        assert "http_fetch" not in downloader.job_stats
+        assert downloader.job_stats["downloaded_bytes"] == 1234
+
+    def test_shared_fetcher(self):
+        """Test that every job shares one fetcher, and so one connection pool."""
+        assert media_fetcher.get_shared_fetcher() is media_fetcher.get_shared_fetcher(30)
@@ -0,0 +1,189 @@
+import os
+import shutil
+import threading
+import time
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from PIL import Image
+
+import ffmpeg_encoder
+import ffmpeg_utils
+from ffmpeg_encoder import ClipEdit
+from media_stream import TeeDownload
+from platforms import TwitterDownloader
+from progress import STAGE_CONVERT, STAGE_DOWNLOAD
+
+
+URL = "https://x.com/user/status/123"
+
+# Bytes per second the test server sends; the clips take about two seconds
+THROTTLE = 64 * 1024
+
+
+def _make_clip(render_clip, faststart=True):
+    """A four-second H.264 clip's path; without faststart the MP4 index comes after the media data."""
+    return render_clip(size="320x180", duration=4, args=("-movflags", "+faststart") if faststart else ())
+
+
+def _read(path):
+    """The bytes of a file, to be served by media_server."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def media_server():
+    """A local HTTP server sending the files in its dict at THROTTLE bytes per second."""
+    files = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            data = files.get(self.path)
+            if data is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            chunk = THROTTLE // 10
+            for offset in range(0, len(data), chunk):
+                self.wfile.write(data[offset:offset + chunk])
+                time.sleep(0.1)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.files = files
+    server.base_url = f"http://127.0.0.1:{server.server_port}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _streaming_downloader(temp_dir, url, **kwargs):
+    downloader = TwitterDownloader(temp_file=os.path.join(temp_dir, "temp_video.mp4"), stream_convert=True, **kwargs)
+    downloader.video_info = {"id": "123", "duration": 4.0, "fps": 30, "formats": [
+        {"format_id": "http-832", "ext": "mp4", "width": 320, "height": 180, "fps": 30, "protocol": "http",
+         "url": url, "vcodec": "avc1.64000d"},
+    ]}
+    downloader._video_info_url = URL
+    return downloader
+
+
+class TestMediaStream:
+    """Tests for converting progressive downloads while they arrive."""
+
+    def test_tee_download(self, temp_dir, media_server):
+        """Test that the pipe receives exactly the bytes written to the file."""
+        data = os.urandom(150 * 1024)
+        media_server.files["/blob"] = data
+        path = os.path.join(temp_dir, "blob")
+        progress = []
+        tee = TeeDownload(media_server.base_url + "/blob", path,
+                          on_progress=lambda done, total: progress.append((done, total)))
+
+        read_fd = tee.start()
+        with os.fdopen(read_fd, 'rb') as pipe:
+            piped = pipe.read()
+
+        assert tee.wait() and tee.error is None
+        assert piped == data
+        with open(path, 'rb') as f:
+            assert f.read() == data
+        assert progress[-1] == (len(data), len(data))
+
+    def test_tee_download_failure(self, temp_dir, media_server):
+        """Test that an HTTP error is reported and closes the pipe."""
+        tee = TeeDownload(media_server.base_url + "/missing", os.path.join(temp_dir, "blob"))
+
+        read_fd = tee.start()
+        with os.fdopen(read_fd, 'rb') as pipe:
+            assert pipe.read() == b""
+
+        assert not tee.wait()
+        assert tee.error is not None
+
+    def test_convert_overlaps_download(self, temp_dir, media_server, render_clip):
+        """Test that FFmpeg reports frames before the throttled download has finished."""
+        clip = _read(_make_clip(render_clip))
+        media_server.files["/clip.mp4"] = clip
+        # H.264 frames are written as they are encoded; a GIF palette or an
+        # animated WebP is only written once the whole clip has been read
+        output = os.path.join(temp_dir, "out.mp4")
+        downloader = _streaming_downloader(temp_dir, media_server.base_url + "/clip.mp4")
+        events = []
+
+        with patch.object(downloader, '_run_with_retry', side_effect=AssertionError("yt-dlp was called")):
+            assert downloader.download_media(URL, output, events.append, fps=10, edit=ClipEdit(max_width=160),
+                                             output_format="loop_mp4")
+
+        first_frame = min(event.timestamp for event in events if event.stage == STAGE_CONVERT and event.done)
+        download_end = max(event.timestamp for event in events if event.stage == STAGE_DOWNLOAD)
+        assert first_frame < download_end
+        stats = downloader.job_stats["stream_convert"]
+        assert stats["converted"] and stats["download_seconds"] > 1
+        assert downloader.job_stats["downloaded_bytes"] == len(clip)
+        info = ffmpeg_encoder.probe_video(ffmpeg_utils.get_ffmpeg_exe(), output)
+        assert (info["width"], info["fps"]) == (160, 10)
+
+    def test_gif_streamed(self, temp_dir, media_server, render_clip):
+        """Test a GIF encoded from the stream, without yt-dlp and without a second decode."""
+        media_server.files["/clip.mp4"] = _read(_make_clip(render_clip))
+        output = os.path.join(temp_dir, "out.gif")
+        downloader = _streaming_downloader(temp_dir, media_server.base_url + "/clip.mp4")
+
+        with patch.object(downloader, '_run_with_retry', side_effect=AssertionError("yt-dlp was called")), \
+                patch.object(downloader, 'convert_to_gif', side_effect=AssertionError("converted again")):
+            assert downloader.download_media(URL, output, fps=10)
+
+        assert downloader.job_stats["stream_convert"]["converted"]
+        with Image.open(output) as image:
+            assert image.format == "GIF" and image.n_frames == 40
+
+    def test_index_at_end_falls_back_to_file(self, temp_dir, media_server, render_clip):
+        """Test that an MP4 FFmpeg can't decode from a pipe is converted from the finished download."""
+        media_server.files["/clip.mp4"] = _read(_make_clip(render_clip, faststart=False))
+        output = os.path.join(temp_dir, "out.gif")
+        downloader = _streaming_downloader(temp_dir, media_server.base_url + "/clip.mp4")
+
+        with patch.object(downloader, '_run_with_retry', side_effect=AssertionError("yt-dlp was called")):
+            assert downloader.download_media(URL, output, fps=10)
+
+        assert downloader.job_stats["stream_convert"]["converted"] is False
+        with Image.open(output) as image:
+            assert image.format == "GIF" and image.n_frames == 40
+
+    def test_failed_download_falls_back_to_ytdlp(self, temp_dir, media_server, render_clip):
+        """Test that the job is downloaded with yt-dlp when the direct URL fails."""
+        clip = _make_clip(render_clip)
+        output = os.path.join(temp_dir, "out.gif")
+        downloader = _streaming_downloader(temp_dir, media_server.base_url + "/gone.mp4")
+
+        def fake_download(command, *args):
+            shutil.copyfile(clip, command[command.index('-o') + 1])
+
+        with patch.object(downloader, '_run_with_retry', side_effect=fake_download) as ytdlp:
+            assert downloader.download_media(URL, output, fps=10)
+
+        ytdlp.assert_called_once()
+        assert downloader.job_stats["stream_convert"]["converted"] is False
+        with Image.open(output) as image:
+            assert image.n_frames == 40
+
+    def test_only_for_single_pass_encoders(self, temp_dir):
+        """Test that jobs needing the whole file are not streamed."""
+        downloader = _streaming_downloader(temp_dir, "http://127.0.0.1:9/clip.mp4")
+        downloader.select_download_formats(URL, "gif", 15)
+
+        assert downloader._stream_source(URL, "gif") is not None
+        assert downloader._stream_source(URL, "gif", max_bytes=10 ** 6) is None
+        assert downloader._stream_source(URL, "loop_mp4") is None
+        downloader.gif_engine = "numpy"
+        assert downloader._stream_source(URL, "gif") is None
+        downloader.stream_convert = False
+        assert downloader._stream_source(URL, "webp") is None
@@ -0,0 +1,85 @@
+import os
+import pytest
+from unittest.mock import patch, Mock
+
+from metadata_cache import MetadataCache
+from platforms import TwitterDownloader
+
+
+class TestMetadataCache:
+    """Tests for the persistent metadata cache."""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return MetadataCache(tmp_path / "metadata.sqlite", ttl=60, max_entries=3)
+
+    def test_put_and_get(self, cache):
+        """Test storing and retrieving an info dict."""
+        cache.put("twitter", "123", {"fps": 30, "id": "123"})
+        assert cache.get("twitter", "123") == {"fps": 30, "id": "123"}
+        assert cache.get("instagram", "123") is None
+        assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+    def test_ttl_expiry(self, cache):
+        """Test that entries older than the TTL are treated as misses and removed."""
+        with patch('time.time', return_value=1000.0):
+            cache.put("twitter", "123", {"fps": 30})
+        with patch('time.time', return_value=1061.0):
+            assert cache.get("twitter", "123") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self, cache):
+        """Test that the least recently used entry is evicted over the cap."""
+        for i, post_id in enumerate(["a", "b", "c"]):
+            with patch('time.time', return_value=1000.0 + i):
+                cache.put("twitter", post_id, {"id": post_id})
+        # Touch "a" so "b" becomes the least recently used
+        with patch('time.time', return_value=1010.0):
+            cache.get("twitter", "a")
+        with patch('time.time', return_value=1011.0):
+            cache.put("twitter", "d", {"id": "d"})
+
+        with patch('time.time', return_value=1012.0):
+            assert cache.get("twitter", "b") is None
+            assert cache.get("twitter", "a") is not None
+            assert cache.get("twitter", "d") is not None
+        assert len(cache) == 3
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that cached entries survive a new cache instance."""
+        path = tmp_path / "metadata.sqlite"
+        MetadataCache(path).put("pinterest", "42", {"fps": 12})
+        assert MetadataCache(path).get("pinterest", "42") == {"fps": 12}
+
+    def test_hit_skips_yt_dlp(self, cache):
+        """Test that get_video_info does not run yt-dlp on a cache hit."""
+        downloader = TwitterDownloader(metadata_cache=cache)
+        url = "https://x.com/user/status/123"
+        mock_result = Mock(returncode=0, stdout='{"fps": 30}', stderr="")
+
+        with patch('subprocess.run', return_value=mock_result) as mock_run:
+            assert downloader.get_video_info(url) == (30, "123")
+            assert downloader.get_video_info(url) == (30, "123")
+
+        assert mock_run.call_count == 1
+        assert downloader.get_cached_info(url) == {"fps": 30}
+        assert cache.hits == 1
+
+    def test_hits_do_not_extend_ttl(self, cache):
+        """Test that a post requested over and over is still re-extracted once its entry expires."""
+        downloader = TwitterDownloader(metadata_cache=cache)
+        url = "https://x.com/user/status/123"
+        mock_result = Mock(returncode=0, stdout='{"fps": 30}', stderr="")
+
+        with patch('subprocess.run', return_value=mock_result) as mock_run:
+            for now in (1000.0, 1030.0, 1059.0, 1061.0):
+                with patch('time.time', return_value=now):
+                    downloader.get_video_info(url)
+
+        assert mock_run.call_count == 2
+
+    def test_urls_without_id_are_not_cached(self, cache):
+        """Test that fallback IDs never become cache keys."""
+        downloader = TwitterDownloader(metadata_cache=cache)
+        assert downloader.get_cache_key("https://x.com/user") is None
+        assert downloader.get_cache_key("https://x.com/user/status/9") == ("twitter", "9")
@@ -0,0 +1,121 @@
+import os
+import pytest
+from unittest.mock import patch
+
+from output_cache import OutputCache
+from platforms import TwitterDownloader
+
+
+URL = "https://x.com/user/status/123"
+
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+class TestOutputCache:
+    """Tests for the finished-artifact output cache."""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return OutputCache(tmp_path / "cache", max_bytes=100)
+
+    def test_key_depends_on_all_fields(self):
+        """Test that every key field changes the content address."""
+        base = OutputCache.make_key("twitter", "1", "gif", 15, {"engine": "moviepy"})
+        assert base == OutputCache.make_key("twitter", "1", "gif", 15, {"engine": "moviepy"})
+        assert base != OutputCache.make_key("twitter", "1", "gif", 30, {"engine": "moviepy"})
+        assert base != OutputCache.make_key("twitter", "1", "mp4", 15, {"engine": "moviepy"})
+        assert base != OutputCache.make_key("twitter", "1", "gif", 15, {"engine": "ffmpeg"})
+        assert base != OutputCache.make_key("instagram", "1", "gif", 15, {"engine": "moviepy"})
+
+    def test_put_and_get(self, cache, tmp_path):
+        """Test that a stored artifact is materialized on a hit."""
+        source = str(tmp_path / "out.gif")
+        _write(source, b"GIF89a-data")
+        key = OutputCache.make_key("twitter", "1", "gif", 15)
+        cache.put(key, source)
+
+        target = str(tmp_path / "copy.gif")
+        assert cache.get(key, target)
+        with open(target, 'rb') as f:
+            assert f.read() == b"GIF89a-data"
+        assert not cache.get(OutputCache.make_key("twitter", "2", "gif", 15), target)
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_integrity_check_discards_corrupt_artifact(self, cache, tmp_path):
+        """Test that a tampered artifact is treated as a miss and removed."""
+        source = str(tmp_path / "out.gif")
+        _write(source, b"GIF89a-data")
+        key = OutputCache.make_key("twitter", "1", "gif", 15)
+        cache.put(key, source)
+        _write(os.path.join(cache.directory, key + ".gif"), b"GIF89a-dat!")
+
+        assert not cache.get(key, str(tmp_path / "copy.gif"))
+        assert cache.total_bytes() == 0
+
+    def test_lru_eviction_over_budget(self, cache, tmp_path):
+        """Test that the least recently used artifacts are evicted over the byte budget."""
+        keys = []
+        for i in range(3):
+            source = str(tmp_path / f"out{i}.gif")
+            _write(source, bytes(40))
+            keys.append(OutputCache.make_key("twitter", str(i), "gif", 15))
+            with patch('time.time', return_value=1000.0 + i):
+                cache.put(keys[-1], source)
+
+        assert cache.total_bytes() == 80
+        assert not cache.get(keys[0], str(tmp_path / "a.gif"))
+        assert cache.get(keys[1], str(tmp_path / "b.gif"))
+        assert cache.get(keys[2], str(tmp_path / "c.gif"))
+
+    def test_miss_keeps_unrelated_output_file(self, cache, tmp_path):
+        """Test that a failed miss leaves the user's existing file alone but never writes through a cache link."""
+        downloader = TwitterDownloader(temp_file=str(tmp_path / "temp.mp4"), output_cache=cache)
+        output = str(tmp_path / "result.gif")
+        _write(output, b"GIF89a-mine")
+
+        with patch.object(downloader, '_download_media', return_value=False):
+            assert not downloader.download_media(URL, output, fps=15)
+        with open(output, 'rb') as f:
+            assert f.read() == b"GIF89a-mine"
+        assert not cache.is_linked(output)
+
+        # A hardlink from an earlier hit is unlinked, so the cached artifact stays intact
+        key = OutputCache.make_key("twitter", "9", "gif", 15)
+        cache.put(key, output)
+        assert cache.get(key, output) and cache.is_linked(output)
+
+        def fake_download(url, output_file, *args):
+            _write(output_file, b"GIF89a-new")
+            return True
+
+        with patch.object(downloader, '_download_media', side_effect=fake_download):
+            assert downloader.download_media(URL, output, fps=15)
+        assert cache.get(key, str(tmp_path / "check.gif"))
+        with open(str(tmp_path / "check.gif"), 'rb') as f:
+            assert f.read() == b"GIF89a-mine"
+
+    def test_download_media_served_from_cache(self, cache, tmp_path):
+        """Test that a repeat job skips download and conversion entirely."""
+        downloader = TwitterDownloader(temp_file=str(tmp_path / "temp.mp4"), output_cache=cache)
+        output = str(tmp_path / "result.gif")
+
+        def fake_download(url, output_file, *args):
+            _write(output_file, b"GIF89a")
+            return True
+
+        with patch.object(downloader, '_download_media', side_effect=fake_download) as mock_download:
+            assert downloader.download_media(URL, output, fps=15)
+            assert downloader.job_stats["output_cache"] == "miss"
+            os.remove(output)
+            assert downloader.download_media(URL, output, fps=15)
+            assert downloader.job_stats["output_cache"] == "hit"
+            assert downloader.download_media(URL, output, fps=30)
+            assert downloader.download_media(URL, output, fps=30, auto_fps=True)
+
+        assert mock_download.call_count == 3
+        with open(output, 'rb') as f:
+            assert f.read() == b"GIF89a"
@@ -0,0 +1,91 @@
+import os
+import numpy as np
+import pytest
+from PIL import Image
+
+import ffmpeg_encoder
+import ffmpeg_utils
+from frame_delta import DeltaFrames
+from frame_pipeline import stream_to_gif
+from parallel_gif import plan_segments, encode_parallel
+from quantizer import Quantizer, DITHER_ORDERED
+
+
+@pytest.fixture
+def clip(render_clip):
+    """A three-second synthetic clip rendered with FFmpeg's test source."""
+    return render_clip(duration=3)
+
+
+def _quantizer(ffmpeg_exe: str, clip: str) -> Quantizer:
+    reader = ffmpeg_encoder.RawFrameReader(ffmpeg_encoder.build_rawvideo_command(ffmpeg_exe, clip, 2))
+    try:
+        width, height = reader.start()
+        frames = (np.frombuffer(f, dtype=np.uint8).reshape(height, width, 3) for f in reader.frames())
+        return Quantizer.from_frames(frames, colors=255)
+    finally:
+        reader.close()
+
+
+def _frames(path: str):
+    gif = Image.open(path)
+    frames = []
+    for index in range(gif.n_frames):
+        gif.seek(index)
+        frames.append((np.array(gif.convert("RGB")), gif.info["duration"]))
+    return frames
+
+
+class TestParallelGif:
+    """Tests for segmented multi-process GIF encoding."""
+
+    def test_plan_segments(self):
+        """Test that segments cover every frame once, with an open-ended last segment."""
+        assert plan_segments(300, 1) == [(0, None)]
+        assert plan_segments(None, 8) == [(0, None)]
+        assert plan_segments(40, 8) == [(0, None)]
+        segments = plan_segments(300, 2)
+        assert len(segments) == 8
+        assert segments[0][0] == 0 and segments[-1][1] is None
+        for (first, count), (next_first, _) in zip(segments, segments[1:]):
+            assert first + count == next_first
+
+    @pytest.mark.parametrize("delta", [False, True])
+    def test_one_worker_matches_serial_bytes(self, clip, temp_dir, delta):
+        """Test that a one-worker parallel encode is byte-identical to the serial pipeline."""
+        ffmpeg_exe = ffmpeg_utils.get_ffmpeg_exe()
+        quantizer = _quantizer(ffmpeg_exe, clip)
+        deltas = DeltaFrames(quantizer.transparent_index) if delta else None
+        serial = os.path.join(temp_dir, "serial.gif")
+        parallel = os.path.join(temp_dir, "parallel.gif")
+
+        reader = ffmpeg_encoder.RawFrameReader(ffmpeg_encoder.build_rawvideo_command(ffmpeg_exe, clip, 10))
+        try:
+            size = reader.start()
+            stream_to_gif(reader.frames(), size, serial, 10, quantizer=quantizer, dither=DITHER_ORDERED, delta=deltas)
+        finally:
+            reader.close()
+        assert encode_parallel(ffmpeg_exe, clip, parallel, 10, quantizer, DITHER_ORDERED, 30, workers=1,
+                               delta=delta) == 30
+
+        with open(serial, 'rb') as a, open(parallel, 'rb') as b:
+            assert a.read() == b.read()
+
+    def test_segments_stitch_into_one_gif(self, clip, temp_dir):
+        """Test that multi-segment output has the serial frames, in order, with the same timing."""
+        ffmpeg_exe = ffmpeg_utils.get_ffmpeg_exe()
+        quantizer = _quantizer(ffmpeg_exe, clip)
+        serial = os.path.join(temp_dir, "serial.gif")
+        parallel = os.path.join(temp_dir, "parallel.gif")
+        counts = []
+
+        encode_parallel(ffmpeg_exe, clip, serial, 20, quantizer, total_frames=60, workers=1)
+        encode_parallel(ffmpeg_exe, clip, parallel, 20, quantizer, total_frames=60, workers=2,
+                        on_frame=counts.append, delta=True)
+
+        assert counts == [30, 60]
+        serial_frames, parallel_frames = _frames(serial), _frames(parallel)
+        assert len(parallel_frames) == len(serial_frames) == 60
+        for (expected, delay), (actual, parallel_delay) in zip(serial_frames, parallel_frames):
+            assert parallel_delay == delay
+            assert np.abs(actual.astype(int) - expected.astype(int)).mean() < 2
@@ -0,0 +1,115 @@
+import os
+import shutil
+from unittest.mock import patch
+from PIL import Image
+
+import ffmpeg_encoder
+import ffmpeg_utils
+from ffmpeg_encoder import ClipEdit
+from platforms import TwitterDownloader, PinterestDownloader
+
+
+URL = "https://x.com/user/status/123"
+
+
+def _make_gif(path):
+    """A three-frame GIF written by Pillow."""
+    frames = [Image.new("P", (32, 24), color) for color in (1, 2, 3)]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=100, loop=0, format="GIF")
+
+
+# FFmpeg options that make render_clip's test clip an H.264 MP4
+H264 = ("-c:v", "libx264")
+
+
+def _download(downloader, source, output, **kwargs):
+    """Run download_media with yt-dlp replaced by a copy of source into the temp file."""
+    def fake_download(command, *args):
+        shutil.copyfile(source, command[command.index('-o') + 1])
+
+    with patch.object(downloader, '_run_with_retry', side_effect=fake_download):
+        return downloader.download_media(URL, output, **kwargs)
+
+
+class TestPassthrough:
+    """Tests for skipping the re-encode when the download is already in the requested format."""
+
+    def test_sniff_format(self, temp_dir):
+        """Test that formats are recognized by content whatever the file is called."""
+        gif = os.path.join(temp_dir, "really_a_gif.mp4")
+        _make_gif(gif)
+        webp = os.path.join(temp_dir, "anim")
+        Image.new("RGB", (8, 8)).save(webp, format="WEBP")
+        junk = os.path.join(temp_dir, "junk.gif")
+        with open(junk, 'wb') as f:
+            f.write(b"<html>not found</html>")
+
+        assert ffmpeg_encoder.sniff_format(gif) == "gif"
+        assert ffmpeg_encoder.sniff_format(webp) == "webp"
+        assert ffmpeg_encoder.sniff_format(junk) is None
+        assert ffmpeg_encoder.sniff_format(os.path.join(temp_dir, "missing")) is None
+
+    def test_probe_codec(self, render_clip):
+        """Test that probe_video reports the video codec and pixel format."""
+        clip = render_clip(args=H264)
+
+        info = ffmpeg_encoder.probe_video(ffmpeg_utils.get_ffmpeg_exe(), clip)
+
+        assert ffmpeg_encoder.sniff_format(clip) == "mp4"
+        assert (info["codec"], info["pix_fmt"]) == ("h264", "yuv420p")
+
+    def test_gif_source_copied(self, temp_dir):
+        """Test that a GIF saved under the .mp4 temp name is delivered byte for byte."""
+        source = os.path.join(temp_dir, "source.gif")
+        output = os.path.join(temp_dir, "out.gif")
+        _make_gif(source)
+        downloader = PinterestDownloader(temp_file=os.path.join(temp_dir, "temp_video.mp4"))
+
+        with patch.object(downloader, 'convert_to_gif') as convert:
+            assert _download(downloader, source, output, fps=15)
+
+        convert.assert_not_called()
+        with open(source, 'rb') as a, open(output, 'rb') as b:
+            assert a.read() == b.read()
+        assert downloader.job_stats["source_format"] == "gif"
+        assert downloader.job_stats["passthrough"] == "copy"
+
+    def test_gif_source_over_target_converted(self, temp_dir):
+        """Test that a GIF larger than max_bytes still goes through the size-targeted conversion."""
+        source = os.path.join(temp_dir, "source.gif")
+        _make_gif(source)
+        downloader = PinterestDownloader(temp_file=os.path.join(temp_dir, "temp_video.mp4"))
+
+        with patch.object(downloader, 'convert_to_gif', return_value=True) as convert:
+            assert _download(downloader, source, os.path.join(temp_dir, "out.gif"), fps=15, max_bytes=10)
+
+        convert.assert_called_once()
+        assert "passthrough" not in downloader.job_stats
+
+    def test_h264_source_remuxed(self, temp_dir, render_clip):
+        """Test that an H.264 MP4 becomes a looping MP4 by remuxing, keeping every frame."""
+        source = render_clip("source.mp4", rate=15, args=H264)
+        output = os.path.join(temp_dir, "out.mp4")
+        downloader = TwitterDownloader(temp_file=os.path.join(temp_dir, "temp_video.mp4"))
+
+        with patch.object(downloader, 'convert_animation') as convert:
+            assert _download(downloader, source, output, fps=15, output_format="loop_mp4")
+
+        convert.assert_not_called()
+        assert downloader.job_stats["passthrough"] == "remux"
+        info = ffmpeg_encoder.probe_video(ffmpeg_utils.get_ffmpeg_exe(), output)
+        assert (info["codec"], info["width"], info["fps"]) == ("h264", 160, 15)
+
+    def test_faster_or_edited_source_converted(self, temp_dir, render_clip):
+        """Test that a source above the FPS setting, or any clip edit, forces a re-encode."""
+        source = render_clip("source.mp4", rate=30, args=H264)
+        output = os.path.join(temp_dir, "out.mp4")
+        downloader = TwitterDownloader(temp_file=os.path.join(temp_dir, "temp_video.mp4"))
+
+        with patch.object(downloader, 'convert_animation', return_value=True) as convert:
+            assert _download(downloader, source, output, fps=15, output_format="loop_mp4")
+            assert _download(downloader, source, output, fps=30, output_format="loop_mp4",
+                             edit=ClipEdit(start=0.5))
+
+        assert convert.call_count == 2
+        assert "passthrough" not in downloader.job_stats
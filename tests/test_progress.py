@@ -0,0 +1,153 @@
+import os
+import subprocess
+import sys
+import time
+import pytest
+from unittest.mock import patch, Mock
+
+from platforms import TwitterDownloader, NetworkError, ENGINE_IN_PROCESS
+from progress import (
+    ProgressEvent,
+    ProgressReporter,
+    STAGE_DOWNLOAD,
+    STAGE_CONVERT,
+    PROGRESS_PREFIX,
+    parse_ytdlp_progress_line,
+    event_from_ytdlp_hook,
+    format_progress,
+)
+
+
+class TestProgressParsing:
+    """Tests for turning yt-dlp output into progress events."""
+
+    def test_parse_progress_line(self):
+        """Test parsing a templated progress line, including unknown fields."""
+        event = parse_ytdlp_progress_line(f"{PROGRESS_PREFIX} 1048576 NA 4194304 524288.5 6\n")
+        assert event.stage == STAGE_DOWNLOAD
+        assert event.done == 1048576
+        assert event.total == 4194304  # falls back to the estimate
+        assert event.speed == 524288.5
+        assert event.eta == 6
+        assert event.fraction == 0.25
+
+        assert parse_ytdlp_progress_line("[download] Destination: temp_video.mp4") is None
+        assert parse_ytdlp_progress_line(f"{PROGRESS_PREFIX} NA NA NA NA NA") is None
+
+    def test_event_from_hook(self):
+        """Test building events from in-process yt-dlp progress hooks."""
+        event = event_from_ytdlp_hook({"status": "downloading", "downloaded_bytes": 10, "total_bytes": 40,
+                                       "speed": 5.0, "eta": 6})
+        assert (event.done, event.total, event.speed, event.eta) == (10, 40, 5.0, 6)
+        assert event_from_ytdlp_hook({"status": "error"}) is None
+
+    def test_reporter_tracks_stalls(self):
+        """Test that repeated events without forward progress report how long progress stalled."""
+        events = []
+        reporter = ProgressReporter(events.append)
+        with patch('progress.time.monotonic', side_effect=[100.0, 112.0, 113.0]):
+            reporter.emit(ProgressEvent(STAGE_DOWNLOAD, 10, 100))
+            reporter.emit(ProgressEvent(STAGE_DOWNLOAD, 10, 100))
+            reporter.emit(ProgressEvent(STAGE_CONVERT, 1, 20))
+
+        assert [e.stalled_for for e in events] == [0, 12.0, 0]
+        assert "no progress for 12s" in format_progress(events[1])
+        assert format_progress(events[2]) == "Converting to GIF... frame 1 of 20"
+        assert not ProgressReporter(None)
+
+    def test_convert_label_follows_output_format(self):
+        """Test that convert progress names the format being encoded."""
+        events = []
+        reporter = ProgressReporter(events.append, "webp")
+        reporter.emit(ProgressEvent(STAGE_DOWNLOAD, 10, 100))
+        reporter.emit(ProgressEvent(STAGE_CONVERT, 3, 20))
+        reporter.emit(ProgressEvent(STAGE_CONVERT, 4, 20, output_format="loop_mp4"))
+
+        assert events[0].output_format is None
+        assert format_progress(events[1]) == "Converting to WebP... frame 3 of 20"
+        assert events[1].to_dict()["output_format"] == "webp"
+        assert format_progress(events[2]) == "Converting to looping MP4... frame 4 of 20"
+
+
+class TestStallHeartbeat:
+    """Tests for reporting a download that has stopped receiving bytes."""
+
+    def test_stalled_download_keeps_reporting(self, temp_dir):
+        """Test that a download that goes quiet repeats its last event with a growing stalled_for."""
+        output = os.path.join(temp_dir, "out.mp4")
+        downloader = TwitterDownloader(engine=ENGINE_IN_PROCESS)
+        engine = Mock()
+        events = []
+
+        def stalled_download(url, target, fmt, max_filesize, progress_hook):
+            progress_hook({"status": "downloading", "downloaded_bytes": 10, "total_bytes": 100, "speed": 5.0})
+            time.sleep(0.5)
+            open(target, 'w').close()
+
+        engine.download.side_effect = stalled_download
+        with patch('ytdlp_engine.get_shared_engine', return_value=engine), \
+             patch('progress.HEARTBEAT_INTERVAL', 0.1):
+            assert downloader.download_media("https://x.com/user/status/123", output, events.append,
+                                             skip_conversion=True)
+
+        assert events[0].stalled_for == 0 and events[0].speed == 5.0
+        heartbeats = events[1:]
+        assert len(heartbeats) >= 2
+        assert all(e.done == 10 and e.total == 100 and e.speed is None for e in heartbeats)
+        stalls = [e.stalled_for for e in heartbeats]
+        assert stalls == sorted(stalls) and stalls[-1] > stalls[0] > 0
+        assert events[-1].to_dict()["stalled_for"] >= 0.3
+
+    def test_silent_before_first_event(self):
+        """Test that a stage with no events yet is reported at zero progress."""
+        events = []
+        reporter = ProgressReporter(events.append)
+        with reporter.heartbeat(STAGE_DOWNLOAD, interval=0.05):
+            time.sleep(0.2)
+
+        assert events and all(e.stage == STAGE_DOWNLOAD and e.done == 0 for e in events)
+        assert events[-1].stalled_for > events[0].stalled_for > 0
+        with ProgressReporter(None).heartbeat(STAGE_DOWNLOAD):
+            pass
+
+
+class TestStreamingSubprocess:
+    """Tests for streaming yt-dlp executable output line by line."""
+
+    def test_lines_are_delivered_as_printed(self):
+        """Test that each stdout line reaches the handler and the result matches subprocess.run."""
+        downloader = TwitterDownloader(max_retries=1, timeout=10)
+        lines = []
+        code = "import sys\nfor i in range(3):\n    print(f'line {i}', flush=True)\nprint('oops', file=sys.stderr)"
+        result = downloader._run_with_retry([sys.executable, "-c", code], "test", lines.append)
+
+        assert [line.strip() for line in lines] == ["line 0", "line 1", "line 2"]
+        assert result.returncode == 0
+        assert result.stdout.splitlines() == ["line 0", "line 1", "line 2"]
+        assert result.stderr.strip() == "oops"
+
+    def test_silent_process_times_out(self):
+        """Test that a process printing nothing for the timeout is killed and reported."""
+        downloader = TwitterDownloader(max_retries=1, timeout=1)
+        with pytest.raises(NetworkError):
+            downloader._run_with_retry([sys.executable, "-c", "import time; time.sleep(30)"], "test", print)
+
+    def test_download_requests_progress_output(self, temp_dir):
+        """Test that a progress_callback switches yt-dlp to templated, line-buffered progress."""
+        output = os.path.join(temp_dir, "out.mp4")
+        downloader = TwitterDownloader()
+        events = []
+
+        def fake_streaming(command, on_output_line):
+            on_output_line(f"{PROGRESS_PREFIX} 50 100 NA 10 5\n")
+            on_output_line("[download] 100% of 100B\n")
+            open(output, 'w').close()
+            return subprocess.CompletedProcess(command, 0, "", "")
+
+        with patch.object(downloader, '_run_streaming', side_effect=fake_streaming) as mock_streaming:
+            assert downloader.download_media("https://x.com/user/status/123", output, events.append,
+                                             skip_conversion=True)
+
+        command = mock_streaming.call_args[0][0]
+        assert '--newline' in command and '--progress-template' in command
+        assert len(events) == 1 and events[0].fraction == 0.5
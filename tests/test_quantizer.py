@@ -0,0 +1,92 @@
+import io
+import os
+import numpy as np
+import pytest
+from PIL import Image
+
+from gif_writer import GifWriter
+from quantizer import Quantizer, DITHER_MODES, DITHER_NONE, DITHER_ORDERED, DITHER_FLOYD_STEINBERG
+from platforms import TwitterDownloader, GIF_ENGINE_NUMPY
+
+
+def _gradient(height: int = 48, width: int = 96) -> np.ndarray:
+    y, x = np.mgrid[0:height, 0:width]
+    return np.stack([x * 255 // (width - 1), y * 255 // (height - 1), (x + y) % 256], axis=-1).astype(np.uint8)
+
+
+def _blur(image: np.ndarray) -> np.ndarray:
+    """Average 4x4 blocks, roughly what the eye does with dithering."""
+    height, width = image.shape[:2]
+    return image.astype(np.float64).reshape(height // 4, 4, width // 4, 4, 3).mean(axis=(1, 3))
+
+
+class TestQuantizer:
+    """Tests for the NumPy median-cut quantizer."""
+
+    def test_few_colors_are_kept_exactly(self):
+        """Test that a frame with fewer colors than the palette maps back losslessly."""
+        frame = np.zeros((8, 8, 3), dtype=np.uint8)
+        frame[:4] = (255, 0, 0)
+        frame[4:, :4] = (10, 200, 30)
+        quantizer = Quantizer.from_frames([frame])
+        assert len(quantizer.palette) == 3
+        for dither in DITHER_MODES:
+            assert np.array_equal(quantizer.palette[quantizer.quantize(frame, dither)], frame)
+
+    def test_palette_is_capped(self):
+        """Test that the palette holds at most the requested number of colors."""
+        quantizer = Quantizer.from_frames([_gradient()], colors=16)
+        assert len(quantizer.palette) == 16
+        indices = quantizer.quantize(_gradient(), DITHER_NONE)
+        assert indices.dtype == np.uint8 and indices.max() < 16
+
+    def test_dithering_reduces_banding(self):
+        """Test that both dither modes track a gradient more closely than plain mapping."""
+        frame = _gradient()
+        quantizer = Quantizer.from_frames([frame], colors=16)
+        errors = {
+            dither: np.abs(_blur(quantizer.palette[quantizer.quantize(frame, dither)]) - _blur(frame)).mean()
+            for dither in DITHER_MODES
+        }
+        assert errors[DITHER_ORDERED] < errors[DITHER_NONE]
+        assert errors[DITHER_FLOYD_STEINBERG] < errors[DITHER_NONE]
+
+    def test_unknown_dither_mode(self):
+        """Test that an unknown dither mode is rejected."""
+        quantizer = Quantizer.from_frames([_gradient()])
+        with pytest.raises(ValueError):
+            quantizer.quantize(_gradient(), "halftone")
+
+    def test_global_palette_round_trip(self):
+        """Test that frames written against a global palette decode to the same indices."""
+        frames = [_gradient(), _gradient()[:, ::-1].copy()]
+        quantizer = Quantizer.from_frames(frames)
+        buffer = io.BytesIO()
+        with GifWriter(buffer, palette=quantizer.palette_bytes) as writer:
+            for frame in frames:
+                writer.add_frame(quantizer.to_image(frame.tobytes(), (96, 48), DITHER_NONE), 10)
+
+        buffer.seek(0)
+        gif = Image.open(buffer)
+        assert gif.n_frames == 2
+        for index, frame in enumerate(frames):
+            gif.seek(index)
+            expected = quantizer.palette[quantizer.quantize(frame, DITHER_NONE)]
+            assert np.array_equal(np.array(gif.convert("RGB")), expected)
+
+    def test_numpy_engine(self, temp_dir, render_clip):
+        """Test a real conversion with the numpy engine on a synthetic clip."""
+        clip = render_clip()
+        output = os.path.join(temp_dir, "out.gif")
+        downloader = TwitterDownloader(gif_engine=GIF_ENGINE_NUMPY, gif_dither=DITHER_FLOYD_STEINBERG)
+        downloader.video_info = {"duration": 1.0}
+        events = []
+
+        assert downloader.convert_to_gif(clip, output, events.append, fps=10)
+
+        assert downloader.job_stats["gif_engine"] == GIF_ENGINE_NUMPY
+        assert events[-1].done == events[-1].total == 10
+        assert Image.open(output).n_frames == 10
+        assert downloader.get_conversion_params() == {
+            "gif_engine": "numpy", "gif_duplicate_threshold": 2.0, "gif_dither": "floyd_steinberg", "gif_delta": True
+        }
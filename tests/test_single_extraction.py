@@ -0,0 +1,113 @@
+import json
+import os
+import pytest
+from unittest.mock import patch, Mock
+
+from metadata_cache import MetadataCache
+from platforms import TwitterDownloader, ENGINE_IN_PROCESS
+
+
+URL = "https://x.com/user/status/123"
+
+
+class TestSingleExtraction:
+    """Tests for reusing extracted info between get_video_info and download_media."""
+
+    def test_download_uses_load_info_json(self, temp_dir):
+        """Test that the download step loads the cached info instead of the URL."""
+        temp_file = os.path.join(temp_dir, "temp_video.mp4")
+        output = os.path.join(temp_dir, "out.mp4")
+        downloader = TwitterDownloader(temp_file=temp_file)
+        info = {"id": "123", "fps": 30, "webpage_url": URL, "formats": []}
+        commands = []
+
+        def fake_run(command, **kwargs):
+            commands.append(command)
+            if '--print-json' in command:
+                return Mock(returncode=0, stdout=json.dumps(info), stderr="")
+            open(output, 'w').close()
+            return Mock(returncode=0, stdout="", stderr="")
+
+        with patch('subprocess.run', side_effect=fake_run):
+            fps, _ = downloader.get_video_info(URL)
+            assert downloader.download_media(URL, output, skip_conversion=True)
+
+        assert fps == 30
+        download_command = commands[1]
+        assert URL not in download_command
+        assert download_command[-2:] == ['--load-info-json', downloader.info_file]
+        with open(downloader.info_file, 'r', encoding='utf-8') as f:
+            assert json.load(f) == info
+
+        downloader.cleanup()
+        assert not os.path.exists(downloader.info_file)
+
+    def test_stale_info_falls_back_to_url(self, temp_dir):
+        """Test that a download from expired stored info is retried from the URL and the cache entry dropped."""
+        output = os.path.join(temp_dir, "out.mp4")
+        cache = MetadataCache(os.path.join(temp_dir, "metadata.sqlite"))
+        downloader = TwitterDownloader(temp_file=os.path.join(temp_dir, "t.mp4"), metadata_cache=cache)
+        commands = []
+
+        def fake_run(command, **kwargs):
+            commands.append(command)
+            if '--print-json' in command:
+                return Mock(returncode=0, stdout='{"id": "123", "fps": 30}', stderr="")
+            if '--load-info-json' in command:
+                return Mock(returncode=1, stdout="", stderr="ERROR: HTTP Error 403: Forbidden")
+            open(output, 'w').close()
+            return Mock(returncode=0, stdout="", stderr="")
+
+        with patch('subprocess.run', side_effect=fake_run), patch.object(downloader, '_backoff'):
+            downloader.get_video_info(URL)
+            assert downloader.download_media(URL, output, skip_conversion=True)
+
+        assert '--load-info-json' in commands[1]
+        assert commands[2][-1] == URL and '--load-info-json' not in commands[2]
+        assert cache.get("twitter", "123") is None
+
+    def test_reuse_disabled_extracts_again(self, temp_dir):
+        """Test that disabling reuse keeps the original URL-based download."""
+        output = os.path.join(temp_dir, "out.mp4")
+        downloader = TwitterDownloader(temp_file=os.path.join(temp_dir, "t.mp4"), reuse_info=False)
+        commands = []
+
+        def fake_run(command, **kwargs):
+            commands.append(command)
+            if '--print-json' in command:
+                return Mock(returncode=0, stdout='{"fps": 30}', stderr="")
+            open(output, 'w').close()
+            return Mock(returncode=0, stdout="", stderr="")
+
+        with patch('subprocess.run', side_effect=fake_run):
+            downloader.get_video_info(URL)
+            downloader.download_media(URL, output, skip_conversion=True)
+
+        assert commands[1][-1] == URL
+        assert '--load-info-json' not in commands[1]
+
+    def test_cached_info_is_per_url(self):
+        """Test that info cached for one URL is not reused for another."""
+        downloader = TwitterDownloader()
+        with patch('subprocess.run', return_value=Mock(returncode=0, stdout='{"fps": 25}', stderr="")):
+            downloader.get_video_info(URL)
+
+        assert downloader.get_cached_info(URL) == {"fps": 25}
+        assert downloader.get_cached_info("https://x.com/user/status/456") is None
+
+    def test_in_process_download_uses_info(self, temp_dir):
+        """Test that the in-process engine downloads from the cached info dict."""
+        output = os.path.join(temp_dir, "out.mp4")
+        downloader = TwitterDownloader(engine=ENGINE_IN_PROCESS)
+        engine = Mock()
+        engine.extract_info.return_value = {"id": "123", "fps": 30}
+        engine.download_info.side_effect = lambda info, target, fmt, max_filesize, progress_hook: open(target, 'w').close()
+
+        with patch('ytdlp_engine.get_shared_engine', return_value=engine):
+            downloader.get_video_info(URL)
+            assert downloader.download_media(URL, output, skip_conversion=True)
+
+        engine.download_info.assert_called_once_with(
+            {"id": "123", "fps": 30}, output, downloader.get_download_formats(), None, None
+        )
+        engine.download.assert_not_called()
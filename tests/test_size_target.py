@@ -0,0 +1,107 @@
+import os
+from fractions import Fraction
+import pytest
+from unittest.mock import Mock, patch
+
+import size_target
+from ffmpeg_encoder import ClipEdit
+from platforms import TwitterDownloader, DownloadError, GIF_ENGINE_FFMPEG
+from size_target import GifSettings, SizeSearch, quality_ladder, plan_sample
+
+
+class TestSizeTarget:
+    """Tests for the target-size settings search."""
+
+    def test_quality_ladder(self):
+        """Test that every rung lowers quality and the ladder spans all three dimensions."""
+        ladder = quality_ladder(15, 1920)
+        assert ladder[0] == GifSettings(15, size_target.MAX_WIDTH, 256)
+        for better, worse in zip(ladder, ladder[1:]):
+            assert (worse.fps, worse.width, worse.colors) != (better.fps, better.width, better.colors)
+            assert worse.fps <= better.fps and worse.width <= better.width and worse.colors <= better.colors
+        assert all(rung.width % 2 == 0 for rung in ladder)
+        assert ladder[-1].colors == size_target.COLOR_STEPS[-1]
+        assert ladder[-1].fps == size_target.FPS_STEPS[-1]
+        assert size_target.MIN_WIDTH <= ladder[-1].width < size_target.MIN_WIDTH / size_target.WIDTH_STEP
+
+    def test_quality_ladder_keeps_source_divisors(self):
+        """Test that with a source rate every candidate frame rate divides it."""
+        source = Fraction(30000, 1001)
+        ladder = quality_ladder(source / 2, 640, source)
+        rates = sorted({rung.fps for rung in ladder}, reverse=True)
+        assert rates == [source / divisor for divisor in range(2, 2 + len(rates))]
+        assert rates[-1] >= size_target.FPS_STEPS[-1]
+
+    def test_plan_sample(self):
+        """Test that long clips are sampled in evenly spread segments and short clips whole."""
+        assert plan_sample(2.0) == [(0.0, 2.0)]
+        segments = plan_sample(60.0)
+        assert len(segments) == size_target.SAMPLE_SEGMENTS
+        assert [round(start) for start, _ in segments] == [10, 30, 50]
+        assert all(length == size_target.SAMPLE_SECONDS for _, length in segments)
+
+    def test_sample_command_follows_edit(self):
+        """Test that sampled segments are placed inside the trimmed range and cropped like the output."""
+        edit = ClipEdit(start=10.0, end=40.0, crop=(640, 360, 0, 0))
+        segments = plan_sample(edit.duration(120.0))
+        command = size_target.build_sample_command("ffmpeg", "in.mp4", "out.mkv", segments, 15, 480, edit)
+        seeks = [float(command[i + 1]) for i, arg in enumerate(command) if arg == '-ss']
+        assert seeks == [14.5, 24.5, 34.5]
+        graph = command[command.index('-filter_complex') + 1]
+        assert "[0:v]fps=15,crop=640:360:0:0,scale='min(480,iw)':-1:flags=lanczos,setsar=1[v0]" in graph
+        assert graph.endswith("concat=n=3:v=1:a=0[out]")
+
+    def test_search_picks_best_fitting_rung(self):
+        """Test that the binary search finds the first rung under budget with few previews."""
+        ladder = quality_ladder(15, 1280)
+        # Sizes fall along the ladder; rung 9 is the first that fits the margin-adjusted budget
+        sizes = {settings: 1000 * (len(ladder) - index) for index, settings in enumerate(ladder)}
+        budget = int(sizes[ladder[9]] / size_target.SAFETY_MARGIN) + 1
+        calls = []
+
+        def estimate(settings):
+            calls.append(settings)
+            return sizes[settings]
+
+        settings, estimated = SizeSearch(ladder, estimate, budget).run()
+        assert settings == ladder[9]
+        assert estimated == sizes[ladder[9]]
+        assert len(calls) == len(set(calls)) <= 2 + len(ladder).bit_length()
+
+    def test_search_falls_back_to_smallest(self):
+        """Test that the smallest settings are used when nothing fits, and the best when all fit."""
+        ladder = quality_ladder(10, 640)
+        assert SizeSearch(ladder, lambda settings: 10 ** 9, 1000).run()[0] == ladder[-1]
+        assert SizeSearch(ladder, lambda settings: 10, 1000).run() == (ladder[0], 10)
+
+    def test_convert_fits_budget(self, temp_dir, render_clip):
+        """Test that a conversion with max_bytes lands under the target and reports its settings."""
+        clip = render_clip(size="640x360", duration=6)
+        unlimited = os.path.join(temp_dir, "full.gif")
+        TwitterDownloader(gif_engine=GIF_ENGINE_FFMPEG).convert_to_gif(clip, unlimited, fps=15)
+        max_bytes = os.path.getsize(unlimited) // 3
+        downloader = TwitterDownloader(temp_file=os.path.join(temp_dir, "temp.mp4"), gif_engine=GIF_ENGINE_FFMPEG)
+        output = os.path.join(temp_dir, "fit.gif")
+
+        assert downloader.convert_to_gif(clip, output, fps=15, max_bytes=max_bytes)
+
+        stats = downloader.job_stats["target_size"]
+        assert os.path.getsize(output) <= max_bytes
+        assert stats["met"] and stats["output_bytes"] == os.path.getsize(output)
+        assert (stats["fps"], stats["width"], stats["colors"]) != (15, 640, 256)
+        assert not os.path.exists(os.path.join(temp_dir, "temp.sample.mkv"))
+        assert not os.path.exists(os.path.join(temp_dir, "temp.preview.gif"))
+
+    def test_sample_failure_is_a_download_error(self, temp_dir):
+        """Test that a failed size sample is reported like any other conversion failure."""
+        downloader = TwitterDownloader(temp_file=os.path.join(temp_dir, "temp.mp4"), gif_engine=GIF_ENGINE_FFMPEG)
+        probe = {"width": 640, "height": 360, "fps": 30, "duration": 6.0}
+
+        with patch('ffmpeg_encoder.probe_video', return_value=probe), \
+                patch.object(downloader, '_run_streaming', return_value=Mock(returncode=1, stderr="boom")), \
+                patch.object(downloader, '_encode_gif', side_effect=AssertionError("encoded anyway")):
+            with pytest.raises(DownloadError) as exc_info:
+                downloader.convert_to_gif(os.path.join(temp_dir, "clip.mp4"), os.path.join(temp_dir, "out.gif"),
+                                          fps=15, max_bytes=10 ** 6)
+
+        assert "size limit" in exc_info.value.message
@@ -0,0 +1,88 @@
+import os
+import subprocess
+import sys
+import pytest
+
+from workspace import WorkspaceManager, WorkspaceQuotaError
+from platforms import TwitterDownloader
+
+
+@pytest.fixture
+def manager(temp_dir):
+    """Workspace manager rooted in a temp dir, released after the test."""
+    manager = WorkspaceManager(root=os.path.join(temp_dir, "jobs"))
+    yield manager
+    manager.release_all()
+
+
+class TestWorkspaceManager:
+    """Tests for per-job temp workspaces."""
+
+    def test_acquire_gives_unique_directories(self, manager):
+        """Test that each job gets its own directory and temp file."""
+        first = manager.acquire(1)
+        second = manager.acquire(2)
+
+        assert first.path != second.path
+        assert os.path.isdir(first.path) and os.path.isdir(second.path)
+        assert os.path.dirname(first.temp_file) == first.path
+
+    def test_release_removes_directory(self, manager):
+        """Test that releasing a workspace deletes it, and release_all catches leftovers."""
+        first = manager.acquire()
+        second = manager.acquire()
+        with open(first.temp_file, 'wb') as f:
+            f.write(b"x" * 10)
+
+        first.release()
+        assert not os.path.exists(first.path)
+        manager.release_all()
+        assert not os.path.exists(second.path)
+
+    def test_sweep_removes_workspaces_of_dead_processes(self, temp_dir):
+        """Test that a workspace left behind by a crashed process is swept on startup."""
+        root = os.path.join(temp_dir, "jobs")
+        dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"],
+                              capture_output=True, text=True)
+        stale = os.path.join(root, "job_stale")
+        os.makedirs(stale)
+        with open(os.path.join(stale, WorkspaceManager.OWNER_FILENAME), 'w') as f:
+            f.write(dead.stdout.strip())
+
+        manager = WorkspaceManager(root=root)
+        live = manager.acquire()
+
+        assert not os.path.exists(stale)
+        assert manager.sweep_stale() == 0
+        assert os.path.exists(live.path)
+        manager.release_all()
+
+    def test_quota(self, temp_dir):
+        """Test remaining bytes and quota enforcement across in-flight jobs."""
+        manager = WorkspaceManager(root=os.path.join(temp_dir, "jobs"), quota_bytes=100)
+        first = manager.acquire()
+        second = manager.acquire()
+        with open(first.file("a.bin"), 'wb') as f:
+            f.write(b"x" * 60)
+
+        # .owner files count towards usage too
+        assert manager.remaining_bytes() < 40
+        with open(second.file("b.bin"), 'wb') as f:
+            f.write(b"x" * 60)
+        with pytest.raises(WorkspaceQuotaError):
+            second.check_quota()
+
+        second.release()
+        manager.check_quota()
+        manager.release_all()
+
+    def test_downloader_cleanup_releases_workspace(self, manager):
+        """Test that a downloader using a workspace keeps its temp files inside it."""
+        downloader = TwitterDownloader()
+        workspace = manager.acquire()
+        downloader.use_workspace(workspace)
+
+        assert downloader.temp_file.startswith(workspace.path)
+        assert downloader.info_file.startswith(workspace.path)
+        downloader.cleanup()
+        assert not os.path.exists(workspace.path)
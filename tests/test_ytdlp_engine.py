@@ -0,0 +1,124 @@
+import pytest
+from unittest.mock import patch, Mock
+
+from platforms import (
+    TwitterDownloader,
+    DownloadError,
+    NetworkError,
+    ENGINE_IN_PROCESS,
+    ENGINE_SUBPROCESS,
+)
+
+
+class TestInProcessEngine:
+    """Tests for the in-process yt-dlp engine."""
+
+    def test_get_video_info_in_process(self):
+        """Test that get_video_info uses the shared engine and skips subprocess."""
+        downloader = TwitterDownloader(engine=ENGINE_IN_PROCESS)
+        engine = Mock()
+        engine.extract_info.return_value = {"fps": 30, "id": "123"}
+
+        with patch('ytdlp_engine.get_shared_engine', return_value=engine), \
+             patch('subprocess.run') as mock_run:
+            fps, name = downloader.get_video_info("https://x.com/user/status/123")
+
+        assert fps == 30
+        assert name == "123"
+        engine.extract_info.assert_called_once_with("https://x.com/user/status/123", 'bestvideo[ext=mp4]')
+        mock_run.assert_not_called()
+
+    def test_download_media_in_process(self, temp_dir):
+        """Test that download_media passes format and target to the engine."""
+        import os
+        output = os.path.join(temp_dir, "out.mp4")
+        downloader = TwitterDownloader(engine=ENGINE_IN_PROCESS)
+        engine = Mock()
+        engine.download.side_effect = lambda url, target, fmt, max_filesize, progress_hook: open(target, 'w').close()
+
+        with patch('ytdlp_engine.get_shared_engine', return_value=engine):
+            assert downloader.download_media("https://x.com/user/status/123", output, skip_conversion=True)
+
+        engine.download.assert_called_once_with(
+            "https://x.com/user/status/123", output, downloader.get_download_formats(), None, None
+        )
+
+    def test_in_process_error_classification(self):
+        """Test that in-process errors are classified like subprocess stderr."""
+        downloader = TwitterDownloader(engine=ENGINE_IN_PROCESS, max_retries=1)
+        engine = Mock()
+        engine.extract_info.side_effect = Exception("ERROR: [twitter] 123: HTTP Error 404: Not Found")
+
+        with patch('ytdlp_engine.get_shared_engine', return_value=engine):
+            with pytest.raises(DownloadError) as exc_info:
+                downloader.get_video_info("https://x.com/user/status/123")
+        assert "not found" in exc_info.value.message.lower()
+
+    def test_in_process_network_retry(self):
+        """Test that network errors from the engine are retried with backoff."""
+        downloader = TwitterDownloader(engine=ENGINE_IN_PROCESS, max_retries=2)
+        engine = Mock()
+        engine.extract_info.side_effect = Exception("ERROR: Unable to download webpage: Connection refused")
+
+        with patch('ytdlp_engine.get_shared_engine', return_value=engine), \
+             patch('time.sleep') as mock_sleep:
+            with pytest.raises(NetworkError):
+                downloader.get_video_info("https://x.com/user/status/123")
+        assert engine.extract_info.call_count == 2
+        mock_sleep.assert_called_once_with(2)
+
+    def test_falls_back_to_subprocess_without_yt_dlp(self):
+        """Test fallback to the yt-dlp executable when yt_dlp can't be imported."""
+        downloader = TwitterDownloader(engine=ENGINE_IN_PROCESS)
+        mock_result = Mock(returncode=0, stdout='{"fps": 24}', stderr="")
+
+        with patch('ytdlp_engine.is_available', return_value=False), \
+             patch('subprocess.run', return_value=mock_result) as mock_run:
+            fps, _ = downloader.get_video_info("https://x.com/user/status/123")
+
+        assert fps == 24
+        assert mock_run.called
+        assert downloader.engine == ENGINE_SUBPROCESS
+
+
+class TestEngineConcurrency:
+    """Tests for running the shared engine from several worker threads."""
+
+    def test_downloads_overlap(self, temp_dir):
+        """Test that two threads download at the same time, each with its own YoutubeDL."""
+        import os
+        import threading
+        yt_dlp = pytest.importorskip("yt_dlp")
+        from ytdlp_engine import YtDlpEngine
+
+        engine = YtDlpEngine()
+        # Both downloads must be running at once to get past the barrier
+        barrier = threading.Barrier(2, timeout=5)
+        instances, errors = {}, []
+
+        def fake_download(ydl, urls):
+            instances.setdefault(threading.current_thread().name, set()).add(id(ydl))
+            barrier.wait()
+            open(ydl.params['outtmpl']['default'], 'w').close()
+            return 0
+
+        def job(name):
+            try:
+                for attempt in range(2):
+                    engine.download(f"https://x.com/user/status/{name}",
+                                    os.path.join(temp_dir, f"{name}-{attempt}.mp4"))
+            except Exception as e:
+                errors.append(e)
+
+        with patch.object(yt_dlp.YoutubeDL, 'download', autospec=True, side_effect=fake_download):
+            threads = [threading.Thread(target=job, args=(name,), name=name) for name in ("1", "2")]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert errors == []
+        # Each thread reuses its own instance across calls
+        assert all(len(ids) == 1 for ids in instances.values())
+        assert instances["1"] != instances["2"]
+        assert sorted(os.listdir(temp_dir)) == ["1-0.mp4", "1-1.mp4", "2-0.mp4", "2-1.mp4"]
@@ -0,0 +1,199 @@
+"""
+Per-job temporary workspaces for Social Media GIF Downloader.
+Each job gets its own temp directory so concurrent jobs never share files.
+Directories are removed on release, at exit, and (after a crash) by a sweep
+of stale workspaces the next time a manager starts.
+"""
+
+import atexit
+import logging
+import os
+import platform
+import shutil
+import tempfile
+import threading
+import time
+from typing import Optional, Dict, Union
+
+
+def _pid_alive(pid: int) -> bool:
+    """Check whether a process with this PID is still running."""
+    if pid == os.getpid():
+        return True
+    if platform.system() == "Windows":
+        # os.kill would terminate the process on Windows; rely on the age check instead
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _dir_size(path: str) -> int:
+    """Total size in bytes of all files under path."""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
+
+
+class Workspace:
+    """A unique temp directory owned by one job."""
+
+    TEMP_VIDEO_NAME = "temp_video.mp4"
+
+    def __init__(self, manager: "WorkspaceManager", path: str):
+        self.manager = manager
+        self.path = path
+        self.released = False
+
+    @property
+    def temp_file(self) -> str:
+        """Path of the job's downloaded temp video."""
+        return os.path.join(self.path, self.TEMP_VIDEO_NAME)
+
+    def file(self, name: str) -> str:
+        """Path of another scratch file inside this workspace."""
+        return os.path.join(self.path, name)
+
+    def usage(self) -> int:
+        """Bytes currently used by this workspace."""
+        return _dir_size(self.path) if not self.released else 0
+
+    def remaining_quota(self) -> Optional[int]:
+        """Bytes this job may still write before the shared quota is exceeded (None = unlimited)."""
+        return self.manager.remaining_bytes()
+
+    def check_quota(self) -> None:
+        """Raise WorkspaceQuotaError if in-flight jobs exceed the shared quota."""
+        self.manager.check_quota()
+
+    def release(self) -> None:
+        """Delete the workspace directory."""
+        self.manager.release(self)
+
+    def __enter__(self) -> "Workspace":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+
+class WorkspaceQuotaError(Exception):
+    """Raised when in-flight jobs use more temp space than the configured quota."""
+    pass
+
+
+class WorkspaceManager:
+    """Creates, tracks and cleans up per-job workspaces under one root directory."""
+
+    ROOT_DIRNAME = "social_media_gif_downloader_jobs"
+    OWNER_FILENAME = ".owner"
+    STALE_AGE = 24 * 60 * 60  # seconds
+
+    def __init__(self, root: Optional[str] = None, quota_bytes: Optional[int] = None):
+        self.root = root or os.path.join(tempfile.gettempdir(), self.ROOT_DIRNAME)
+        self.quota_bytes = quota_bytes or None
+        self._lock = threading.Lock()
+        self._active: Dict[str, Workspace] = {}
+        os.makedirs(self.root, exist_ok=True)
+        self.sweep_stale()
+        atexit.register(self.release_all)
+
+    def acquire(self, job_id: Union[int, str, None] = None) -> Workspace:
+        """Create a fresh workspace directory for a job."""
+        prefix = f"job_{job_id}_" if job_id is not None else "job_"
+        path = tempfile.mkdtemp(prefix=prefix, dir=self.root)
+        with open(os.path.join(path, self.OWNER_FILENAME), 'w', encoding='utf-8') as f:
+            f.write(str(os.getpid()))
+        workspace = Workspace(self, path)
+        with self._lock:
+            self._active[path] = workspace
+        logging.info(f"Acquired workspace {path}")
+        return workspace
+
+    def release(self, workspace: Workspace) -> None:
+        """Remove a workspace directory and stop tracking it."""
+        with self._lock:
+            self._active.pop(workspace.path, None)
+            if workspace.released:
+                return
+            workspace.released = True
+        shutil.rmtree(workspace.path, ignore_errors=True)
+        if os.path.exists(workspace.path):
+            logging.warning(f"Could not fully remove workspace {workspace.path} - files may still be in use")
+        else:
+            logging.info(f"Released workspace {workspace.path}")
+
+    def release_all(self) -> None:
+        """Release every workspace still held by this process."""
+        with self._lock:
+            workspaces = list(self._active.values())
+        for workspace in workspaces:
+            self.release(workspace)
+
+    def usage(self) -> int:
+        """Bytes used by all in-flight workspaces."""
+        with self._lock:
+            workspaces = list(self._active.values())
+        return sum(workspace.usage() for workspace in workspaces)
+
+    def remaining_bytes(self) -> Optional[int]:
+        """Bytes left under the quota across all in-flight jobs (None = unlimited)."""
+        if not self.quota_bytes:
+            return None
+        return max(0, self.quota_bytes - self.usage())
+
+    def check_quota(self) -> None:
+        """Raise WorkspaceQuotaError if in-flight jobs use more than the quota."""
+        if self.quota_bytes and self.usage() > self.quota_bytes:
+            raise WorkspaceQuotaError(
+                f"Temporary files exceed the {self.quota_bytes // (1024 * 1024)} MB workspace quota"
+            )
+
+    def sweep_stale(self) -> int:
+        """
+        Remove workspaces left behind by processes that crashed.
+        Returns the number of directories removed.
+        """
+        removed = 0
+        now = time.time()
+        try:
+            entries = os.listdir(self.root)
+        except OSError:
+            return 0
+
+        for name in entries:
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(path) or path in self._active:
+                continue
+            owner_pid = None
+            try:
+                with open(os.path.join(path, self.OWNER_FILENAME), 'r', encoding='utf-8') as f:
+                    owner_pid = int(f.read().strip())
+            except (OSError, ValueError):
+                pass
+
+            try:
+                age = now - os.path.getmtime(path)
+            except OSError:
+                continue
+            if owner_pid is None:
+                # Give a workspace that is still being created a moment to write its owner file
+                orphaned = age > 60
+            else:
+                orphaned = not _pid_alive(owner_pid)
+            if orphaned or age > self.STALE_AGE:
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+                logging.info(f"Removed stale workspace {path}")
+        return removed
@@ -0,0 +1,167 @@
+"""
+In-process yt-dlp engine for Social Media GIF Downloader.
+Drives long-lived yt_dlp.YoutubeDL instances (one per worker thread) instead
+of spawning the yt-dlp executable for every info/download call.
+"""
+
+import copy
+import logging
+import threading
+from typing import Callable, Optional, Dict, Any
+
+
+class _YtDlpLogger:
+    """Routes yt-dlp output into the logging module."""
+
+    def debug(self, msg: str) -> None:
+        # yt-dlp sends both debug and info messages through debug()
+        if msg.startswith('[debug] '):
+            logging.debug(msg)
+        else:
+            logging.info(msg)
+
+    def info(self, msg: str) -> None:
+        logging.info(msg)
+
+    def warning(self, msg: str) -> None:
+        logging.warning(msg)
+
+    def error(self, msg: str) -> None:
+        logging.error(msg)
+
+
+class _ThreadState(threading.local):
+    """Per-thread YoutubeDL instance and the settings of the call it is running."""
+    ydl = None
+    selector = None
+    progress_hook: Optional[Callable[[Dict[str, Any]], None]] = None
+
+
+class YtDlpEngine:
+    """
+    Wraps reusable YoutubeDL instances, one per calling thread.
+
+    YoutubeDL is not thread-safe, so every worker thread gets its own
+    instance, created on its first call and kept for the next ones. Jobs on
+    different threads download concurrently (the job queue's limits decide
+    how many), while each thread still reuses its loaded extractors. The
+    format selector and output template are swapped per call.
+    """
+
+    def __init__(self, timeout: int = 60):
+        # Fail here rather than on the first call if yt_dlp is missing
+        import yt_dlp  # noqa: F401
+
+        self.timeout = timeout
+        # Only guards creating instances; calls on different threads don't wait for each other
+        self._setup_lock = threading.Lock()
+        self._state = _ThreadState()
+
+    @property
+    def _ydl(self):
+        state = self._state
+        if state.ydl is None:
+            import yt_dlp
+
+            with self._setup_lock:
+                state.ydl = yt_dlp.YoutubeDL({
+                    'quiet': True,
+                    'no_warnings': True,
+                    'noprogress': True,
+                    'overwrites': True,
+                    'socket_timeout': self.timeout,
+                    'logger': _YtDlpLogger(),
+                    # Delegate to whatever selector the current call installed
+                    'format': self._select_formats,
+                    'progress_hooks': [self._on_progress],
+                })
+        return state.ydl
+
+    def _select_formats(self, ctx):
+        if self._state.selector is None:
+            return iter([])
+        return self._state.selector(ctx)
+
+    def _on_progress(self, status: Dict[str, Any]) -> None:
+        # Exceptions propagate on purpose: raising from the hook aborts the download
+        if self._state.progress_hook is not None:
+            self._state.progress_hook(status)
+
+    def _set_format(self, format_spec: Optional[str]) -> None:
+        self._state.selector = self._ydl.build_format_selector(format_spec or 'bestvideo*+bestaudio/best')
+
+    def extract_info(self, url: str, format_spec: Optional[str] = None) -> Dict[str, Any]:
+        """Extract info for a URL without downloading (equivalent of --print-json --skip-download)."""
+        self._set_format(format_spec)
+        info = self._ydl.extract_info(url, download=False)
+        return self._ydl.sanitize_info(info)
+
+    def _set_output(self, output_file: str, max_filesize: Optional[int],
+                    progress_hook: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+        self._ydl.params['outtmpl']['default'] = output_file
+        self._ydl.params['max_filesize'] = max_filesize
+        self._state.progress_hook = progress_hook
+
+    def download(self, url: str, output_file: str, format_spec: Optional[str] = None,
+                 max_filesize: Optional[int] = None,
+                 progress_hook: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        """
+        Download a URL to output_file (equivalent of -f FORMAT -o FILE --force-overwrites).
+        progress_hook receives yt-dlp's progress dicts for this download.
+        """
+        self._set_format(format_spec)
+        self._set_output(output_file, max_filesize, progress_hook)
+        try:
+            retcode = self._ydl.download([url])
+        finally:
+            self._state.progress_hook = None
+        if retcode:
+            import yt_dlp
+            raise yt_dlp.utils.DownloadError(f"yt-dlp exited with code {retcode}")
+
+    def download_info(self, info: Dict[str, Any], output_file: str, format_spec: Optional[str] = None,
+                      max_filesize: Optional[int] = None,
+                      progress_hook: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        """
+        Download from an already-extracted info dict (equivalent of --load-info-json).
+        Falls back to re-extracting the webpage URL if the stored info is stale.
+        """
+        import yt_dlp
+
+        self._set_format(format_spec)
+        self._set_output(output_file, max_filesize, progress_hook)
+        info = self._ydl.sanitize_info(copy.deepcopy(info), True)
+        try:
+            self._ydl.process_ie_result(info, download=True)
+        except yt_dlp.utils.DownloadError as e:
+            webpage_url = info.get('webpage_url')
+            if not webpage_url:
+                raise
+            logging.warning(f"Stored info failed to download: {e}; trying with URL {webpage_url}")
+            retcode = self._ydl.download([webpage_url])
+            if retcode:
+                raise yt_dlp.utils.DownloadError(f"yt-dlp exited with code {retcode}")
+        finally:
+            self._state.progress_hook = None
+
+
+_shared_engine = None
+_shared_engine_lock = threading.Lock()
+
+
+def is_available() -> bool:
+    """Check whether the yt_dlp package can be imported."""
+    try:
+        import yt_dlp  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def get_shared_engine(timeout: int = 60) -> YtDlpEngine:
+    """Return the process-wide engine, creating it on first use."""
+    global _shared_engine
+    with _shared_engine_lock:
+        if _shared_engine is None:
+            _shared_engine = YtDlpEngine(timeout=timeout)
+        return _shared_engine